@@ -0,0 +1,372 @@
+"""Admission control in front of the API: per-client token buckets and an in-flight cap.
+
+Requests under a rate-limited prefix (by default /public/) take a token from their client's
+bucket, which holds up to `burst` tokens and refills at `rate` per second; an empty bucket
+answers 429 with Retry-After. Rate limiting is off until a rate is set, and then needs an
+explicit client key source: a header the proxy writes the client address into, or PEER for the
+connection's own address. Every request except the exempt paths then needs an in-flight slot.
+/admin/ requests whose bearer token passes `admin_check` may use all `max_in_flight` slots;
+other requests only `max_in_flight - admin_reserved`, so a flood of public traffic cannot
+starve the admin dashboard. Beyond that the request is shed at once with 503 rather than queued.
+
+Buckets live in process memory, or with SQLiteBucketStore in a SQLite file shared by the
+workers of one host, which also carries settings changed at runtime to every worker. Those
+runtime changes are saved with the configured settings they were made over, so a restart with
+the same configuration keeps them and a restart with changed settings drops them. The in-flight
+cap is counted per process.
+"""
+from sqlalchemy import Table, Column, MetaData, String, Float, Integer, Text, select, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import create_db_engine, TUNED_PROFILE
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields, replace
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KIND_ADMIN = "admin"
+KIND_PUBLIC = "public"
+KIND_OTHER = "other"
+KINDS = (KIND_ADMIN, KIND_PUBLIC, KIND_OTHER)
+
+# Client key source for clients connecting directly: the socket's peer address
+PEER = "peer"
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    rate: float = 0.0           # tokens per second per client; 0 (the default) turns rate limiting off
+    burst: int = 10             # bucket size: requests a client may send at once
+    max_in_flight: int = 64     # requests running in this process; 0 turns the cap off
+    admin_reserved: int = 8     # of those, slots only /admin/ requests with a verified token may use
+
+    def validate(self):
+        if self.rate < 0:
+            raise ValueError("rate must not be negative")
+        if self.burst < 1:
+            raise ValueError("burst must be at least 1")
+        if self.max_in_flight < 0:
+            raise ValueError("max_in_flight must not be negative")
+        if self.admin_reserved < 0 or (self.max_in_flight and self.admin_reserved >= self.max_in_flight):
+            raise ValueError("admin_reserved must be below max_in_flight")
+        return self
+
+def settings_from_env() -> AdmissionSettings:
+    return AdmissionSettings(
+        rate=float(os.getenv("RATE_LIMIT_PER_SECOND", "0")),
+        burst=int(os.getenv("RATE_LIMIT_BURST", "10")),
+        max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64")),
+        admin_reserved=int(os.getenv("ADMISSION_ADMIN_RESERVED", "8"))
+    ).validate()
+
+class MemoryBucketStore:
+    """Token buckets of this process. The least recently seen clients are dropped past
+    `max_clients`; a dropped client starts again with a full bucket."""
+    blocking = False
+
+    def __init__(self, max_clients: int = 100000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Takes one token; returns 0 if admitted, else the seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if wait == 0.0 else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def load_settings(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def save_settings(self, settings: Dict[str, Any]):
+        pass
+
+_metadata = MetaData()
+
+buckets_table = Table(
+    "rate_limit_buckets", _metadata,
+    Column("key", String(255), primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),  # unix time, comparable across processes
+    sqlite_with_rowid=False
+)
+
+settings_table = Table(
+    "admission_settings", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("settings", Text, nullable=False)
+)
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by the worker processes of one host. Each take is
+    one atomic upsert; buckets idle long enough to be full again are purged periodically."""
+    blocking = True
+
+    def __init__(self, path: str, purge_interval: float = 60.0):
+        self.path = path
+        self.engine = create_db_engine(f"sqlite:///{path}", TUNED_PROFILE)
+        _metadata.create_all(self.engine)
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        refilled = func.min(burst, buckets_table.c.tokens + (now - buckets_table.c.updated_at) * rate)
+        stmt = sqlite_insert(buckets_table).values(key=key, tokens=burst - 1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[buckets_table.c.key],
+            set_={"tokens": refilled - 1, "updated_at": now},
+            where=refilled >= 1
+        ).returning(buckets_table.c.tokens)
+        with self.engine.begin() as conn:
+            admitted = conn.execute(stmt).first() is not None
+            if not admitted:
+                tokens = conn.execute(select(refilled).where(buckets_table.c.key == key)).scalar()
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            self.purge(rate, burst)
+        return 0.0 if admitted else (1 - tokens) / rate
+
+    def purge(self, rate: float, burst: int) -> int:
+        if rate <= 0:
+            return 0
+        with self.engine.begin() as conn:
+            return conn.execute(
+                delete(buckets_table).where(buckets_table.c.updated_at < time.time() - burst / rate)
+            ).rowcount
+
+    def load_settings(self) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            value = conn.execute(select(settings_table.c.settings).where(settings_table.c.id == 1)).scalar()
+        return json.loads(value) if value else None
+
+    def save_settings(self, settings: Dict[str, Any]):
+        stmt = sqlite_insert(settings_table).values(id=1, settings=json.dumps(settings))
+        with self.engine.begin() as conn:
+            conn.execute(stmt.on_conflict_do_update(index_elements=[settings_table.c.id], set_={"settings": stmt.excluded.settings}))
+
+class AdmissionController:
+    def __init__(
+        self,
+        settings: AdmissionSettings = AdmissionSettings(),
+        store=None,
+        rate_limited_prefixes: Tuple[str, ...] = ("/public/",),
+        admin_prefixes: Tuple[str, ...] = ("/admin/",),
+        exempt_paths: Tuple[str, ...] = ("/metrics",),
+        client_source: Optional[str] = None,
+        admin_check: Optional[Callable[[str], bool]] = None,
+        settings_refresh: float = 2.0
+    ):
+        # Where the client key comes from: PEER, or a header such as "x-forwarded-for" whose first
+        # address identifies the client. None leaves it unset, and rate limiting cannot be turned on:
+        # behind a proxy every client would share the proxy's bucket
+        self.client_source = client_source.lower() if client_source else None
+        self.client_header = self.client_source.encode() if self.client_source not in (None, PEER) else None
+        # Called with the bearer token of an /admin/ request; only when it returns True does the
+        # request get the reserved slots. Without it no request does
+        self.admin_check = admin_check
+        # The configured (environment) settings, in force unless changed through configure()
+        self.configured = self._checked(settings)
+        self.settings = self.configured
+        self.store = store or MemoryBucketStore()
+        self.rate_limited_prefixes = rate_limited_prefixes
+        self.admin_prefixes = admin_prefixes
+        self.exempt_paths = exempt_paths
+        self.settings_refresh = settings_refresh
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._in_flight = dict.fromkeys(KINDS, 0)
+        self._stats = {"admitted": 0, "rate_limited": 0, "shed": 0, "shed_admin": 0, "admin_unverified": 0,
+                       "store_errors": 0, "peak_in_flight": 0}
+        self._ignored: Optional[Dict[str, Any]] = None
+        # A worker (re)started with the configuration the others run adopts their runtime changes
+        self.refresh(force=True)
+
+    def classify(self, scope) -> Optional[str]:
+        path = scope["path"]
+        if path in self.exempt_paths:
+            return None
+        if path.startswith(self.admin_prefixes):
+            token = bearer_token(scope)
+            if token is not None:
+                if self.admin_check is not None and self.admin_check(token):
+                    return KIND_ADMIN
+                # An invalid or expired token competes for the shared slots like any other request
+                self._count("admin_unverified")
+        if path.startswith(self.rate_limited_prefixes):
+            return KIND_PUBLIC
+        return KIND_OTHER
+
+    def client_key(self, scope) -> str:
+        if self.client_header is not None:
+            for name, value in scope["headers"]:
+                if name == self.client_header:
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def check_rate(self, key: str) -> float:
+        """Seconds the client has to wait, 0 when it may go ahead. Store errors admit the request."""
+        self.refresh()
+        settings = self.settings
+        if settings.rate <= 0:
+            return 0.0
+        try:
+            wait = self.store.take(key, settings.rate, settings.burst)
+        except Exception:
+            logger.exception("Rate limit store failed; admitting the request")
+            self._count("store_errors")
+            return 0.0
+        if wait > 0:
+            self._count("rate_limited")
+        return wait
+
+    def enter(self, kind: str) -> bool:
+        settings = self.settings
+        with self._lock:
+            total = sum(self._in_flight.values())
+            if settings.max_in_flight:
+                limit = settings.max_in_flight if kind == KIND_ADMIN else settings.max_in_flight - settings.admin_reserved
+                if total >= limit:
+                    self._stats["shed_admin" if kind == KIND_ADMIN else "shed"] += 1
+                    return False
+            self._in_flight[kind] += 1
+            self._stats["admitted"] += 1
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], total + 1)
+            return True
+
+    def leave(self, kind: str):
+        with self._lock:
+            self._in_flight[kind] -= 1
+
+    def configure(self, **changes) -> Dict[str, Any]:
+        """Apply the given (non-None) settings here and, through a shared store, in every worker
+        running the same configured settings."""
+        settings = self._checked(replace(self.settings, **{name: value for name, value in changes.items() if value is not None}))
+        self.store.save_settings({"settings": asdict(settings), "configured": asdict(self.configured), "saved_at": time.time()})
+        self.settings = settings
+        return asdict(settings)
+
+    def refresh(self, force: bool = False):
+        """Pick up settings another worker saved to a shared store, at most every settings_refresh seconds."""
+        if not self.store.blocking:
+            return
+        now = time.monotonic()
+        if now < self._next_refresh and not force:
+            return
+        self._next_refresh = now + self.settings_refresh
+        try:
+            stored = self.store.load_settings()
+        except Exception:
+            logger.exception("Reading shared admission settings failed")
+            return
+        self.settings = self._runtime_settings(stored) or self.configured
+
+    def _runtime_settings(self, stored: Optional[Dict[str, Any]]) -> Optional[AdmissionSettings]:
+        # Saved over other configured settings (or by an older version): the configuration has
+        # changed since, and it wins
+        if not stored or stored.get("configured") != asdict(self.configured):
+            return None
+        names = {field.name for field in fields(AdmissionSettings)}
+        try:
+            return self._checked(AdmissionSettings(**{k: v for k, v in stored["settings"].items() if k in names}))
+        except (TypeError, ValueError) as exc:
+            if stored != self._ignored:
+                self._ignored = stored
+                logger.warning("Ignoring shared admission settings %s: %s", stored["settings"], exc)
+            return None
+
+    def _checked(self, settings: AdmissionSettings) -> AdmissionSettings:
+        settings.validate()
+        if settings.rate > 0 and self.client_source is None:
+            raise ValueError(f"rate limiting needs a client key source: a header such as x-forwarded-for, or {PEER!r}")
+        return settings
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            for kind, count in self._in_flight.items():
+                stats[f"in_flight_{kind}"] = count
+        stats["in_flight"] = sum(stats[f"in_flight_{kind}"] for kind in KINDS)
+        stats["store"] = "sqlite" if isinstance(self.store, SQLiteBucketStore) else "memory"
+        stats["client_source"] = self.client_source
+        stats["runtime_override"] = self.settings != self.configured
+        return stats
+
+def bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return (token.strip() or None) if scheme.lower() == "bearer" else None
+    return None
+
+def controller_from_env(admin_check: Optional[Callable[[str], bool]] = None) -> AdmissionController:
+    backend = os.getenv("ADMISSION_BACKEND", "memory")
+    if backend == "sqlite":
+        store = SQLiteBucketStore(os.getenv("ADMISSION_SQLITE_PATH", "./admission.db"))
+    elif backend == "memory":
+        store = MemoryBucketStore(int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000")))
+    else:
+        raise ValueError(f"ADMISSION_BACKEND must be memory or sqlite, not {backend!r}")
+    prefixes = tuple(p for p in os.getenv("RATE_LIMIT_PATHS", "/public/").split(",") if p)
+    return AdmissionController(settings_from_env(), store, rate_limited_prefixes=prefixes,
+                               client_source=os.getenv("RATE_LIMIT_CLIENT_KEY") or None, admin_check=admin_check)
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController. Rejections are answered here, before
+    routing, so a shed request costs no threadpool worker and no database session."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        kind = self.controller.classify(scope) if scope["type"] == "http" else None
+        if kind is None:
+            await self.app(scope, receive, send)
+            return
+
+        if kind == KIND_PUBLIC:
+            key = self.controller.client_key(scope)
+            if self.controller.store.blocking:
+                wait = await asyncio.get_running_loop().run_in_executor(None, self.controller.check_rate, key)
+            else:
+                wait = self.controller.check_rate(key)
+            if wait > 0:
+                await self._reject(send, 429, "Rate limit exceeded, retry later", wait)
+                return
+
+        if not self.controller.enter(kind):
+            await self._reject(send, 503, "Server is busy, retry shortly", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.leave(kind)
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
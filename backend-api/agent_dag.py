@@ -0,0 +1,322 @@
+"""Dependency-ordered execution of agent steps.
+
+Each Step reads the outputs of the steps named in `inputs` (passed as keyword arguments) and
+publishes its own output under its name. DagExecutor starts every step as soon as its inputs
+exist, so independent steps overlap on a thread pool (run) or as asyncio tasks (run_async),
+each under its own timeout. `inline` steps run on the calling thread instead, for steps that
+share something with the caller, such as its Session, and must never be left running. A step is skipped when `when(**inputs)` is false or when one of
+its inputs was skipped. DagRun keeps start/finish times per step and the critical path: the
+chain of dependent steps with the largest total duration, which bounds the run time however
+many workers there are.
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import asyncio
+import inspect
+import time
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
+
+STEP_OK = "ok"
+STEP_SKIPPED = "skipped"
+STEP_FAILED = "failed"
+STEP_TIMEOUT = "timeout"
+
+class DagError(ValueError):
+    pass
+
+class StepTimeout(TimeoutError):
+    def __init__(self, step: str, timeout: float):
+        super().__init__(f"Step {step} did not finish within {timeout:g}s")
+        self.step = step
+        self.timeout = timeout
+
+class Step:
+    """`optional` steps that fail or time out are recorded and treated as skipped;
+    any other failure aborts the run. `inline` steps run on the thread that called run(),
+    one at a time, while pooled steps carry on; their timeout is not enforced."""
+
+    def __init__(self, name: str, run: Callable[..., Any], inputs: Iterable[str] = (),
+                 timeout: Optional[float] = None, when: Optional[Callable[..., bool]] = None,
+                 optional: bool = False, inline: bool = False):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.timeout = timeout
+        self.when = when
+        self.optional = optional
+        self.inline = inline
+
+class StepRecord:
+    def __init__(self, name: str):
+        self.name = name
+        self.status: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+class DagRun:
+    """Outputs and timings of one execution; times are seconds since the run started."""
+
+    def __init__(self, steps: Dict[str, Step], initial: Dict[str, Any]):
+        self.steps = steps
+        self.values: Dict[str, Any] = dict(initial)
+        self.records = {name: StepRecord(name) for name in steps}
+        self.wall_seconds = 0.0
+        self._origin = time.perf_counter()
+
+    def output(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default) if self.records[name].status == STEP_OK else default
+
+    def critical_path(self) -> List[StepRecord]:
+        longest: Dict[str, Tuple[float, List[str]]] = {}
+
+        def visit(name: str) -> Tuple[float, List[str]]:
+            if name not in longest:
+                inputs = [visit(i) for i in self.steps[name].inputs if i in self.records]
+                total, path = max(inputs, key=lambda entry: entry[0], default=(0.0, []))
+                longest[name] = (total + self.records[name].duration, path + [name])
+            return longest[name]
+
+        if not self.records:
+            return []
+        _, path = max((visit(name) for name in self.records), key=lambda entry: entry[0])
+        return [self.records[name] for name in path]
+
+    def summary(self) -> Dict[str, Any]:
+        path = self.critical_path()
+        return {
+            "wall_ms": round(self.wall_seconds * 1000, 3),
+            "critical_path": [record.name for record in path],
+            "critical_path_ms": round(sum(record.duration for record in path) * 1000, 3),
+            "serial_ms": round(sum(record.duration for record in self.records.values()) * 1000, 3),
+            "steps": {
+                name: {"status": record.status, "ms": round(record.duration * 1000, 3),
+                       **({"error": record.error} if record.error else {})}
+                for name, record in self.records.items()
+            },
+        }
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def _arguments(self, step: Step) -> Optional[Dict[str, Any]]:
+        """Keyword arguments for the step, or None when it is to be skipped."""
+        for name in step.inputs:
+            if name in self.records and self.records[name].status != STEP_OK:
+                return None
+        arguments = {name: self.values[name] for name in step.inputs}
+        if step.when is not None and not step.when(**arguments):
+            return None
+        return arguments
+
+    def _start(self, step: Step):
+        self.records[step.name].started = self._now()
+
+    def _finish(self, step: Step, status: str, value: Any = None, error: Optional[BaseException] = None):
+        record = self.records[step.name]
+        record.status = status
+        if record.started is not None:
+            record.finished = self._now()
+        if error is not None:
+            record.error = f"{type(error).__name__}: {error}"
+        if status == STEP_OK:
+            self.values[step.name] = value
+
+class DagExecutor:
+    """Runs `steps` with up to `max_workers` at once (0 runs them one after another on the
+    calling thread, where timeouts cannot be enforced). Pass a long-lived `pool` to run on it
+    instead of starting and stopping a thread pool per run; `max_workers` then only chooses
+    between pooled and inline. A timed-out step keeps its thread until it returns, so steps
+    that use a non-thread-safe resource of the caller, such as its Session, must be `inline`."""
+
+    def __init__(self, steps: Iterable[Step], max_workers: int = 4, default_timeout: Optional[float] = None,
+                 pool: Optional[ThreadPoolExecutor] = None):
+        self.steps: Dict[str, Step] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise DagError(f"Duplicate step {step.name}")
+            self.steps[step.name] = step
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.pool = pool
+        self.order = self._topological_order()
+
+    def run(self, initial: Optional[Dict[str, Any]] = None) -> DagRun:
+        dag_run = self._new_run(initial)
+        if self.max_workers == 0:
+            for step in self.order:
+                self._run_inline(dag_run, step)
+            dag_run.wall_seconds = dag_run._now()
+            return dag_run
+
+        remaining = self._dependencies()
+        running: Dict[Any, Tuple[Step, Optional[float]]] = {}
+        pool = self.pool or ThreadPoolExecutor(self.max_workers, thread_name_prefix="agent-step")
+        try:
+            ready = [step for step in self.order if not remaining[step.name]]
+            while ready or running:
+                inline = []
+                for step in ready:
+                    arguments = dag_run._arguments(step)
+                    if arguments is None:
+                        dag_run._finish(step, STEP_SKIPPED)
+                        continue
+                    if step.inline:
+                        inline.append((step, arguments))
+                        continue
+                    timeout = self._timeout(step)
+                    deadline = time.monotonic() + timeout if timeout is not None else None
+                    running[pool.submit(self._call, dag_run, step, arguments)] = (step, deadline)
+                # Pooled steps are submitted first so they overlap with the inline ones
+                for step, arguments in inline:
+                    self._run_step(dag_run, step, arguments)
+                ready = self._released(remaining, [step for step in ready if dag_run.records[step.name].status])
+                if not running:
+                    continue
+
+                deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    step, _ = running.pop(future)
+                    try:
+                        dag_run._finish(step, STEP_OK, future.result())
+                    except Exception as e:
+                        self._failed(dag_run, step, STEP_FAILED, e)
+                    finished.append(step)
+                now = time.monotonic()
+                for future, (step, deadline) in list(running.items()):
+                    if deadline is not None and now >= deadline:
+                        del running[future]
+                        self._failed(dag_run, step, STEP_TIMEOUT, StepTimeout(step.name, self._timeout(step)))
+                        finished.append(step)
+                ready += self._released(remaining, finished)
+        finally:
+            # A timed-out step keeps its thread until it returns; nothing waits for it
+            if pool is not self.pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                for future in running:
+                    future.cancel()
+        dag_run.wall_seconds = dag_run._now()
+        return dag_run
+
+    async def run_async(self, initial: Optional[Dict[str, Any]] = None) -> DagRun:
+        """Same scheduling with each step as an asyncio task; `run` may return an awaitable."""
+        dag_run = self._new_run(initial)
+        remaining = self._dependencies()
+        running: Dict[asyncio.Task, Step] = {}
+        try:
+            ready = [step for step in self.order if not remaining[step.name]]
+            while ready or running:
+                for step in ready:
+                    arguments = dag_run._arguments(step)
+                    if arguments is None:
+                        dag_run._finish(step, STEP_SKIPPED)
+                        continue
+                    dag_run._start(step)
+                    task = asyncio.ensure_future(asyncio.wait_for(self._invoke(step, arguments), self._timeout(step)))
+                    running[task] = step
+                ready = self._released(remaining, [step for step in ready if dag_run.records[step.name].status])
+                if not running:
+                    continue
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                finished = []
+                for task in done:
+                    step = running.pop(task)
+                    try:
+                        dag_run._finish(step, STEP_OK, task.result())
+                    except asyncio.TimeoutError:
+                        self._failed(dag_run, step, STEP_TIMEOUT, StepTimeout(step.name, self._timeout(step)))
+                    except Exception as e:
+                        self._failed(dag_run, step, STEP_FAILED, e)
+                    finished.append(step)
+                ready += self._released(remaining, finished)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        dag_run.wall_seconds = dag_run._now()
+        return dag_run
+
+    def _new_run(self, initial: Optional[Dict[str, Any]]) -> DagRun:
+        initial = initial or {}
+        missing = {name for step in self.steps.values() for name in step.inputs
+                   if name not in self.steps and name not in initial}
+        if missing:
+            raise DagError(f"Missing inputs: {sorted(missing)}")
+        return DagRun(self.steps, initial)
+
+    def _run_inline(self, dag_run: DagRun, step: Step):
+        arguments = dag_run._arguments(step)
+        if arguments is None:
+            dag_run._finish(step, STEP_SKIPPED)
+            return
+        self._run_step(dag_run, step, arguments)
+
+    def _run_step(self, dag_run: DagRun, step: Step, arguments: Dict[str, Any]):
+        dag_run._start(step)
+        try:
+            value = step.run(**arguments)
+        except Exception as e:
+            self._failed(dag_run, step, STEP_FAILED, e)
+            return
+        dag_run._finish(step, STEP_OK, value)
+
+    @staticmethod
+    def _call(dag_run: DagRun, step: Step, arguments: Dict[str, Any]) -> Any:
+        # Started when a worker picks it up, so waiting for a free worker is not step time
+        dag_run._start(step)
+        return step.run(**arguments)
+
+    @staticmethod
+    async def _invoke(step: Step, arguments: Dict[str, Any]) -> Any:
+        value = step.run(**arguments)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    def _failed(self, dag_run: DagRun, step: Step, status: str, error: Exception):
+        dag_run._finish(step, status, error=error)
+        if not step.optional:
+            raise error
+
+    def _timeout(self, step: Step) -> Optional[float]:
+        return step.timeout if step.timeout is not None else self.default_timeout
+
+    def _dependencies(self) -> Dict[str, set]:
+        return {name: {i for i in step.inputs if i in self.steps} for name, step in self.steps.items()}
+
+    def _released(self, remaining: Dict[str, set], finished: List[Step]) -> List[Step]:
+        released = []
+        for step in finished:
+            for name in self.steps:
+                if step.name in remaining[name]:
+                    remaining[name].discard(step.name)
+                    if not remaining[name]:
+                        released.append(self.steps[name])
+        return released
+
+    def _topological_order(self) -> List[Step]:
+        remaining = self._dependencies()
+        order: List[Step] = []
+        ready = [name for name, inputs in remaining.items() if not inputs]
+        while ready:
+            name = ready.pop(0)
+            order.append(self.steps[name])
+            for other, inputs in remaining.items():
+                if name in inputs:
+                    inputs.discard(name)
+                    if not inputs:
+                        ready.append(other)
+        if len(order) != len(self.steps):
+            raise DagError(f"Cycle between steps: {sorted(set(self.steps) - {s.name for s in order})}")
+        return order
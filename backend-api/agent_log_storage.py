@@ -0,0 +1,368 @@
+"""Compact storage for AgentLog results: content-addressed payloads and archive files.
+
+A result whose JSON is longer than AGENT_LOG_INLINE_BYTES is stored compressed in
+log_payloads under the SHA-256 of the JSON, and the log row keeps only that hash, so a letter
+or result dict logged again (re-evaluations, retries) is stored once. Results are a few hundred
+bytes each, too short for zlib to find much repetition on its own, so they are compressed with
+a preset dictionary of the letter templates and result keys. ORM inserts are compacted by a
+before_insert listener; Core bulk inserts go through compact_rows.
+
+`python agent_log_storage.py archive --older-than-days N` moves older logs, with their results
+inlined, into one gzip NDJSON file per day, then deletes the rows and any payload no longer
+referenced. Each chunk is appended as its own gzip member and synced before its rows are
+deleted; a member cut short by a crash is skipped when reading and its rows, still in the
+database, are archived again by the next run.
+"""
+from sqlalchemy import event, select, delete, update, func, exists
+from sqlalchemy.orm import Session
+from models import AgentLog, LogPayload
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = "zlib"
+CODEC_ZLIB_D1 = "zlib-d1"
+
+# Frozen: payloads written with zlib-d1 need exactly these bytes to decompress. Template or
+# result changes go into a new dictionary under a new codec name. zlib favours matches near
+# the end of the dictionary, so the most common text comes last.
+_DICTIONARY_D1 = "".join((
+    '{"status": "rejected", "eligibility_score": 50, "reason": "Eligibility score 50.0% requires higher credit score or income", '
+    '"score_factors": {"income": 20, "credit_score": 25, "lti_ratio": 15, "employment": 15}, "policy_version": "2024-01-underwriting-v1"}',
+    '{"report_url": null, "content": "\\nLOAN APPLICATION STATUS REPORT\\n\\nDate: 2024-01-01\\nReference: \\n\\nDear ,\\n\\n'
+    'We regret to inform you that your loan application could not be approved at this time.\\n\\nApplication Details:\\n'
+    '- Requested Amount: \\u20b9,000.00\\n- Eligibility Score: %\\n- Reason: Eligibility score % below minimum threshold\\n\\n'
+    'Recommendations for Future Applications:\\n1. Improve your credit score through timely payments\\n'
+    '2. Consider applying for a lower loan amount\\n3. Increase your monthly income documentation\\n\\n'
+    'You may reapply after 3 months.\\n\\nBest Regards,\\nLoanify NBFC Limited\\n", "generated_at": "2024-01-01T00:00:00"}',
+    '{"letter_url": null, "content": "\\nLOAN SANCTION LETTER\\n\\nDate: 2024-01-01\\nReference: \\n\\nDear ,\\n\\n'
+    'We are pleased to inform you that your loan application has been APPROVED.\\n\\nLoan Details:\\n'
+    '- Sanctioned Amount: \\u20b9,000.00\\n- Interest Rate: 10.5% per annum\\n- Tenure: Up to 60 months\\n'
+    '- Processing Fee: \\u20b9\\n\\nThis sanction is valid for 30 days from the date of issue.\\n\\n'
+    'Best Regards,\\nLoanify NBFC Limited\\n", "generated_at": "2024-01-01T00:00:00"}',
+    '{"status": "rejected", "eligibility_score": 50, "reason": "Eligibility score 50.0% below minimum threshold", '
+    '"rejection_report_url": null, "sanction_letter_url": null, "stage": "completed", '
+    '"checks": {"documents": {"success": false, "documents": 0, "verified": 0, "pending": 0, "failed": 0, '
+    '"unverified_types": []}, "duplicates": {"success": true, "duplicates": {}}}, '
+    '"timings": {"wall_ms": 1.0, "critical_path": ["duplicates"], "critical_path_ms": 0.5, "serial_ms": 1.0, '
+    '"steps": {"kyc": {"status": "ok", "ms": 0.0}, "documents": {"status": "ok", "ms": 0.5}, '
+    '"duplicates": {"status": "ok", "ms": 0.5}, "underwriting": {"status": "ok", "ms": 0.0}, '
+    '"sanction": {"status": "skipped", "ms": 0.0}, "rejection": {"status": "ok", "ms": 0.1}}}}',
+)).encode()
+
+CODEC_DICTIONARIES = {CODEC_ZLIB: b"", CODEC_ZLIB_D1: _DICTIONARY_D1}
+CODEC = CODEC_ZLIB_D1
+
+# Results longer than this many characters go to log_payloads (0 keeps every result inline)
+INLINE_LIMIT = int(os.getenv("AGENT_LOG_INLINE_BYTES", "512"))
+ARCHIVE_DIR = os.getenv("AGENT_LOG_ARCHIVE_DIR", "./agent_log_archive")
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_CHUNK_SIZE = 5000
+
+ARCHIVE_NAME = re.compile(r"^agent_logs-(\d{4}-\d{2}-\d{2})\.ndjson\.gz$")
+
+def compress(raw: bytes, codec: str = CODEC) -> bytes:
+    compressor = zlib.compressobj(9, zdict=CODEC_DICTIONARIES[codec]) if CODEC_DICTIONARIES[codec] else zlib.compressobj(9)
+    return compressor.compress(raw) + compressor.flush()
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec not in CODEC_DICTIONARIES:
+        raise ValueError(f"Unknown payload codec {codec}")
+    decompressor = zlib.decompressobj(zdict=CODEC_DICTIONARIES[codec]) if CODEC_DICTIONARIES[codec] else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+def payload_row(text: str) -> Dict[str, Any]:
+    raw = text.encode()
+    data = compress(raw)
+    return {
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "codec": CODEC,
+        "size_bytes": len(raw),
+        "stored_bytes": len(data),
+        "data": data,
+        "created_at": datetime.utcnow(),
+    }
+
+def _should_compact(result: Optional[str]) -> bool:
+    return INLINE_LIMIT > 0 and result is not None and len(result) > INLINE_LIMIT
+
+def store_payloads(connection, payloads: Iterable[Dict[str, Any]]):
+    """Insert payload rows whose hash is not stored yet."""
+    payloads = list({payload["sha256"]: payload for payload in payloads}.values())
+    if not payloads:
+        return
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(LogPayload.__table__).on_conflict_do_nothing(index_elements=["sha256"])
+        connection.execute(stmt, payloads)
+        return
+    stored = set(connection.execute(
+        select(LogPayload.sha256).where(LogPayload.sha256.in_([payload["sha256"] for payload in payloads]))
+    ).scalars())
+    missing = [payload for payload in payloads if payload["sha256"] not in stored]
+    if missing:
+        connection.execute(LogPayload.__table__.insert(), missing)
+
+def compact_rows(connection, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """agent_log_row dicts for a Core bulk insert, with large results moved to log_payloads."""
+    compacted, payloads = [], []
+    for row in rows:
+        row = {**row, "payload_hash": None}
+        if _should_compact(row["result"]):
+            payload = payload_row(row["result"])
+            payloads.append(payload)
+            row["result"] = None
+            row["payload_hash"] = payload["sha256"]
+        compacted.append(row)
+    store_payloads(connection, payloads)
+    return compacted
+
+@event.listens_for(AgentLog, "before_insert")
+def _compact_before_insert(mapper, connection, target):
+    if target.payload_hash is None and _should_compact(target.result):
+        payload = payload_row(target.result)
+        store_payloads(connection, [payload])
+        target.result = None
+        target.payload_hash = payload["sha256"]
+
+def load_payloads(db: Session, hashes: Iterable[str]) -> Dict[str, str]:
+    hashes = list(set(hashes))
+    texts = {}
+    for start in range(0, len(hashes), 500):
+        rows = db.execute(
+            select(LogPayload.sha256, LogPayload.codec, LogPayload.data)
+            .where(LogPayload.sha256.in_(hashes[start:start + 500]))
+        ).all()
+        for sha256, codec, data in rows:
+            texts[sha256] = decompress(data, codec).decode()
+    return texts
+
+def with_payloads(db: Session, rows: Sequence[Any]) -> List[Any]:
+    """agent_logs rows (with result and payload_hash columns) with result filled in from log_payloads."""
+    texts = load_payloads(db, [row.payload_hash for row in rows if row.payload_hash is not None])
+    if not texts:
+        return list(rows)
+    return [
+        row if row.payload_hash is None else tuple(
+            texts.get(row.payload_hash) if key == "result" else value for key, value in row._mapping.items()
+        )
+        for row in rows
+    ]
+
+def read_result(db: Session, log: AgentLog) -> Optional[Dict[str, Any]]:
+    if log.payload_hash is not None:
+        text = load_payloads(db, [log.payload_hash]).get(log.payload_hash)
+    else:
+        text = log.result
+    return json.loads(text) if text else None
+
+def _delete_unreferenced(db: Session, hashes: Iterable[str]) -> int:
+    hashes = list(hashes)
+    if not hashes:
+        return 0
+    referenced = exists().where(AgentLog.payload_hash == LogPayload.sha256)
+    result = db.execute(
+        delete(LogPayload).where(LogPayload.sha256.in_(hashes), ~referenced)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+# --- Archive -------------------------------------------------------------------------------
+
+def archive_path(archive_dir: str, day: date) -> str:
+    return os.path.join(archive_dir, f"agent_logs-{day.isoformat()}.ndjson.gz")
+
+def _append_member(path: str, records: List[Dict[str, Any]]) -> int:
+    with open(path, "ab") as f:
+        start = f.tell()
+        with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as member:
+            for record in records:
+                member.write((json.dumps(record, default=str) + "\n").encode())
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell() - start
+
+def archive_logs(db: Session, archive_dir: str, before: datetime, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Move agent logs with timestamp < before into per-day archive files."""
+    os.makedirs(archive_dir, exist_ok=True)
+    columns = list(AgentLog.__table__.columns)
+    summary = {"archived": 0, "payloads_deleted": 0, "archive_bytes": 0, "files": set()}
+    try:
+        while True:
+            rows = db.execute(
+                select(*columns).where(AgentLog.timestamp < before).order_by(AgentLog.timestamp).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+
+            by_day = defaultdict(list)
+            for row in with_payloads(db, rows):
+                record = dict(zip((column.name for column in columns), row))
+                record["result"] = json.loads(record["result"]) if record["result"] else None
+                del record["payload_hash"]
+                by_day[record["timestamp"].date()].append(record)
+            for day, records in by_day.items():
+                path = archive_path(archive_dir, day)
+                summary["archive_bytes"] += _append_member(path, records)
+                summary["files"].add(path)
+
+            # Deleted only once the archive member is on disk
+            db.execute(delete(AgentLog).where(AgentLog.id.in_([row.id for row in rows]))
+                       .execution_options(synchronize_session=False))
+            summary["payloads_deleted"] += _delete_unreferenced(db, {row.payload_hash for row in rows if row.payload_hash})
+            db.commit()
+            summary["archived"] += len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    summary["files"] = sorted(summary["files"])
+    return summary
+
+def iter_archive(archive_dir: str, applicant_id: Optional[str] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Archived records with start <= timestamp < end, oldest day first."""
+    if not os.path.isdir(archive_dir):
+        return
+    for name in sorted(os.listdir(archive_dir)):
+        match = ARCHIVE_NAME.match(name)
+        if not match:
+            continue
+        day = date.fromisoformat(match.group(1))
+        if (start is not None and day < start.date()) or (end is not None and day > end.date()):
+            continue
+        seen = set()  # a chunk archived twice (crash before its delete) is read once
+        try:
+            with gzip.open(os.path.join(archive_dir, name), "rt") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["id"] in seen:
+                        continue
+                    seen.add(record["id"])
+                    if applicant_id is not None and record["applicant_id"] != applicant_id:
+                        continue
+                    timestamp = datetime.fromisoformat(record["timestamp"])
+                    if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                        continue
+                    yield record
+        except (EOFError, zlib.error):
+            # Interrupted append: those rows were not deleted and will be archived again
+            logger.warning("Skipping incomplete member at the end of %s", name)
+
+# --- Maintenance ---------------------------------------------------------------------------
+
+def compact_inline(db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """Move large results written before compaction (or with a higher limit) to log_payloads."""
+    summary = {"compacted": 0, "bytes_moved": 0}
+    if INLINE_LIMIT <= 0:
+        return summary
+    after = ""
+    try:
+        while True:
+            rows = db.execute(
+                select(AgentLog.id, AgentLog.result)
+                .where(AgentLog.id > after, AgentLog.payload_hash.is_(None), func.length(AgentLog.result) > INLINE_LIMIT)
+                .order_by(AgentLog.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            after = rows[-1].id
+            payloads = [payload_row(row.result) for row in rows]
+            store_payloads(db.connection(), payloads)
+            db.execute(update(AgentLog), [
+                {"id": row.id, "result": None, "payload_hash": payload["sha256"]}
+                for row, payload in zip(rows, payloads)
+            ])
+            db.commit()
+            summary["compacted"] += len(rows)
+            summary["bytes_moved"] += sum(len(row.result) for row in rows)
+    except Exception:
+        db.rollback()
+        raise
+    return summary
+
+def storage_report(db: Session) -> Dict[str, Any]:
+    """Bytes kept for agent log results; scans agent_logs, so meant for the CLI, not a request."""
+    logs, inline_bytes, references = db.execute(
+        select(func.count(), func.coalesce(func.sum(func.length(AgentLog.result)), 0), func.count(AgentLog.payload_hash))
+    ).one()
+    payloads, payload_bytes, stored_bytes = db.execute(
+        select(func.count(), func.coalesce(func.sum(LogPayload.size_bytes), 0),
+               func.coalesce(func.sum(LogPayload.stored_bytes), 0))
+    ).one()
+    referenced_bytes = db.execute(
+        select(func.coalesce(func.sum(LogPayload.size_bytes), 0))
+        .select_from(AgentLog).join(LogPayload, LogPayload.sha256 == AgentLog.payload_hash)
+    ).scalar()
+    logical = inline_bytes + referenced_bytes
+    stored = inline_bytes + stored_bytes
+    return {
+        "agent_logs": logs,
+        "inline_result_bytes": inline_bytes,
+        "payload_references": references,
+        "payloads": payloads,
+        "payload_bytes": payload_bytes,
+        "payload_stored_bytes": stored_bytes,
+        "result_bytes_uncompacted": logical,
+        "result_bytes_stored": stored,
+        "saved_ratio": round(1 - stored / logical, 4) if logical else 0.0,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Agent log payload storage, retention and archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("archive", help="Move logs older than the retention period to archive files")
+    archive.add_argument("--older-than-days", type=int, default=DEFAULT_RETENTION_DAYS)
+    archive.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    archive.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    read = commands.add_parser("read", help="Print archived logs as NDJSON")
+    read.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    read.add_argument("--applicant-id")
+    read.add_argument("--since", type=datetime.fromisoformat)
+    read.add_argument("--until", type=datetime.fromisoformat)
+    compact = commands.add_parser("compact", help="Move large inline results to log_payloads")
+    compact.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    compact.add_argument("--vacuum", action="store_true", help="VACUUM afterwards so SQLite returns the space")
+    commands.add_parser("report", help="Result storage before and after compaction")
+    args = parser.parse_args(argv)
+
+    if args.command == "read":
+        for record in iter_archive(args.archive_dir, args.applicant_id, args.since, args.until):
+            sys.stdout.write(json.dumps(record) + "\n")
+        return 0
+
+    from main import SessionLocal, engine
+
+    db = SessionLocal()
+    try:
+        if args.command == "archive":
+            before = datetime.utcnow() - timedelta(days=args.older_than_days)
+            summary = archive_logs(db, args.archive_dir, before, args.chunk_size)
+        elif args.command == "compact":
+            summary = compact_inline(db, args.chunk_size)
+        else:
+            summary = storage_report(db)
+    finally:
+        db.close()
+    if args.command == "compact" and args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+    print(json.dumps(summary))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
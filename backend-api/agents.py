@@ -1,90 +1,204 @@
 from sqlalchemy.orm import Session
 from models import Applicant, AgentLog, StatusEnum, Document
+from agent_dag import DagExecutor, DagRun, Step
+from log_sink import AgentLogSink, agent_log_row, get_default_log_sink
+from letters import (
+    SANCTION, REJECTION, render_text, sanction_letter_fields, rejection_letter_fields,
+    get_default_letter_renderer
+)
+from scoring_policy import current_policy
+from metrics import observe_agent_action, observe_evaluation_dag
+from profiling import profile_evaluation
+import rollups  # registers the Applicant listeners that keep reporting rollups in step
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import SimpleNamespace
+import os
+import threading
 import time
-import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Iterable
+
+# Threads, shared by every evaluation in the process, that run the advisory checks beside the
+# evaluation's own thread (0 = everything in order on the calling thread, which is also what a
+# sampled cProfile dump can see) and the per-step timeout
+AGENT_STEP_WORKERS = int(os.getenv("AGENT_STEP_WORKERS", "4"))
+AGENT_STEP_TIMEOUT = float(os.getenv("AGENT_STEP_TIMEOUT_SECONDS", "30"))
+
+_step_pools: Dict[int, ThreadPoolExecutor] = {}
+_step_pools_lock = threading.Lock()
+
+def step_pool(workers: int) -> ThreadPoolExecutor:
+    """The process-wide pool with `workers` threads, started on first use and kept."""
+    with _step_pools_lock:
+        pool = _step_pools.get(workers)
+        if pool is None:
+            pool = _step_pools[workers] = ThreadPoolExecutor(workers, thread_name_prefix="agent-step")
+        return pool
+
+# Other applicants with the same name that are compared by the duplicate check
+DUPLICATE_CANDIDATE_LIMIT = 100
+
+def summarize_documents(documents: Iterable[Any]) -> Dict[str, Any]:
+    """Per-document extraction outcome (rows with type, ocr_status, verified) for verify_documents."""
+    documents = list(documents)
+    unverified = sorted({d.type.value for d in documents if not d.verified})
+    return {
+        "success": bool(documents) and not unverified,
+        "documents": len(documents),
+        "verified": sum(1 for d in documents if d.verified),
+        "pending": sum(1 for d in documents if d.ocr_status == "pending"),
+        "failed": sum(1 for d in documents if d.ocr_status == "failed"),
+        "unverified_types": unverified,
+    }
+
+def duplicate_matches(applicant: Applicant, candidates: Iterable[Any]) -> Dict[str, Any]:
+    """Same-name applicants that also share a phone, an email or the same income and amount."""
+    matches = {}
+    email = (applicant.email or "").strip().lower()
+    for candidate in candidates:
+        matched_on = []
+        if applicant.phone and candidate.phone == applicant.phone:
+            matched_on.append("phone")
+        if email and (candidate.email or "").strip().lower() == email:
+            matched_on.append("email")
+        if candidate.income == applicant.income and candidate.requested_amount == applicant.requested_amount:
+            matched_on.append("income_and_amount")
+        if matched_on:
+            matches[candidate.id] = matched_on
+    return {"success": not matches, "duplicates": matches}
+
+def applicant_identity(applicant: Applicant) -> SimpleNamespace:
+    """The fields the duplicate check compares, copied off the ORM object so a check on another
+    thread never loads attributes through the evaluation session."""
+    return SimpleNamespace(name=applicant.name, phone=applicant.phone, email=applicant.email,
+                           income=applicant.income, requested_amount=applicant.requested_amount)
+
+class EvaluationContext:
+    """Unit of work for one evaluation: the applicant is loaded once and every
+    AgentLog row and status change is committed together."""
+
+    def __init__(self, db: Session, applicant_id: str, log_sink: Optional[AgentLogSink] = None):
+        self.db = db
+        self.applicant_id = applicant_id
+        self.log_sink = log_sink
+        self.applicant = db.query(Applicant).filter(Applicant.id == applicant_id).first()
+        if not self.applicant:
+            raise ValueError(f"Applicant {applicant_id} not found")
+        self.pending_logs: List[Dict[str, Any]] = []
+    
+    def add_log(self, entry: Dict[str, Any]):
+        self.pending_logs.append(entry)
+    
+    def commit(self):
+        if self.log_sink is not None:
+            self.db.commit()
+            self.log_sink.submit_many(self.pending_logs)
+        else:
+            self.db.add_all([AgentLog(**agent_log_row(entry)) for entry in self.pending_logs])
+            self.db.commit()
+        self.pending_logs = []
+    
+    def rollback(self):
+        self.db.rollback()
+        self.pending_logs = []
 
 class BaseAgent:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, log_sink: Optional[AgentLogSink] = None):
         self.db = db
         self.agent_name = self.__class__.__name__
+        self.log_sink = log_sink or get_default_log_sink()
+    
+    def get_applicant(self, applicant_id: str, context: Optional[EvaluationContext] = None) -> Applicant:
+        if context is not None:
+            return context.applicant
+        return self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
     
-    def log_action(self, applicant_id: str, action: str, result: Dict[Any, Any], execution_time: float = 0.0):
-        log = AgentLog(
-            applicant_id=applicant_id,
-            agent_name=self.agent_name,
-            action=action,
-            result=json.dumps(result),
-            execution_time=execution_time
-        )
-        self.db.add(log)
+    def read_session(self) -> Session:
+        """A separate session for steps that query while other steps use self.db on another thread."""
+        return Session(bind=self.db.get_bind())
+    
+    def log_action(self, applicant_id: str, action: str, result: Dict[Any, Any], execution_time: float = 0.0,
+                   context: Optional[EvaluationContext] = None):
+        entry = {
+            "applicant_id": applicant_id,
+            "agent_name": self.agent_name,
+            "action": action,
+            "result": result,
+            "execution_time": execution_time,
+            "timestamp": datetime.utcnow()
+        }
+        observe_agent_action(self.agent_name, action, execution_time)
+        if context is not None:
+            context.add_log(entry)
+            return
+        if self.log_sink is not None:
+            self.log_sink.submit(entry)
+            return
+        self.db.add(AgentLog(**agent_log_row(entry)))
         self.db.commit()
 
 class MasterAgent(BaseAgent):
-    def __init__(self, db: Session):
-        super().__init__(db)
-        self.verification_agent = VerificationAgent(db)
-        self.underwriting_agent = UnderwritingAgent(db)
-        self.sanction_agent = SanctionAgent(db)
-        self.rejection_agent = RejectionAgent(db)
+    def __init__(self, db: Session, log_sink: Optional[AgentLogSink] = None, step_workers: Optional[int] = None):
+        super().__init__(db, log_sink)
+        self.step_workers = AGENT_STEP_WORKERS if step_workers is None else step_workers
+        self.verification_agent = VerificationAgent(db, self.log_sink)
+        self.underwriting_agent = UnderwritingAgent(db, self.log_sink)
+        self.sanction_agent = SanctionAgent(db, self.log_sink)
+        self.rejection_agent = RejectionAgent(db, self.log_sink)
+    
+    def evaluation_steps(self, context: EvaluationContext) -> List[Step]:
+        """The advisory document and duplicate checks run on the step pool, each with its own
+        session, while KYC, underwriting and the letter run inline: they use the evaluation
+        session, which a timed-out pool thread would otherwise still hold after the rollback."""
+        applicant_id = context.applicant_id
+        verification = self.verification_agent
+        identity = applicant_identity(context.applicant)
+        return [
+            Step("kyc", lambda: verification.verify_kyc(applicant_id, context), inline=True),
+            # Logged and returned with the result; the scoring policy does not use them yet
+            Step("documents", lambda: verification.verify_documents(applicant_id, context), optional=True),
+            Step("duplicates", lambda: verification.check_duplicates(applicant_id, context, identity), optional=True),
+            Step("underwriting", lambda kyc: self.underwriting_agent.evaluate_eligibility(applicant_id, context),
+                 inputs=("kyc",), when=lambda kyc: kyc["success"], inline=True),
+            Step("sanction", lambda underwriting: self.sanction_agent.generate_sanction_letter(applicant_id, context),
+                 inputs=("underwriting",), when=lambda underwriting: underwriting["status"] == "approved", inline=True),
+            Step("rejection", lambda underwriting: self.rejection_agent.generate_rejection_report(applicant_id, context),
+                 inputs=("underwriting",), when=lambda underwriting: underwriting["status"] != "approved", inline=True),
+        ]
     
     def orchestrate_evaluation(self, applicant_id: str) -> Dict[str, Any]:
+        # Sampled into a cProfile dump when profiling is switched on and the evaluation is slow
+        with profile_evaluation("orchestrate_evaluation", applicant_id):
+            return self._orchestrate_evaluation(applicant_id)
+    
+    def _orchestrate_evaluation(self, applicant_id: str) -> Dict[str, Any]:
         start_time = time.time()
         
-        applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
-        if not applicant:
-            raise ValueError(f"Applicant {applicant_id} not found")
+        context = EvaluationContext(self.db, applicant_id, self.log_sink)
+        applicant = context.applicant
         
         try:
-            # Step 1: Verification
-            verification_result = self.verification_agent.verify_kyc(applicant_id)
-            if not verification_result["success"]:
+            pool = step_pool(self.step_workers) if self.step_workers else None
+            dag_run = DagExecutor(self.evaluation_steps(context), self.step_workers, AGENT_STEP_TIMEOUT, pool).run()
+            result = evaluation_result(dag_run)
+            if result["stage"] == "verification":
                 applicant.status = StatusEnum.REJECTED
-                applicant.reason_summary = verification_result["reason"]
-                self.db.commit()
-                
-                execution_time = time.time() - start_time
-                self.log_action(applicant_id, "orchestrate_evaluation", {
-                    "status": "rejected",
-                    "stage": "verification",
-                    "reason": verification_result["reason"]
-                }, execution_time)
-                
-                return {
-                    "status": "rejected",
-                    "reason": verification_result["reason"],
-                    "stage": "verification"
-                }
-            
-            # Step 2: Underwriting
-            underwriting_result = self.underwriting_agent.evaluate_eligibility(applicant_id)
-            
-            # Step 3: Decision Processing
-            if underwriting_result["status"] == "approved":
-                sanction_result = self.sanction_agent.generate_sanction_letter(applicant_id)
-                result = {
-                    "status": "approved",
-                    "eligibility_score": underwriting_result["eligibility_score"],
-                    "sanction_letter_url": sanction_result.get("letter_url"),
-                    "stage": "completed"
-                }
-            else:
-                rejection_result = self.rejection_agent.generate_rejection_report(applicant_id)
-                result = {
-                    "status": "rejected",
-                    "eligibility_score": underwriting_result["eligibility_score"],
-                    "reason": underwriting_result["reason"],
-                    "rejection_report_url": rejection_result.get("report_url"),
-                    "stage": "completed"
-                }
+                applicant.reason_summary = result["reason"]
             
             execution_time = time.time() - start_time
-            self.log_action(applicant_id, "orchestrate_evaluation", result, execution_time)
+            self.log_action(applicant_id, "orchestrate_evaluation", result, execution_time, context)
+            context.commit()
             
-            return result
+            # The checks have AgentLog rows of their own and the timings go to metrics; the
+            # caller gets both, the orchestrate_evaluation row neither
+            timings = dag_run.summary()
+            observe_evaluation_dag(timings)
+            checks = {"documents": dag_run.output("documents"), "duplicates": dag_run.output("duplicates")}
+            return {**result, "checks": checks, "timings": timings}
             
         except Exception as e:
+            # Discard every buffered log and status change, then record the failure on its own
+            context.rollback()
             execution_time = time.time() - start_time
             error_result = {
                 "status": "error",
@@ -94,12 +208,46 @@ class MasterAgent(BaseAgent):
             self.log_action(applicant_id, "orchestrate_evaluation", error_result, execution_time)
             raise
 
+def evaluation_result(dag_run: DagRun) -> Dict[str, Any]:
+    """The orchestrate_evaluation decision built from the step outputs."""
+    verification = dag_run.output("kyc")
+    underwriting = dag_run.output("underwriting")
+    if underwriting is None:
+        result = {
+            "status": "rejected",
+            "reason": verification["reason"],
+            "stage": "verification"
+        }
+    elif underwriting["status"] == "approved":
+        result = {
+            "status": "approved",
+            "eligibility_score": underwriting["eligibility_score"],
+            "sanction_letter_url": (dag_run.output("sanction") or {}).get("letter_url"),
+            "stage": "completed"
+        }
+    else:
+        result = {
+            "status": "rejected",
+            "eligibility_score": underwriting["eligibility_score"],
+            "reason": underwriting["reason"],
+            "rejection_report_url": (dag_run.output("rejection") or {}).get("report_url"),
+            "stage": "completed"
+        }
+    return result
+
 class VerificationAgent(BaseAgent):
-    def verify_kyc(self, applicant_id: str) -> Dict[str, Any]:
+    def verify_kyc(self, applicant_id: str, context: Optional[EvaluationContext] = None) -> Dict[str, Any]:
         start_time = time.time()
         
-        applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
+        applicant = self.get_applicant(applicant_id, context)
+        result = self._check_kyc(applicant)
+        
+        execution_time = time.time() - start_time
+        self.log_action(applicant_id, "verify_kyc", result, execution_time, context)
         
+        return result
+    
+    def _check_kyc(self, applicant: Applicant) -> Dict[str, Any]:
         # KYC Verification Logic
         verification_checks = {
             "name_valid": bool(applicant.name and len(applicant.name.strip()) > 2),
@@ -111,218 +259,133 @@ class VerificationAgent(BaseAgent):
         success = all(verification_checks.values())
         reason = "KYC verification passed" if success else f"Failed checks: {[k for k, v in verification_checks.items() if not v]}"
         
-        result = {
+        return {
             "success": success,
             "reason": reason,
             "checks": verification_checks
         }
+    
+    def verify_documents(self, applicant_id: str, context: Optional[EvaluationContext] = None) -> Dict[str, Any]:
+        start_time = time.time()
+        
+        with self.read_session() as db:
+            documents = db.query(Document.type, Document.ocr_status, Document.verified).filter(
+                Document.applicant_id == applicant_id
+            ).all()
+        result = summarize_documents(documents)
         
         execution_time = time.time() - start_time
-        self.log_action(applicant_id, "verify_kyc", result, execution_time)
+        self.log_action(applicant_id, "verify_documents", result, execution_time, context)
         
         return result
-
-class UnderwritingAgent(BaseAgent):
-    def evaluate_eligibility(self, applicant_id: str) -> Dict[str, Any]:
+    
+    def check_duplicates(self, applicant_id: str, context: Optional[EvaluationContext] = None,
+                         identity: Optional[SimpleNamespace] = None) -> Dict[str, Any]:
         start_time = time.time()
         
-        applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
-        
-        # Advanced Underwriting Algorithm
-        score_factors = self._calculate_score_factors(applicant)
-        eligibility_score = sum(score_factors.values())
-        eligibility_score = min(100, max(0, eligibility_score))
+        applicant = identity or self.get_applicant(applicant_id, context)
+        with self.read_session() as db:
+            candidates = db.query(
+                Applicant.id, Applicant.phone, Applicant.email, Applicant.income, Applicant.requested_amount
+            ).filter(Applicant.name == applicant.name, Applicant.id != applicant_id).limit(DUPLICATE_CANDIDATE_LIMIT).all()
+        result = duplicate_matches(applicant, candidates)
         
-        # Decision Logic
-        decision = self._make_decision(applicant, eligibility_score)
+        execution_time = time.time() - start_time
+        self.log_action(applicant_id, "check_duplicates", result, execution_time, context)
         
-        # Update applicant record
-        applicant.eligibility_score = eligibility_score
-        applicant.status = StatusEnum.APPROVED if decision["approved"] else StatusEnum.REJECTED
-        applicant.reason_summary = decision["reason"]
-        self.db.commit()
+        return result
+
+class UnderwritingAgent(BaseAgent):
+    def evaluate_eligibility(self, applicant_id: str, context: Optional[EvaluationContext] = None) -> Dict[str, Any]:
+        start_time = time.time()
         
-        result = {
-            "status": "approved" if decision["approved"] else "rejected",
-            "eligibility_score": eligibility_score,
-            "reason": decision["reason"],
-            "score_factors": score_factors
-        }
+        applicant = self.get_applicant(applicant_id, context)
+        result = self._assess(applicant)
+        if context is None:
+            self.db.commit()
         
         execution_time = time.time() - start_time
-        self.log_action(applicant_id, "evaluate_eligibility", result, execution_time)
+        self.log_action(applicant_id, "evaluate_eligibility", result, execution_time, context)
         
         return result
     
-    def _calculate_score_factors(self, applicant: Applicant) -> Dict[str, float]:
-        factors = {}
-        
-        # Income Factor (0-25 points)
-        if applicant.income >= 100000:
-            factors["income"] = 25
-        elif applicant.income >= 75000:
-            factors["income"] = 20
-        elif applicant.income >= 50000:
-            factors["income"] = 15
-        elif applicant.income >= 30000:
-            factors["income"] = 10
-        else:
-            factors["income"] = 5
-        
-        # Credit Score Factor (0-35 points)
-        if applicant.credit_score >= 800:
-            factors["credit_score"] = 35
-        elif applicant.credit_score >= 750:
-            factors["credit_score"] = 30
-        elif applicant.credit_score >= 700:
-            factors["credit_score"] = 25
-        elif applicant.credit_score >= 650:
-            factors["credit_score"] = 15
-        else:
-            factors["credit_score"] = 5
+    def _assess(self, applicant: Applicant) -> Dict[str, Any]:
+        # One policy snapshot per evaluation, even if a reload lands mid-way
+        policy = current_policy()
+        result = policy.evaluate(applicant.income, applicant.credit_score,
+                                 applicant.requested_amount, applicant.employment_type)
         
-        # Loan-to-Income Ratio (0-25 points)
-        annual_income = applicant.income * 12
-        lti_ratio = applicant.requested_amount / annual_income
-        
-        if lti_ratio <= 2:
-            factors["lti_ratio"] = 25
-        elif lti_ratio <= 3:
-            factors["lti_ratio"] = 20
-        elif lti_ratio <= 5:
-            factors["lti_ratio"] = 15
-        elif lti_ratio <= 8:
-            factors["lti_ratio"] = 10
-        else:
-            factors["lti_ratio"] = 0
-        
-        # Employment Type Factor (0-15 points)
-        if applicant.employment_type == "salaried":
-            factors["employment"] = 15
-        elif applicant.employment_type == "self_employed":
-            factors["employment"] = 10
-        else:
-            factors["employment"] = 5
+        # Update applicant record
+        applicant.eligibility_score = result["eligibility_score"]
+        applicant.status = StatusEnum.APPROVED if result["status"] == "approved" else StatusEnum.REJECTED
+        applicant.reason_summary = result["reason"]
+        applicant.policy_version = policy.version
+        # Set here rather than at flush: the letters built later in this evaluation are dated by it
+        applicant.updated_at = datetime.utcnow()
         
-        return factors
+        return result
+    
+    def _calculate_score_factors(self, applicant: Applicant) -> Dict[str, float]:
+        return current_policy().score_factors(applicant.income, applicant.credit_score,
+                                              applicant.requested_amount, applicant.employment_type)
     
     def _make_decision(self, applicant: Applicant, eligibility_score: float) -> Dict[str, Any]:
-        # Decision thresholds
-        if eligibility_score >= 75:
-            return {
-                "approved": True,
-                "reason": f"Strong financial profile with {eligibility_score:.1f}% eligibility score"
-            }
-        elif eligibility_score >= 60:
-            # Check additional criteria
-            if applicant.credit_score >= 700 and applicant.income >= 50000:
-                return {
-                    "approved": True,
-                    "reason": f"Approved with {eligibility_score:.1f}% score based on good credit and income"
-                }
-            else:
-                return {
-                    "approved": False,
-                    "reason": f"Eligibility score {eligibility_score:.1f}% requires higher credit score or income"
-                }
-        else:
-            return {
-                "approved": False,
-                "reason": f"Eligibility score {eligibility_score:.1f}% below minimum threshold"
-            }
+        return current_policy().decide(eligibility_score, applicant.credit_score, applicant.income,
+                                       applicant.requested_amount)
 
 class SanctionAgent(BaseAgent):
-    def generate_sanction_letter(self, applicant_id: str) -> Dict[str, Any]:
+    def generate_sanction_letter(self, applicant_id: str, context: Optional[EvaluationContext] = None) -> Dict[str, Any]:
         start_time = time.time()
         
-        applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
+        applicant = self.get_applicant(applicant_id, context)
+        result = self._build_sanction_letter(applicant)
+        
+        execution_time = time.time() - start_time
+        self.log_action(applicant_id, "generate_sanction_letter", result, execution_time, context)
         
-        # Generate sanction letter content
-        letter_content = self._create_sanction_letter_content(applicant)
+        return result
+    
+    def _build_sanction_letter(self, applicant: Applicant) -> Dict[str, Any]:
+        fields = sanction_letter_fields(applicant)
+        letter_content = render_text(SANCTION, fields)
         
-        # In a real implementation, this would generate a PDF and upload to storage
-        letter_url = f"/sanction_letters/{applicant_id}.pdf"
+        # The PDF is laid out on the renderer's process pool; the URL is valid immediately
+        renderer = get_default_letter_renderer()
+        letter_url = renderer.url_for(SANCTION, renderer.submit(SANCTION, fields)) if renderer else None
         
-        result = {
+        return {
             "letter_url": letter_url,
             "content": letter_content,
             "generated_at": datetime.utcnow().isoformat()
         }
-        
-        execution_time = time.time() - start_time
-        self.log_action(applicant_id, "generate_sanction_letter", result, execution_time)
-        
-        return result
     
     def _create_sanction_letter_content(self, applicant: Applicant) -> str:
-        return f"""
-LOAN SANCTION LETTER
-
-Date: {datetime.now().strftime('%Y-%m-%d')}
-Reference: {applicant.id}
-
-Dear {applicant.name},
-
-We are pleased to inform you that your loan application has been APPROVED.
-
-Loan Details:
-- Sanctioned Amount: ₹{applicant.requested_amount:,.2f}
-- Interest Rate: 10.5% per annum
-- Tenure: Up to 60 months
-- Processing Fee: ₹{applicant.requested_amount * 0.01:,.2f}
-
-This sanction is valid for 30 days from the date of issue.
-
-Best Regards,
-Loanify NBFC Limited
-"""
+        return render_text(SANCTION, sanction_letter_fields(applicant))
 
 class RejectionAgent(BaseAgent):
-    def generate_rejection_report(self, applicant_id: str) -> Dict[str, Any]:
+    def generate_rejection_report(self, applicant_id: str, context: Optional[EvaluationContext] = None) -> Dict[str, Any]:
         start_time = time.time()
         
-        applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
+        applicant = self.get_applicant(applicant_id, context)
+        result = self._build_rejection_report(applicant)
         
-        # Generate rejection report content
-        report_content = self._create_rejection_report_content(applicant)
+        execution_time = time.time() - start_time
+        self.log_action(applicant_id, "generate_rejection_report", result, execution_time, context)
         
-        # In a real implementation, this would generate a PDF and upload to storage
-        report_url = f"/rejection_reports/{applicant_id}.pdf"
+        return result
+    
+    def _build_rejection_report(self, applicant: Applicant) -> Dict[str, Any]:
+        fields = rejection_letter_fields(applicant)
+        report_content = render_text(REJECTION, fields)
         
-        result = {
+        renderer = get_default_letter_renderer()
+        report_url = renderer.url_for(REJECTION, renderer.submit(REJECTION, fields)) if renderer else None
+        
+        return {
             "report_url": report_url,
             "content": report_content,
             "generated_at": datetime.utcnow().isoformat()
         }
-        
-        execution_time = time.time() - start_time
-        self.log_action(applicant_id, "generate_rejection_report", result, execution_time)
-        
-        return result
     
     def _create_rejection_report_content(self, applicant: Applicant) -> str:
-        return f"""
-LOAN APPLICATION STATUS REPORT
-
-Date: {datetime.now().strftime('%Y-%m-%d')}
-Reference: {applicant.id}
-
-Dear {applicant.name},
-
-We regret to inform you that your loan application could not be approved at this time.
-
-Application Details:
-- Requested Amount: ₹{applicant.requested_amount:,.2f}
-- Eligibility Score: {applicant.eligibility_score:.1f}%
-- Reason: {applicant.reason_summary}
-
-Recommendations for Future Applications:
-1. Improve your credit score through timely payments
-2. Consider applying for a lower loan amount
-3. Increase your monthly income documentation
-
-You may reapply after 3 months.
-
-Best Regards,
-Loanify NBFC Limited
-"""
\ No newline at end of file
+        return render_text(REJECTION, rejection_letter_fields(applicant))
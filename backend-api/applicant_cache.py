@@ -0,0 +1,171 @@
+"""Read-through cache of serialized applicant snapshots for the polled read endpoints.
+
+Entries are keyed by (view, applicant_id), where view is a read endpoint such as "applicant" or
+"status", and hold the JSON body with its ETag. They expire after `ttl` seconds and the least
+recently used entry goes first once `max_entries` is reached. Every flush that changes an
+Applicant or EvaluationJob in this process invalidates that applicant's entries, once when it
+is flushed and again when it commits. Core bulk updates call mark_changed. Writes made by other
+processes (worker processes, CLIs) show up once the entry's TTL runs out.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import Applicant, EvaluationJob
+from collections import OrderedDict
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+class Snapshot:
+    __slots__ = ("etag", "body", "expires_at")
+
+    def __init__(self, etag: str, body: bytes, expires_at: float = 0.0):
+        self.etag = etag
+        self.body = body
+        self.expires_at = expires_at
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+class ApplicantCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, Hashable], Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a load that started before one is not cached
+        self._version = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0, "not_modified": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: Tuple[str, Hashable]) -> Optional[Snapshot]:
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is None:
+                self._stats["misses"] += 1
+                return None
+            if snapshot.expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return snapshot
+
+    def put(self, key: Tuple[str, Hashable], snapshot: Snapshot, version: int) -> bool:
+        """Cache `snapshot` unless an invalidation happened after `version` was read."""
+        if not self.enabled:
+            return False
+        snapshot.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if version != self._version:
+                return False
+            self._entries[key] = snapshot
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            return True
+
+    def get_or_load(self, key: Tuple[str, Hashable], load: Callable[[], Optional[Snapshot]]) -> Optional[Snapshot]:
+        snapshot = self.get(key) if self.enabled else None
+        if snapshot is None:
+            version = self._version
+            snapshot = load()
+            if snapshot is not None:
+                self.put(key, snapshot, version)
+        return snapshot
+
+    async def aget_or_load(self, key: Tuple[str, Hashable], load: Callable[[], Awaitable[Optional[Snapshot]]]) -> Optional[Snapshot]:
+        snapshot = self.get(key) if self.enabled else None
+        if snapshot is None:
+            version = self._version
+            snapshot = await load()
+            if snapshot is not None:
+                self.put(key, snapshot, version)
+        return snapshot
+
+    def invalidate(self, applicant_ids: Iterable[str]):
+        applicant_ids = set(applicant_ids)
+        if not applicant_ids:
+            return
+        with self._lock:
+            self._version += 1
+            for key in [key for key in self._entries if key[1] in applicant_ids]:
+                del self._entries[key]
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def count_not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def configure(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if ttl is not None:
+            self.ttl = ttl
+        self.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        stats["ttl_seconds"] = self.ttl
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+applicant_cache = ApplicantCache(
+    int(os.getenv("APPLICANT_CACHE_SIZE", "10000")),
+    float(os.getenv("APPLICANT_CACHE_TTL", "5"))
+)
+
+_PENDING = "applicant_cache_pending"
+
+def mark_changed(session: Session, applicant_ids: Iterable[str]):
+    """For writes the flush listener does not see (Core bulk updates): invalidate now and on commit."""
+    applicant_ids = set(applicant_ids)
+    session.info.setdefault(_PENDING, set()).update(applicant_ids)
+    applicant_cache.invalidate(applicant_ids)
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_after_flush(session, flush_context):
+    changed = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Applicant) and instance.id is not None:
+            changed.add(instance.id)
+        elif isinstance(instance, EvaluationJob) and instance.applicant_id is not None:
+            changed.add(instance.applicant_id)
+    if changed:
+        mark_changed(session, changed)
+
+# Again on commit: a read between the flush and the commit may have cached the old row
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    applicant_cache.invalidate(session.info.pop(_PENDING, ()))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,242 @@
+"""Bulk applicant import from CSV or NDJSON files.
+
+Rows are read one at a time from a binary file object, validated against a pydantic schema
+(main.EligibilityRequest) and written with one executemany INSERT per chunk, so memory use
+depends on chunk_size rather than on the size of the file. A row that does not parse or
+validate is reported with its line number and skipped; every chunk commits on its own.
+Imported chunks can be scored right away with the vectorized batch engine or queued for the
+evaluation workers.
+"""
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, ValidationError
+from models import Applicant, EvaluationJob, StatusEnum
+from rollups import RollupDelta
+from evaluation_jobs import STATUS_QUEUED
+from datetime import datetime
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+
+EVALUATE_BATCH = "batch"
+EVALUATE_QUEUE = "queue"
+EVALUATE_MODES = (EVALUATE_BATCH, EVALUATE_QUEUE)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_ERRORS = 1000
+
+# Parsed row: (line number, field values or None, parse error or None)
+RawRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read (missing CSV columns, bad encoding)."""
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv" or (content_type or "").startswith("text/csv"):
+        return FORMAT_CSV
+    if extension in (".ndjson", ".jsonl") or (content_type or "").startswith(("application/x-ndjson", "application/jsonl")):
+        return FORMAT_NDJSON
+    return None
+
+def _text(stream: BinaryIO) -> io.TextIOWrapper:
+    # utf-8-sig drops the BOM spreadsheet exports start with
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+def read_csv(stream: BinaryIO, required: List[str]) -> Iterator[RawRow]:
+    reader = csv.DictReader(_text(stream))
+    missing = [field for field in required if field not in (reader.fieldnames or [])]
+    if missing:
+        raise ImportFileError(f"CSV header is missing required columns: {', '.join(missing)}")
+    for row in reader:
+        if None in row:
+            yield reader.line_num, None, f"{len(row[None])} more values than header columns"
+            continue
+        # Empty cells count as absent, so optional fields fall back to their defaults
+        yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}, None
+
+def read_ndjson(stream: BinaryIO) -> Iterator[RawRow]:
+    for line_number, line in enumerate(_text(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, row, None
+
+def read_rows(stream: BinaryIO, fmt: str, schema: Type[BaseModel]) -> Iterator[RawRow]:
+    if fmt == FORMAT_CSV:
+        required = [name for name, field in schema.model_fields.items() if field.is_required()]
+        return read_csv(stream, required)
+    if fmt == FORMAT_NDJSON:
+        return read_ndjson(stream)
+    raise ImportFileError(f"Unsupported format: {fmt}")
+
+def validation_errors(error: ValidationError) -> List[Dict[str, str]]:
+    return [
+        {"field": ".".join(str(part) for part in item["loc"]) or None, "message": item["msg"]}
+        for item in error.errors(include_url=False)
+    ]
+
+def _chunks(rows: Iterator[RawRow], size: int) -> Iterator[List[RawRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _insert_chunk(db: Session, records: List[BaseModel]) -> List[str]:
+    now = datetime.utcnow()
+    values = [
+        {**record.model_dump(), "id": str(uuid.uuid4()), "status": StatusEnum.EVALUATING,
+         "eligibility_score": 0.0, "created_at": now, "updated_at": now}
+        for record in records
+    ]
+    # Core executemany skips the ORM rollup listeners, so the delta is applied here
+    delta = RollupDelta()
+    for value in values:
+        delta.add(now, StatusEnum.EVALUATING, value.get("credit_score"), 0.0)
+    db.execute(insert(Applicant), values)
+    delta.apply(db.connection())
+    return [value["id"] for value in values]
+
+def _queue_chunk(db: Session, applicant_ids: List[str], max_attempts: int):
+    db.execute(insert(EvaluationJob), [
+        {"id": str(uuid.uuid4()), "applicant_id": applicant_id, "status": STATUS_QUEUED, "max_attempts": max_attempts}
+        for applicant_id in applicant_ids
+    ])
+
+def import_applicants(
+    db: Session,
+    stream: BinaryIO,
+    fmt: str,
+    schema: Type[BaseModel],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    evaluate: Optional[str] = None,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    on_error: Optional[Callable[[Dict[str, Any]], None]] = None,
+    max_attempts: int = 3,
+) -> Dict[str, Any]:
+    """Import every valid row of `stream`. The summary lists the first `max_errors` row errors;
+    `on_error` sees all of them. With evaluate="batch" each chunk is scored after it commits,
+    with evaluate="queue" each chunk also gets one evaluation job per applicant."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if evaluate is not None and evaluate not in EVALUATE_MODES:
+        raise ValueError(f"Unsupported evaluate mode: {evaluate}")
+
+    start_time = time.time()
+    summary: Dict[str, Any] = {"rows": 0, "imported": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    evaluation = None
+    if evaluate == EVALUATE_BATCH:
+        from batch_underwriting import evaluate_batch  # numpy, only needed here
+        evaluation = {"evaluated": 0, "approved": 0, "rejected": 0, "skipped": 0, "policy_version": None}
+    elif evaluate == EVALUATE_QUEUE:
+        evaluation = {"queued": 0}
+
+    def report(line: int, errors: List[Dict[str, Any]]):
+        summary["failed"] += 1
+        error = {"line": line, "errors": errors}
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append(error)
+        else:
+            summary["errors_truncated"] = True
+        if on_error is not None:
+            on_error(error)
+
+    try:
+        for chunk in _chunks(read_rows(stream, fmt, schema), chunk_size):
+            records = []
+            for line, row, parse_error in chunk:
+                summary["rows"] += 1
+                if parse_error is not None:
+                    report(line, [{"field": None, "message": parse_error}])
+                    continue
+                try:
+                    records.append(schema.model_validate(row))
+                except ValidationError as e:
+                    report(line, validation_errors(e))
+            if not records:
+                continue
+
+            applicant_ids = _insert_chunk(db, records)
+            if evaluate == EVALUATE_QUEUE:
+                _queue_chunk(db, applicant_ids, max_attempts)
+                evaluation["queued"] += len(applicant_ids)
+            db.commit()
+            summary["imported"] += len(applicant_ids)
+
+            if evaluate == EVALUATE_BATCH:
+                result = evaluate_batch(db, applicant_ids=applicant_ids, chunk_size=len(applicant_ids))
+                for key in ("evaluated", "approved", "rejected", "skipped"):
+                    evaluation[key] += result[key]
+                evaluation["policy_version"] = result["policy_version"]
+    except UnicodeDecodeError as e:
+        db.rollback()
+        raise ImportFileError(f"File is not valid UTF-8 ({e.reason}); {summary['imported']} rows were imported before it")
+    except Exception:
+        db.rollback()
+        raise
+
+    if evaluation is not None:
+        summary["evaluation"] = evaluation
+    summary["execution_time"] = time.time() - start_time
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import applicants from a CSV or NDJSON file")
+    parser.add_argument("path", help="File to import, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--evaluate", choices=EVALUATE_MODES,
+                        help="Score imported rows with the batch engine, or queue them for the evaluation workers")
+    parser.add_argument("--errors", help="Write every row error to this NDJSON file")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    from main import SessionLocal, EligibilityRequest, EVALUATION_JOB_SETTINGS
+
+    errors_file = open(args.errors, "w") if args.errors else None
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    db = SessionLocal()
+    try:
+        on_error = (lambda error: errors_file.write(json.dumps(error) + "\n")) if errors_file else None
+        summary = import_applicants(db, stream, fmt, EligibilityRequest, args.chunk_size, args.evaluate,
+                                    max_errors=10, on_error=on_error,
+                                    max_attempts=EVALUATION_JOB_SETTINGS["max_attempts"])
+    except ImportFileError as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        if errors_file is not None:
+            errors_file.close()
+
+    print(json.dumps(summary))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from models import Applicant, StatusEnum
+from datetime import datetime
+import base64
+import json
+from typing import Optional, Tuple, List, Iterator, Dict, Any
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_STREAM_CHUNK_SIZE = 1000
+
+APPLICANT_COLUMNS = (
+    Applicant.id,
+    Applicant.name,
+    Applicant.income,
+    Applicant.requested_amount,
+    Applicant.credit_score,
+    Applicant.eligibility_score,
+    Applicant.status,
+    Applicant.reason_summary,
+    Applicant.created_at,
+)
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at: datetime, applicant_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), applicant_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, applicant_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), applicant_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+def filtered_applicants(
+    status: Optional[StatusEnum] = None,
+    min_credit_score: Optional[int] = None,
+    max_credit_score: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+) -> Select:
+    stmt = select(*APPLICANT_COLUMNS)
+    if status is not None:
+        stmt = stmt.where(Applicant.status == status)
+    if min_credit_score is not None:
+        stmt = stmt.where(Applicant.credit_score >= min_credit_score)
+    if max_credit_score is not None:
+        stmt = stmt.where(Applicant.credit_score <= max_credit_score)
+    if created_from is not None:
+        stmt = stmt.where(Applicant.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Applicant.created_at < created_to)
+    return stmt
+
+def newest_first(stmt: Select) -> Select:
+    return stmt.order_by(Applicant.created_at.desc(), Applicant.id.desc())
+
+def keyset_select(stmt: Select, limit: int, cursor: Optional[str] = None) -> Select:
+    """Newest-first page on (created_at, id); fetches one extra row to detect a next page."""
+    if cursor:
+        created_at, applicant_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Applicant.created_at, Applicant.id) < tuple_(created_at, applicant_id))
+    return newest_first(stmt).limit(limit + 1)
+
+def page_from_rows(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+def keyset_page(db: Session, stmt: Select, limit: int, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    return page_from_rows(db.execute(keyset_select(stmt, limit, cursor)).all(), limit)
+
+def applicant_row_to_dict(row) -> Dict[str, Any]:
+    data = dict(row._mapping)
+    data["status"] = data["status"].value if data["status"] is not None else None
+    data["created_at"] = data["created_at"].isoformat() if data["created_at"] is not None else None
+    return data
+
+def ndjson_chunk(rows: List[Any]) -> str:
+    return "".join(json.dumps(applicant_row_to_dict(row)) + "\n" for row in rows)
+
+def stream_ndjson(db: Session, stmt: Select, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Yield NDJSON from a server-side cursor, one chunk of rows per yielded string."""
+    result = db.execute(newest_first(stmt).execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield ndjson_chunk(partition)
@@ -0,0 +1,68 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from database import EngineProfile, TUNED_PROFILE, apply_sqlite_pragmas, pool_options
+from contextlib import asynccontextmanager
+import asyncio
+from typing import AsyncIterator, Optional
+
+# Async driver used for each sync backend when only a sync DATABASE_URL is configured
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+_write_lock: Optional[asyncio.Lock] = None
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername != backend:
+        return url  # an explicit driver was given, e.g. sqlite+aiosqlite
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend}; set ASYNC_DATABASE_URL explicitly")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def configure_async_database(url: str, profile: EngineProfile = TUNED_PROFILE, **engine_kwargs) -> AsyncEngine:
+    global _engine, _session_factory, _write_lock
+    url = async_url(url)
+    # SQLite has one writer at a time and a blocked writer retries with growing sleeps
+    # (busy_timeout); queueing this process's writers hands the lock over as soon as it is free
+    _write_lock = asyncio.Lock() if make_url(url).get_backend_name() == "sqlite" else None
+    if make_url(url).get_backend_name() != "sqlite":
+        # aiosqlite file databases use NullPool; the profile's pool only applies to server backends
+        for name, value in pool_options(url, profile).items():
+            engine_kwargs.setdefault(name, value)
+    _engine = create_async_engine(url, **engine_kwargs)
+    apply_sqlite_pragmas(_engine.sync_engine, profile)
+    # expire_on_commit=False: attribute access after commit must not trigger implicit IO
+    _session_factory = async_sessionmaker(_engine, expire_on_commit=False, autoflush=False)
+    return _engine
+
+def get_async_session_factory() -> async_sessionmaker:
+    if _session_factory is None:
+        raise RuntimeError("Async database is not configured; call configure_async_database() first")
+    return _session_factory
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_session_factory()() as db:
+        yield db
+
+@asynccontextmanager
+async def write_slot() -> AsyncIterator[None]:
+    """Wrap a unit of work that writes; a no-op on backends with row-level locking."""
+    if _write_lock is None:
+        yield
+        return
+    async with _write_lock:
+        yield
+
+async def dispose_async_database():
+    global _engine, _session_factory, _write_lock
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
+    _write_lock = None
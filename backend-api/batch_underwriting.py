@@ -0,0 +1,277 @@
+from sqlalchemy import update, insert
+from sqlalchemy.orm import Session
+from models import Applicant, AgentLog, StatusEnum
+from scoring_policy import BandFactor, ScoringPolicy, current_policy
+from rollups import RollupDelta
+from applicant_cache import mark_changed
+from datetime import datetime
+import numpy as np
+import argparse
+import time
+import json
+from typing import Dict, Any, List, Optional
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def _factor_column(factor, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+    values = inputs[factor.input]
+    if isinstance(factor, BandFactor):
+        # Same breakpoints and bisect side as the scalar lookup, one searchsorted per column
+        side = "right" if factor.compare == ">=" else "left"
+        return np.asarray(factor.points)[np.searchsorted(factor.breakpoints, values, side=side)]
+    return np.array([factor.categories.get(value, factor.default) for value in values.tolist()])
+
+def score_columns(policy: ScoringPolicy, income: np.ndarray, credit_score: np.ndarray,
+                  requested_amount: np.ndarray, employment_type: np.ndarray) -> Dict[str, np.ndarray]:
+    inputs = {
+        "income": income,
+        "credit_score": credit_score,
+        "lti_ratio": requested_amount / (income * 12),
+        "employment_type": employment_type,
+    }
+    factors = {factor.name: _factor_column(factor, inputs) for factor in policy.factors}
+    eligibility_score = np.clip(sum(factors.values()), policy.min_score, policy.max_score)
+
+    # Decision Logic: first matching rule wins, the last rule is the unconditional default
+    decision_inputs = {"score": eligibility_score, "credit_score": credit_score,
+                       "income": income, "lti_ratio": inputs["lti_ratio"]}
+    conditions = []
+    for rule in policy.rules[:-1]:
+        condition = np.ones(len(income), dtype=bool)
+        for name, (low, high) in rule.bounds().items():
+            condition &= (decision_inputs[name] >= low) & (decision_inputs[name] <= high)
+        conditions.append(condition)
+    reason_code = np.full(len(income), len(policy.rules) - 1)
+    if conditions:
+        reason_code = np.select(conditions, list(range(len(conditions))), default=len(policy.rules) - 1)
+    approved = np.array([rule.approve for rule in policy.rules], dtype=bool)[reason_code]
+
+    return {
+        "factors": factors,
+        "eligibility_score": eligibility_score,
+        "approved": approved,
+        "reason_code": reason_code,
+        "decision_inputs": decision_inputs,
+    }
+
+def _load_chunk(db: Session, after_id: Optional[str], chunk_size: int,
+                statuses: Optional[List[StatusEnum]], applicant_ids: Optional[List[str]]):
+    query = db.query(
+        Applicant.id,
+        Applicant.income,
+        Applicant.credit_score,
+        Applicant.requested_amount,
+        Applicant.employment_type,
+        Applicant.status,
+        Applicant.eligibility_score,
+        Applicant.created_at
+    )
+    if applicant_ids is not None:
+        query = query.filter(Applicant.id.in_(applicant_ids))
+    if statuses:
+        query = query.filter(Applicant.status.in_(statuses))
+    if after_id is not None:
+        query = query.filter(Applicant.id > after_id)
+    return query.order_by(Applicant.id).limit(chunk_size).all()
+
+def _to_columns(rows) -> Dict[str, np.ndarray]:
+    return {
+        "id": np.array([row[0] for row in rows], dtype=object),
+        "income": np.array([row[1] for row in rows], dtype=object),
+        "credit_score": np.array([row[2] for row in rows], dtype=object),
+        "requested_amount": np.array([row[3] for row in rows], dtype=object),
+        "employment_type": np.array([row[4] for row in rows], dtype=object),
+    }
+
+def _scoreable_mask(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    # Rows the per-applicant path cannot score (missing values, zero income) are skipped
+    income = columns["income"]
+    return np.array([
+        inc is not None and inc > 0 and cs is not None and amt is not None
+        for inc, cs, amt in zip(income, columns["credit_score"], columns["requested_amount"])
+    ], dtype=bool)
+
+def score_rows(policy: ScoringPolicy, rows) -> Dict[str, Any]:
+    columns = _to_columns(rows)
+    mask = _scoreable_mask(columns) if len(rows) else np.zeros(0, dtype=bool)
+
+    scores = score_columns(
+        policy,
+        columns["income"][mask].astype(np.float64),
+        columns["credit_score"][mask].astype(np.int64),
+        columns["requested_amount"][mask].astype(np.float64),
+        columns["employment_type"][mask].astype(str)
+    )
+    scores["id"] = columns["id"][mask]
+    scores["skipped_ids"] = columns["id"][~mask].tolist()
+    return scores
+
+def build_results(policy: ScoringPolicy, scores: Dict[str, Any]) -> List[Dict[str, Any]]:
+    names = list(scores["factors"])
+    factor_rows = zip(*(scores["factors"][name].tolist() for name in names))
+    inputs = scores["decision_inputs"]
+    results = []
+    for applicant_id, factor_values, score, approved, code, credit_score, income, lti_ratio in zip(
+        scores["id"].tolist(),
+        factor_rows,
+        scores["eligibility_score"].tolist(),
+        scores["approved"].tolist(),
+        scores["reason_code"].tolist(),
+        inputs["credit_score"].tolist(),
+        inputs["income"].tolist(),
+        inputs["lti_ratio"].tolist()
+    ):
+        results.append({
+            "applicant_id": applicant_id,
+            "status": "approved" if approved else "rejected",
+            "eligibility_score": score,
+            "reason": policy.rules[code].format_reason(score, credit_score, income, lti_ratio),
+            "score_factors": dict(zip(names, factor_values)),
+            "policy_version": policy.version
+        })
+    return results
+
+def evaluate_batch(db: Session, applicant_ids: Optional[List[str]] = None,
+                   statuses: Optional[List[StatusEnum]] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, log_results: bool = True) -> Dict[str, Any]:
+    start_time = time.time()
+    if statuses is None and applicant_ids is None:
+        statuses = [StatusEnum.EVALUATING]
+
+    # One policy for the whole run, so every row written records the same version
+    policy = current_policy()
+    summary = {"evaluated": 0, "approved": 0, "rejected": 0, "skipped": 0, "policy_version": policy.version}
+    after_id = None
+
+    try:
+        while True:
+            rows = _load_chunk(db, after_id, chunk_size, statuses, applicant_ids)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+
+            scores = score_rows(policy, rows)
+            results = build_results(policy, scores)
+            summary["skipped"] += len(scores["skipped_ids"])
+            if not results:
+                continue
+
+            # Bulk UPDATE bypasses the ORM rollup listeners, so apply the rollup delta here
+            previous = {row[0]: row for row in rows}
+            delta = RollupDelta()
+            for result in results:
+                row = previous[result["applicant_id"]]
+                status = StatusEnum.APPROVED if result["status"] == "approved" else StatusEnum.REJECTED
+                delta.add(row[7], row[5], row[2], row[6], sign=-1)
+                delta.add(row[7], status, row[2], result["eligibility_score"])
+            delta.apply(db.connection())
+
+            now = datetime.utcnow()
+            db.execute(update(Applicant), [
+                {
+                    "id": result["applicant_id"],
+                    "eligibility_score": result["eligibility_score"],
+                    "status": StatusEnum.APPROVED if result["status"] == "approved" else StatusEnum.REJECTED,
+                    "reason_summary": result["reason"],
+                    "policy_version": policy.version,
+                    "updated_at": now
+                }
+                for result in results
+            ])
+            # Nor does it reach the applicant cache's flush listener
+            mark_changed(db, [result["applicant_id"] for result in results])
+
+            if log_results:
+                db.execute(insert(AgentLog), [
+                    {
+                        "applicant_id": result["applicant_id"],
+                        "agent_name": "UnderwritingAgent",
+                        "action": "evaluate_eligibility_batch",
+                        "result": json.dumps({k: v for k, v in result.items() if k != "applicant_id"}),
+                        "execution_time": 0.0,
+                        "timestamp": now
+                    }
+                    for result in results
+                ])
+
+            approved = int(scores["approved"].sum())
+            summary["evaluated"] += len(results)
+            summary["approved"] += approved
+            summary["rejected"] += len(results) - approved
+
+            if len(rows) < chunk_size:
+                break
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    summary["execution_time"] = time.time() - start_time
+    return summary
+
+def check_parity(db: Session, applicant_ids: Optional[List[str]] = None,
+                 statuses: Optional[List[StatusEnum]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """Compare the vectorized engine against the per-applicant policy lookup row by row without writing anything."""
+    if statuses is None and applicant_ids is None:
+        statuses = [StatusEnum.EVALUATING]
+
+    policy = current_policy()
+    mismatches = []
+    after_id = None
+
+    while True:
+        rows = _load_chunk(db, after_id, chunk_size, statuses, applicant_ids)
+        if not rows:
+            break
+        after_id = rows[-1][0]
+
+        batch_results = {result["applicant_id"]: result for result in build_results(policy, score_rows(policy, rows))}
+        applicants = db.query(Applicant).filter(Applicant.id.in_(list(batch_results))).all()
+        for applicant in applicants:
+            expected = {
+                "applicant_id": applicant.id,
+                **policy.evaluate(applicant.income, applicant.credit_score,
+                                  applicant.requested_amount, applicant.employment_type)
+            }
+            if batch_results[applicant.id] != expected:
+                mismatches.append({"expected": expected, "actual": batch_results[applicant.id]})
+
+        if len(rows) < chunk_size:
+            break
+
+    return mismatches
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score applicants with the vectorized underwriting engine")
+    parser.add_argument("--status", action="append", choices=[s.value for s in StatusEnum],
+                        help="Applicant status to re-score (repeatable, default: evaluating)")
+    parser.add_argument("--applicant-id", action="append", dest="applicant_ids",
+                        help="Re-score a specific applicant (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--no-log", action="store_true", help="Skip writing AgentLog rows")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="Compare against the per-applicant policy evaluation instead of writing results")
+    args = parser.parse_args(argv)
+
+    from main import SessionLocal
+
+    statuses = [StatusEnum(s) for s in args.status] if args.status else None
+    db = SessionLocal()
+    try:
+        if args.check_parity:
+            mismatches = check_parity(db, args.applicant_ids, statuses, args.chunk_size)
+            for mismatch in mismatches[:10]:
+                print(json.dumps(mismatch))
+            print(f"Parity check: {len(mismatches)} mismatches")
+            return 1 if mismatches else 0
+
+        summary = evaluate_batch(db, args.applicant_ids, statuses, args.chunk_size, not args.no_log)
+        print(json.dumps(summary))
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""Admin latency under a flood of /public/check-eligibility, without and with admission control.
+
+Starts uvicorn once per mode on a fresh SQLite file. For --seconds, --scrapers connections
+send check-eligibility back to back from one client address and --crowd connections do the
+same from one address each (X-Forwarded-For, with RATE_LIMIT_CLIENT_KEY set). Meanwhile
+--admins authenticated clients poll /admin/reports and /admin/applicants.
+
+  off  RATE_LIMIT_PER_SECOND=0, ADMISSION_MAX_IN_FLIGHT=0: every request is queued and served
+  on   the rate limit and in-flight cap from the command line
+
+Reports admin p50/p95/p99 latency and errors, and what happened to the public requests:
+served, 429 (rate limited) and 503 (shed), with the p95 of each. Exits 1 if an admin request
+failed with admission control on.
+
+Run from backend-api/:  python -m benchmarks.bench_admission --seconds 15 --crowd 16 --admins 4
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+MODES = ("off", "on")
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/openapi.json")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def drive(base_url: str, args) -> dict:
+    connections = args.scrapers + args.crowd + args.admins
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        await wait_until_up(client)
+        login = await client.post("/admin/login", json={"email": "admin@nbfc.com", "password": "admin123"})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        deadline = time.monotonic() + args.seconds
+        admin_ms, admin_errors = [], 0
+        public_ms = {}  # status code -> latencies
+
+        async def flood(address: str, n: int):
+            i = 0
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/public/check-eligibility", headers={"X-Forwarded-For": address}, json={
+                    "name": f"Flood {address} {n} {i}", "income": 30000 + i % 90000,
+                    "requested_amount": 200000 + i % 800000, "credit_score": 600 + i % 250
+                })
+                public_ms.setdefault(response.status_code, []).append((time.perf_counter() - start) * 1000)
+                i += 1
+                if response.status_code in (429, 503):
+                    # A well-behaved client would honour Retry-After; a flood only backs off a little
+                    await asyncio.sleep(args.backoff_ms / 1000)
+
+        async def admin(n: int):
+            nonlocal admin_errors
+            i = 0
+            while time.monotonic() < deadline:
+                url, params = ("/admin/reports", None) if (n + i) % 2 else ("/admin/applicants", {"limit": 50})
+                start = time.perf_counter()
+                response = await client.get(url, params=params, headers=headers)
+                admin_ms.append((time.perf_counter() - start) * 1000)
+                admin_errors += response.status_code >= 400
+                i += 1
+                await asyncio.sleep(args.admin_interval_ms / 1000)
+
+        tasks = [flood("10.0.0.1", n) for n in range(args.scrapers)]
+        tasks += [flood(f"10.1.{n // 256}.{n % 256}", n) for n in range(args.crowd)]
+        tasks += [admin(n) for n in range(args.admins)]
+        await asyncio.gather(*tasks)
+        admission = (await client.get("/admin/admission", headers=headers)).json()
+    return {
+        "admin_p50_ms": statistics.median(admin_ms),
+        "admin_p95_ms": percentile(admin_ms, 0.95),
+        "admin_p99_ms": percentile(admin_ms, 0.99),
+        "admin_requests": len(admin_ms),
+        "admin_errors": admin_errors,
+        "public": {code: (len(samples), percentile(samples, 0.95)) for code, samples in sorted(public_ms.items())},
+        "peak_in_flight": admission.get("peak_in_flight"),
+    }
+
+def run_mode(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, PYTHONPATH=str(APP_DIR), EVALUATION_WORKERS="0",
+                   RATE_LIMIT_CLIENT_KEY="x-forwarded-for")
+        if mode == "off":
+            env.update(RATE_LIMIT_PER_SECOND="0", ADMISSION_MAX_IN_FLIGHT="0")
+        else:
+            env.update(RATE_LIMIT_PER_SECOND=str(args.rate), RATE_LIMIT_BURST=str(args.burst),
+                       ADMISSION_MAX_IN_FLIGHT=str(args.max_in_flight), ADMISSION_ADMIN_RESERVED=str(args.admin_reserved))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=workdir, env=env
+        )
+        try:
+            return asyncio.run(drive(f"http://127.0.0.1:{args.port}", args))
+        finally:
+            server.terminate()
+            server.wait()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--scrapers", type=int, default=8, help="Connections flooding from one address")
+    parser.add_argument("--crowd", type=int, default=16, help="Connections flooding from one address each")
+    parser.add_argument("--admins", type=int, default=4)
+    parser.add_argument("--admin-interval-ms", type=float, default=50)
+    parser.add_argument("--backoff-ms", type=float, default=250)
+    parser.add_argument("--rate", type=float, default=1.0)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--admin-reserved", type=int, default=4, help="At least --admins, or admin polls are shed too")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", action="append", dest="modes", choices=MODES, help="Default: both")
+    args = parser.parse_args()
+
+    failed = False
+    for mode in args.modes or MODES:
+        result = run_mode(mode, args)
+        print(f"{mode}: admin p50 {result['admin_p50_ms']:.1f} ms, p95 {result['admin_p95_ms']:.1f} ms,"
+              f" p99 {result['admin_p99_ms']:.1f} ms, {result['admin_errors']} errors in {result['admin_requests']} requests;"
+              f" peak in flight {result['peak_in_flight']}")
+        for code, (count, p95) in result["public"].items():
+            print(f"  public {code}: {count / args.seconds:8.1f}/s  p95 {p95:8.1f} ms")
+        failed |= mode == "on" and result["admin_errors"] > 0
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
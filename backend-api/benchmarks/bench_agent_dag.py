@@ -0,0 +1,120 @@
+"""Evaluation latency with agent steps run in sequence vs. overlapped by the DAG executor.
+
+Runs agents.MasterAgent.orchestrate_evaluation for the same applicants with step_workers=0
+(every step in order on the calling thread) and with --workers threads. --check-ms makes the
+KYC, document and duplicate checks wait that long, standing in for the remote calls (bureau,
+document service) they stand for in production. Reports mean wall time, critical path and
+the sum of all steps per evaluation, and fails if the two modes disagree on any decision or
+write a different AgentLog trail.
+
+Run from backend-api/:  python -m benchmarks.bench_agent_dag --applicants 100 --check-ms 20
+"""
+from collections import Counter
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+def slow_verification_agent(check_ms: float):
+    from agents import VerificationAgent
+
+    class SlowVerificationAgent(VerificationAgent):
+        def _check_kyc(self, applicant):
+            time.sleep(check_ms / 1000)
+            return super()._check_kyc(applicant)
+
+        def verify_documents(self, applicant_id, context=None):
+            time.sleep(check_ms / 1000)
+            return super().verify_documents(applicant_id, context)
+
+        def check_duplicates(self, applicant_id, context=None, identity=None):
+            time.sleep(check_ms / 1000)
+            return super().check_duplicates(applicant_id, context, identity)
+
+    return SlowVerificationAgent
+
+def seed(session_factory, count: int):
+    from sqlalchemy import insert
+    from models import Applicant, Document, DocumentTypeEnum
+    applicants = [
+        {"id": str(uuid.UUID(int=i + 1)), "name": f"Dag Applicant {i % (count // 2 or 1)}",
+         "income": 20000 + (i * 7919) % 120000, "requested_amount": 100000 + (i * 104729) % 2000000,
+         "credit_score": 550 + (i * 31) % 300, "employment_type": "salaried",
+         "phone": f"98{i:08d}", "email": f"dag{i}@example.com"}
+        for i in range(count)
+    ]
+    documents = [
+        {"id": str(uuid.uuid4()), "applicant_id": applicant["id"], "type": DocumentTypeEnum.SALARY_SLIP,
+         "ocr_status": "done", "verified": i % 3 != 0}
+        for i, applicant in enumerate(applicants)
+    ]
+    db = session_factory()
+    try:
+        db.execute(insert(Applicant), applicants)
+        db.execute(insert(Document), documents)
+        db.commit()
+    finally:
+        db.close()
+    return [applicant["id"] for applicant in applicants]
+
+def run(session_factory, applicant_ids, workers: int, check_ms: float):
+    from agents import MasterAgent
+    from models import AgentLog
+    db = session_factory()
+    try:
+        master = MasterAgent(db, step_workers=workers)
+        master.verification_agent = slow_verification_agent(check_ms)(db, master.log_sink)
+        decisions, timings = {}, []
+        start = time.perf_counter()
+        for applicant_id in applicant_ids:
+            result = master.orchestrate_evaluation(applicant_id)
+            decisions[applicant_id] = (result["status"], result.get("eligibility_score"), result["stage"])
+            timings.append(result["timings"])
+        elapsed = time.perf_counter() - start
+        trail = Counter((row.applicant_id, row.agent_name, row.action) for row in db.query(AgentLog))
+        db.query(AgentLog).delete()
+        db.commit()
+    finally:
+        db.close()
+    return decisions, timings, trail, elapsed
+
+def mean(timings, key: str) -> float:
+    return sum(timing[key] for timing in timings) / len(timings)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=100)
+    parser.add_argument("--check-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'dag.db')}"
+    os.chdir(workdir)
+    import main as app_main
+
+    applicant_ids = seed(app_main.SessionLocal, args.applicants)
+    print(f"{args.applicants} evaluations, {args.check_ms:g} ms per check")
+    results = {}
+    for label, workers in (("sequential", 0), (f"dag, {args.workers} workers", args.workers)):
+        decisions, timings, trail, elapsed = run(app_main.SessionLocal, applicant_ids, workers, args.check_ms)
+        results[label] = (decisions, trail)
+        paths = Counter(" > ".join(timing["critical_path"]) for timing in timings)
+        print(f"  {label:20s} {elapsed / len(applicant_ids) * 1000:8.2f} ms/evaluation"
+              f"  wall {mean(timings, 'wall_ms'):7.2f}  critical path {mean(timings, 'critical_path_ms'):7.2f}"
+              f"  all steps {mean(timings, 'serial_ms'):7.2f} ms   path: {paths.most_common(1)[0][0]}")
+
+    (sequential, sequential_trail), (dag, dag_trail) = results.values()
+    mismatches = [applicant_id for applicant_id in applicant_ids if sequential[applicant_id] != dag[applicant_id]]
+    for applicant_id in mismatches[:5]:
+        print(f"MISMATCH {applicant_id}: {sequential[applicant_id]} != {dag[applicant_id]}")
+    trail_differs = sequential_trail != dag_trail
+    if trail_differs:
+        print("MISMATCH: AgentLog trails differ")
+    print(f"{len(mismatches)} decision mismatches, AgentLog trail {'differs' if trail_differs else 'identical'}")
+    return 1 if mismatches or trail_differs else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
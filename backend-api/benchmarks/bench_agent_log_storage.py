@@ -0,0 +1,164 @@
+"""Agent log storage with results inline vs. moved to compressed, deduplicated log_payloads.
+
+Runs MasterAgent.orchestrate_evaluation for --applicants applicants, evaluating every
+--reevaluate-every-th one a second time, with compaction switched off, so every result
+(letters included) is stored inline. A copy of the database is then compacted with
+agent_log_storage.compact_inline. Both files are VACUUMed and compared by size (and by the
+pages of the agent log tables, where SQLite has dbstat), and a few queries that read every
+agent_logs row are timed on each. Finally all logs of the compacted
+database are archived and read back: every row must come back with the result it was logged with.
+
+Run from backend-api/:  python -m benchmarks.bench_agent_log_storage --applicants 5000
+"""
+from datetime import datetime, timedelta
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+SCAN_QUERIES = {
+    "actions per agent": "SELECT agent_name, action, count(*), avg(execution_time) FROM agent_logs GROUP BY agent_name, action",
+    "slowest actions": "SELECT id, agent_name, execution_time FROM agent_logs ORDER BY execution_time DESC LIMIT 20",
+    "logs per day": "SELECT date(timestamp), count(*) FROM agent_logs GROUP BY date(timestamp)",
+}
+
+def seed(session_factory, count: int):
+    from sqlalchemy import insert
+    from models import Applicant, StatusEnum
+    db = session_factory()
+    try:
+        now = datetime.utcnow()
+        db.execute(insert(Applicant), [{
+            "id": str(uuid.UUID(int=i + 1)), "name": f"Log Applicant {i}", "email": f"log{i}@example.com",
+            "phone": f"98{i:08d}", "income": 20000 + (i * 7919) % 120000,
+            "requested_amount": 100000 + (i * 104729) % 2000000, "credit_score": 550 + (i * 31) % 300,
+            "eligibility_score": 0.0, "status": StatusEnum.EVALUATING, "employment_type": "salaried",
+            "created_at": now, "updated_at": now,
+        } for i in range(count)])
+        db.commit()
+        return [str(uuid.UUID(int=i + 1)) for i in range(count)]
+    finally:
+        db.close()
+
+def scan_times(path: str, repeat: int) -> dict:
+    connection = sqlite3.connect(path)
+    try:
+        times = {}
+        for label, sql in SCAN_QUERIES.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                connection.execute(sql).fetchall()
+            times[label] = (time.perf_counter() - start) / repeat
+        return times
+    finally:
+        connection.close()
+
+def vacuum(path: str) -> int:
+    connection = sqlite3.connect(path)
+    connection.execute("VACUUM")
+    connection.close()
+    return os.path.getsize(path)
+
+def log_table_bytes(path: str):
+    """Pages of agent_logs, log_payloads and their indexes; None without the dbstat table."""
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(
+            "SELECT sum(pgsize) FROM dbstat WHERE name IN (SELECT name FROM sqlite_schema WHERE tbl_name IN (?, ?))",
+            ("agent_logs", "log_payloads")
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        connection.close()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=2000)
+    parser.add_argument("--reevaluate-every", type=int, default=3)
+    parser.add_argument("--inline-bytes", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    inline_path = os.path.join(workdir, "inline.db")
+    compact_path = os.path.join(workdir, "compact.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{inline_path}"
+    os.environ["EVALUATION_WORKERS"] = "0"
+    os.environ["AGENT_LOG_INLINE_BYTES"] = "0"
+    os.chdir(workdir)
+    import main as app_main
+    import agent_log_storage
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from agents import MasterAgent
+
+    applicant_ids = seed(app_main.SessionLocal, args.applicants)
+    db = app_main.SessionLocal()
+    try:
+        master = MasterAgent(db, step_workers=0)
+        start = time.perf_counter()
+        for i, applicant_id in enumerate(applicant_ids):
+            master.orchestrate_evaluation(applicant_id)
+            if args.reevaluate_every and i % args.reevaluate_every == 0:
+                master.orchestrate_evaluation(applicant_id)
+        print(f"{args.applicants} applicants evaluated in {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+    app_main.engine.dispose()
+    shutil.copyfile(inline_path, compact_path)
+
+    agent_log_storage.INLINE_LIMIT = args.inline_bytes
+    engine = create_engine(f"sqlite:///{compact_path}")
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    try:
+        compacted = agent_log_storage.compact_inline(db)
+        report = agent_log_storage.storage_report(db)
+    finally:
+        db.close()
+    print(f"  {report['agent_logs']} agent logs, {compacted['compacted']} results over {args.inline_bytes} bytes"
+          f" moved to {report['payloads']} payloads ({report['payload_bytes'] / 1e6:.2f} MB"
+          f" -> {report['payload_stored_bytes'] / 1e6:.2f} MB compressed)")
+    print(f"  result bytes: {report['result_bytes_uncompacted'] / 1e6:.2f} MB inline,"
+          f" {report['result_bytes_stored'] / 1e6:.2f} MB compacted ({report['saved_ratio']:.0%} saved)")
+
+    inline_size, compact_size = vacuum(inline_path), vacuum(compact_path)
+    print(f"  database file: {inline_size / 1e6:.2f} MB inline, {compact_size / 1e6:.2f} MB compacted"
+          f" ({1 - compact_size / inline_size:.0%} smaller)")
+    inline_logs, compact_logs = log_table_bytes(inline_path), log_table_bytes(compact_path)
+    if inline_logs and compact_logs:
+        print(f"  agent log tables and indexes: {inline_logs / 1e6:.2f} MB inline, {compact_logs / 1e6:.2f} MB compacted"
+              f" ({1 - compact_logs / inline_logs:.0%} smaller)")
+    inline_times, compact_times = scan_times(inline_path, args.repeat), scan_times(compact_path, args.repeat)
+    for label in SCAN_QUERIES:
+        print(f"  scan {label:20s} {inline_times[label] * 1000:8.1f} ms inline {compact_times[label] * 1000:8.1f} ms"
+              f" compacted  {inline_times[label] / compact_times[label]:5.1f}x")
+
+    # Archive everything and compare against the inline copy
+    connection = sqlite3.connect(inline_path)
+    expected = {row[0]: json.loads(row[1]) for row in connection.execute("SELECT id, result FROM agent_logs")}
+    connection.close()
+    archive_dir = os.path.join(workdir, "archive")
+    db = Session()
+    try:
+        start = time.perf_counter()
+        archived = agent_log_storage.archive_logs(db, archive_dir, datetime.utcnow() + timedelta(seconds=1))
+        elapsed = time.perf_counter() - start
+        left = agent_log_storage.storage_report(db)
+    finally:
+        db.close()
+    records = {record["id"]: record["result"] for record in agent_log_storage.iter_archive(archive_dir)}
+    ok = records == expected and left["agent_logs"] == 0 and left["payloads"] == 0
+    print(f"  archived {archived['archived']} logs in {elapsed:.1f}s to {len(archived['files'])} files,"
+          f" {archived['archive_bytes'] / 1e6:.2f} MB; read back {len(records)}"
+          f"{'' if ok else '  MISMATCH'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Polling /master/status and /admin/applicant with the applicant snapshot cache off and on.
+
+Simulates dashboards and partners re-reading the same applicants: --polls requests spread
+round-robin over --applicants applicants, half to each endpoint, with a /master/evaluate of
+one of them every --write-every polls. Three rounds run against the same data through the
+in-process ASGI app:
+
+  off          APPLICANT_CACHE_SIZE=0, every poll queries and serializes
+  cached       the cache on, plain GETs
+  conditional  the cache on, each client sends back the ETag it last saw (If-None-Match)
+
+Reports polls/s, p50/p95 latency, the cache hit ratio and the share of 304 answers. After
+every write, the applicant is polled again and must show the evaluation's result, with a new
+ETag if and only if the body changed; a stale answer is counted and fails the run.
+
+Run from backend-api/:  python -m benchmarks.bench_applicant_cache --applicants 200 --polls 20000
+"""
+from datetime import datetime
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+ROUNDS = ("off", "cached", "conditional")
+
+def seed(session_factory, count: int):
+    from sqlalchemy import insert
+    from models import Applicant, StatusEnum
+    db = session_factory()
+    try:
+        now = datetime.utcnow()
+        db.execute(insert(Applicant), [{
+            "id": str(uuid.UUID(int=i + 1)), "name": f"Poll Applicant {i}", "email": f"poll{i}@example.com",
+            "phone": f"98{i:08d}", "income": 20000 + (i * 7919) % 120000,
+            "requested_amount": 100000 + (i * 104729) % 2000000, "credit_score": 550 + (i * 31) % 300,
+            "eligibility_score": 0.0, "status": StatusEnum.EVALUATING, "employment_type": "salaried",
+            "created_at": now, "updated_at": now,
+        } for i in range(count)])
+        db.commit()
+        return [str(uuid.UUID(int=i + 1)) for i in range(count)]
+    finally:
+        db.close()
+
+def hit_ratio(before: dict, after: dict) -> float:
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    return hits / lookups if lookups else 0.0
+
+def poll_round(client, cache, applicant_ids, headers, polls: int, write_every: int, conditional: bool):
+    latencies, not_modified, stale = [], 0, 0
+    before_round = cache.metrics()
+    etags = {}
+    for i in range(polls):
+        applicant_id = applicant_ids[i % len(applicant_ids)]
+        if i % 2:
+            url, request_headers = f"/admin/applicant/{applicant_id}", dict(headers)
+        else:
+            url, request_headers = f"/master/status/{applicant_id}", {}
+        if conditional and url in etags:
+            request_headers["If-None-Match"] = etags[url]
+        start = time.perf_counter()
+        response = client.get(url, headers=request_headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code == 304:
+            not_modified += 1
+        elif response.status_code != 200:
+            raise RuntimeError(f"GET {url}: {response.status_code} {response.text}")
+        etags[url] = response.headers["ETag"]
+
+        if write_every and i % write_every == write_every - 1:
+            target = applicant_ids[(i // write_every) % len(applicant_ids)]
+            status_url = f"/master/status/{target}"
+            before = client.get(status_url)
+            evaluated = client.post("/master/evaluate", params={"applicant_id": target})
+            evaluated.raise_for_status()
+            after = client.get(status_url)
+            changed = after.json() != before.json()
+            expected = {key: evaluated.json()[key] for key in ("status", "eligibility_score", "reason")}
+            if {key: after.json()[key] for key in expected} != expected or \
+                    changed != (after.headers["ETag"] != before.headers["ETag"]):
+                stale += 1
+    return {
+        "polls_per_s": polls / (sum(latencies) / 1000),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=100, method="inclusive")[94],
+        "not_modified": not_modified / polls,
+        "hit_ratio": hit_ratio(before_round, cache.metrics()),
+        "stale": stale,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=10000)
+    parser.add_argument("--write-every", type=int, default=100, help="Polls between evaluations; 0 for none")
+    parser.add_argument("--ttl", type=float, default=5.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'poll.db')}"
+    os.environ["EVALUATION_WORKERS"] = "0"
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    from applicant_cache import applicant_cache
+    import main as app_main
+
+    applicant_ids = seed(app_main.SessionLocal, args.applicants)
+    with TestClient(app_main.app) as client:
+        login = client.post("/admin/login", json={"email": "admin@nbfc.com", "password": "admin123"})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        results = {}
+        for name in ROUNDS:
+            applicant_cache.configure(max_entries=0 if name == "off" else 10000, ttl=args.ttl)
+            results[name] = poll_round(client, applicant_cache, applicant_ids, headers, args.polls,
+                                       args.write_every, conditional=name == "conditional")
+
+    print(f"{args.polls} polls over {args.applicants} applicants, an evaluation every {args.write_every} polls:")
+    for name, result in results.items():
+        print(f"  {name:12s} {result['polls_per_s']:8.0f} polls/s  p50 {result['p50_ms']:6.2f} ms"
+              f"  p95 {result['p95_ms']:6.2f} ms  hit ratio {result['hit_ratio']:4.0%}"
+              f"  304s {result['not_modified']:4.0%}  stale {result['stale']}")
+    off = results["off"]["polls_per_s"]
+    print(f"  speed-up vs off: cached {results['cached']['polls_per_s'] / off:.1f}x,"
+          f" conditional {results['conditional']['polls_per_s'] / off:.1f}x")
+    return 1 if any(result["stale"] for result in results.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
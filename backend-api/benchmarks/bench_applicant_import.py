@@ -0,0 +1,136 @@
+"""Bulk applicant import vs. replaying the rows one by one through check-eligibility.
+
+Writes a CSV of --rows applicants (every --invalid-every-th row has a bad credit score) and
+imports it with applicant_import.import_applicants at each --chunk-sizes, without and with
+batch evaluation. The baseline runs main.evaluate_new_applicant, the body of
+POST /public/check-eligibility, for the first --replay-rows rows. A second pass imports the
+file and a copy --scale times longer under tracemalloc: peak memory should follow the chunk
+size, not the file size. Fails if any run imports a different number of rows than expected
+or the peak grows more than 50% with the longer file.
+
+Run from backend-api/:  python -m benchmarks.bench_applicant_import --rows 50000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+def write_csv(path: str, rows: int, invalid_every: int) -> int:
+    invalid = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "income", "requested_amount", "credit_score"])
+        for i in range(rows):
+            bad = invalid_every and i % invalid_every == invalid_every - 1
+            invalid += bool(bad)
+            writer.writerow([f"Import Applicant {i}", 20000 + (i * 7919) % 120000,
+                             100000 + (i * 104729) % 2000000, "n/a" if bad else 550 + (i * 31) % 300])
+    return rows - invalid
+
+def reset(session_factory):
+    from models import Applicant, AgentLog, EvaluationJob
+    from rollups import rebuild_rollups
+    db = session_factory()
+    try:
+        for model in (AgentLog, EvaluationJob, Applicant):
+            db.query(model).delete()
+        db.commit()
+        rebuild_rollups(db)
+    finally:
+        db.close()
+
+def run_import(session_factory, path: str, chunk_size: int, evaluate=None):
+    from applicant_import import import_applicants
+    from main import EligibilityRequest
+    reset(session_factory)
+    db = session_factory()
+    try:
+        with open(path, "rb") as stream:
+            start = time.perf_counter()
+            summary = import_applicants(db, stream, "csv", EligibilityRequest, chunk_size, evaluate, max_errors=0)
+            return summary, time.perf_counter() - start
+    finally:
+        db.close()
+
+def run_replay(session_factory, path: str, rows: int):
+    from main import EligibilityRequest, evaluate_new_applicant
+    from pydantic import ValidationError
+    reset(session_factory)
+    db = session_factory()
+    imported = 0
+    try:
+        with open(path, newline="") as f:
+            reader = csv.DictReader(f)
+            start = time.perf_counter()
+            for i, row in enumerate(reader):
+                if i == rows:
+                    break
+                try:
+                    request = EligibilityRequest.model_validate(row)
+                except ValidationError:
+                    continue
+                evaluate_new_applicant(request, db)
+                imported += 1
+            return imported, time.perf_counter() - start
+    finally:
+        db.close()
+
+def peak_memory(session_factory, path: str, chunk_size: int) -> int:
+    tracemalloc.start()
+    try:
+        run_import(session_factory, path, chunk_size)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--invalid-every", type=int, default=50)
+    parser.add_argument("--replay-rows", type=int, default=500)
+    parser.add_argument("--chunk-sizes", type=int, nargs="*", default=[100, 1000, 5000])
+    parser.add_argument("--scale", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'import.db')}"
+    os.environ["EVALUATION_WORKERS"] = "0"
+    os.chdir(workdir)
+    import main as app_main
+
+    path = os.path.join(workdir, "applicants.csv")
+    expected = write_csv(path, args.rows, args.invalid_every)
+    print(f"{args.rows} rows ({os.path.getsize(path) / 1e6:.1f} MB), {args.rows - expected} invalid")
+    failures = 0
+
+    replayed, elapsed = run_replay(app_main.SessionLocal, path, args.replay_rows)
+    baseline = replayed / elapsed
+    print(f"  {'check-eligibility replay':32s} {baseline:10.0f} rows/s  ({replayed} rows)")
+    for evaluate in (None, "batch"):
+        for chunk_size in args.chunk_sizes:
+            summary, elapsed = run_import(app_main.SessionLocal, path, chunk_size, evaluate)
+            rate = summary["rows"] / elapsed
+            ok = summary["imported"] == expected and summary["failed"] == args.rows - expected
+            if evaluate:
+                ok = ok and summary["evaluation"]["evaluated"] == expected
+            failures += not ok
+            label = f"import chunk {chunk_size}" + (", evaluate" if evaluate else "")
+            print(f"  {label:32s} {rate:10.0f} rows/s  {rate / baseline:6.1f}x  imported {summary['imported']},"
+                  f" failed {summary['failed']}{'' if ok else '  MISMATCH'}")
+
+    long_path = os.path.join(workdir, "applicants_long.csv")
+    write_csv(long_path, args.rows * args.scale, args.invalid_every)
+    chunk_size = args.chunk_sizes[len(args.chunk_sizes) // 2]
+    short_peak = peak_memory(app_main.SessionLocal, path, chunk_size)
+    long_peak = peak_memory(app_main.SessionLocal, long_path, chunk_size)
+    grew = long_peak > short_peak * 1.5
+    failures += grew
+    print(f"  peak memory, chunk {chunk_size}: {short_peak / 1e6:.1f} MB for {args.rows} rows,"
+          f" {long_peak / 1e6:.1f} MB for {args.rows * args.scale} rows{'  GREW' if grew else ''}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Upload storage throughput for multi-MB bank statements: buffered vs streamed, and deduplicated re-uploads.
+
+Run from backend-api/:  python -m benchmarks.bench_document_storage --files 20 --size-mb 8
+"""
+from document_storage import DocumentStore
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+
+def make_statements(directory: str, count: int, size_mb: int):
+    paths = []
+    line = b"2024-03-%02d  NEFT/SALARY/ACME CORP          CR   85,000.00   1,42,310.55\n"
+    for i in range(count):
+        path = os.path.join(directory, f"statement_{i}.pdf")
+        with open(path, "wb") as f:
+            f.write(f"%PDF-1.4 statement {i}\n".encode())
+            for _ in range(size_mb * 1024 * 1024 // len(line)):
+                f.write(line)
+        paths.append(path)
+    return paths
+
+def buffered_save(root: str, source) -> str:
+    # The naive approach: read the whole upload, hash it, write it out
+    data = source.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    with open(os.path.join(root, sha256), "wb") as f:
+        f.write(data)
+    return sha256
+
+def measure(save, paths):
+    tracemalloc.start()
+    start = time.perf_counter()
+    total = 0
+    for path in paths:
+        with open(path, "rb") as source:
+            save(source)
+        total += os.path.getsize(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total / elapsed / 1e6, peak / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as fixtures, tempfile.TemporaryDirectory() as buffered_root, \
+            tempfile.TemporaryDirectory() as store_root:
+        paths = make_statements(fixtures, args.files, args.size_mb)
+        store = DocumentStore(store_root, chunk_size=args.chunk_kb * 1024, max_bytes=(args.size_mb + 1) * 1024 * 1024)
+
+        buffered = measure(lambda source: buffered_save(buffered_root, source), paths)
+        streamed = measure(store.save, paths)
+        deduplicated = measure(store.save, paths)
+
+    print(f"{args.files} files x {args.size_mb} MB, chunk {args.chunk_kb} KB")
+    print(f"buffered (read all):    {buffered[0]:8.1f} MB/s   peak memory {buffered[1]:7.1f} MB")
+    print(f"streamed, new content:  {streamed[0]:8.1f} MB/s   peak memory {streamed[1]:7.1f} MB")
+    print(f"streamed, duplicates:   {deduplicated[0]:8.1f} MB/s   peak memory {deduplicated[1]:7.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Sustained evaluation-job throughput as queue workers are added.
+
+Enqueues --jobs evaluation jobs against a fresh database and times how long a worker pool
+takes to drain them, first with --threads worker threads in this process, then with
+--processes worker processes (each running --threads-per-process threads, as
+`python evaluation_jobs.py worker` does). --step-ms adds a sleep to every evaluation to stand
+in for the slow I/O steps (PDF rendering, document fetches) the pipeline will grow; with 0 the
+run measures the pure CPU + SQLite cost. Throughput is jobs over the span from the first claim
+to the last finish, so process start-up (spawn + importing main) only shows in the wall time.
+Fails if any job did not finish exactly once.
+
+Run from backend-api/:  python -m benchmarks.bench_evaluation_jobs --jobs 400 --step-ms 20
+"""
+from sqlalchemy import insert, delete, func
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+STEP_MS_ENV = "BENCH_EVALUATION_STEP_MS"
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+def handler(db, applicant_id: str):
+    """main.run_master_evaluation plus the simulated slow step; importable by worker processes."""
+    from main import run_master_evaluation
+
+    with _calls_lock:
+        _calls[applicant_id] = _calls.get(applicant_id, 0) + 1
+    time.sleep(float(os.getenv(STEP_MS_ENV, "0")) / 1000)
+    return run_master_evaluation(db, applicant_id)
+
+def seed(session_factory, count: int):
+    from models import Applicant
+    applicants = [
+        {"id": str(uuid.UUID(int=i + 1)), "name": f"Job Applicant {i}", "income": 20000 + (i * 7919) % 120000,
+         "requested_amount": 100000 + (i * 104729) % 2000000, "credit_score": 550 + (i * 31) % 300,
+         "employment_type": "salaried"}
+        for i in range(count)
+    ]
+    db = session_factory()
+    try:
+        db.execute(insert(Applicant), applicants)
+        db.commit()
+    finally:
+        db.close()
+    return [applicant["id"] for applicant in applicants]
+
+def enqueue_all(session_factory, applicant_ids):
+    from models import EvaluationJob
+    db = session_factory()
+    try:
+        db.execute(delete(EvaluationJob))
+        db.execute(insert(EvaluationJob), [
+            {"id": str(uuid.uuid4()), "applicant_id": applicant_id, "status": "queued", "max_attempts": 3}
+            for applicant_id in applicant_ids
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def job_totals(session_factory):
+    from models import EvaluationJob
+    db = session_factory()
+    try:
+        done = db.query(func.count()).filter(EvaluationJob.status == "done").scalar()
+        attempts = db.query(func.coalesce(func.sum(EvaluationJob.attempts), 0)).scalar()
+        first, last = db.query(func.min(EvaluationJob.started_at), func.max(EvaluationJob.finished_at)).one()
+    finally:
+        db.close()
+    span = (last - first).total_seconds() if first is not None and last is not None else float("nan")
+    return done, attempts, span
+
+def run_threads(session_factory, settings, threads: int):
+    from evaluation_jobs import EvaluationWorkerPool
+    pool = EvaluationWorkerPool(session_factory, handler, threads, **settings)
+    start = time.perf_counter()
+    pool.start()
+    pool.drain()
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return elapsed
+
+def run_processes(processes: int, threads: int):
+    from evaluation_jobs import run_workers
+    start = time.perf_counter()
+    run_workers(f"{__name__}:handler", processes, threads, drain=True)
+    return time.perf_counter() - start
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=400)
+    parser.add_argument("--step-ms", type=float, default=20.0)
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--processes", type=int, nargs="*", default=[2, 4])
+    parser.add_argument("--threads-per-process", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'jobs.db')}"
+    os.environ[STEP_MS_ENV] = str(args.step_ms)
+    os.environ["EVALUATION_JOB_POLL_SECONDS"] = "0.05"
+    os.chdir(workdir)
+    import main as app_main
+    from evaluation_jobs import settings_from_env
+
+    settings = settings_from_env()
+    applicant_ids = seed(app_main.SessionLocal, args.jobs)
+    print(f"{args.jobs} jobs, {args.step_ms:g} ms simulated step, cpu_count {os.cpu_count()}")
+
+    runs = [("threads", threads, threads) for threads in args.threads]
+    runs += [("processes", processes, processes * args.threads_per_process) for processes in args.processes]
+    baseline = None
+    failures = 0
+    for mode, count, workers in runs:
+        enqueue_all(app_main.SessionLocal, applicant_ids)
+        _calls.clear()
+        if mode == "threads":
+            elapsed = run_threads(app_main.SessionLocal, settings, count)
+        else:
+            elapsed = run_processes(count, args.threads_per_process)
+        done, attempts, span = job_totals(app_main.SessionLocal)
+        rate = args.jobs / span
+        baseline = baseline or rate
+        ok = done == args.jobs and attempts == args.jobs
+        if mode == "threads":
+            ok = ok and len(_calls) == args.jobs and all(calls == 1 for calls in _calls.values())
+        failures += not ok
+        label = f"{count} {mode}" + (f" x {args.threads_per_process} threads" if mode == "processes" else "")
+        print(f"  {label:26s} {workers:3d} workers  {rate:8.1f} jobs/s  {rate / baseline:5.2f}x"
+              f"  wall {elapsed:6.2f}s  done {done}/{args.jobs}, attempts {attempts}{'' if ok else '  MISMATCH'}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Queries and commits per MasterAgent evaluation: per-agent commits vs one unit of work.
+
+Run from backend-api/:  python -m benchmarks.bench_evaluation_uow --applicants 200
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from models import Base, Applicant
+from agents import MasterAgent
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.selects = 0
+        self.writes = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.selects += 1
+        else:
+            self.writes += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def reset(self):
+        self.selects = self.writes = self.commits = 0
+
+def per_agent_commits(master: MasterAgent, applicant_id: str):
+    # The pre-unit-of-work flow: every agent re-fetches the applicant and commits its own log row
+    start_time = time.time()
+    master.get_applicant(applicant_id)
+    verification = master.verification_agent.verify_kyc(applicant_id)
+    if not verification["success"]:
+        master.db.commit()
+        master.log_action(applicant_id, "orchestrate_evaluation", {"status": "rejected"}, time.time() - start_time)
+        return
+    underwriting = master.underwriting_agent.evaluate_eligibility(applicant_id)
+    if underwriting["status"] == "approved":
+        master.sanction_agent.generate_sanction_letter(applicant_id)
+    else:
+        master.rejection_agent.generate_rejection_report(applicant_id)
+    master.log_action(applicant_id, "orchestrate_evaluation", {"status": underwriting["status"]}, time.time() - start_time)
+
+def seed(session, count: int):
+    random.seed(42)
+    ids = []
+    for i in range(count):
+        applicant = Applicant(
+            id=str(uuid.uuid4()),
+            name=f"Applicant {i}",
+            email=f"applicant{i}@example.com",
+            phone="9876543210",
+            income=random.uniform(20000, 150000),
+            requested_amount=random.uniform(100000, 2000000),
+            credit_score=random.randint(550, 850)
+        )
+        session.add(applicant)
+        ids.append(applicant.id)
+    session.commit()
+    return ids
+
+def run(label: str, session, counter: StatementCounter, ids, evaluate):
+    counter.reset()
+    start = time.perf_counter()
+    for applicant_id in ids:
+        evaluate(applicant_id)
+    elapsed = time.perf_counter() - start
+    n = len(ids)
+    print(f"{label:<22} selects/eval={counter.selects / n:5.2f}  writes/eval={counter.writes / n:5.2f}  "
+          f"commits/eval={counter.commits / n:5.2f}  ms/eval={elapsed * 1000 / n:7.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        counter = StatementCounter(engine)
+
+        master = MasterAgent(session)
+        ids = seed(session, args.applicants * 2)
+        run("per-agent commits", session, counter, ids[:args.applicants], lambda a: per_agent_commits(master, a))
+        run("unit of work", session, counter, ids[args.applicants:], master.orchestrate_evaluation)
+        session.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Document extraction throughput (pages/s) over the fixture corpus: inline vs the process pool.
+
+The text fixtures in benchmarks/fixtures/documents are laid out as PDFs (the bank statement
+repeated to --statement-pages pages) and extracted the way uploads are.
+
+Run from backend-api/:  python -m benchmarks.bench_extraction --copies 20 --workers 4
+"""
+from concurrent.futures import ProcessPoolExecutor
+from extraction import extract_file
+from models import DocumentTypeEnum
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "documents")
+CORPUS = {
+    "salary_slip.txt": DocumentTypeEnum.SALARY_SLIP,
+    "bank_statement.txt": DocumentTypeEnum.BANK_STATEMENT,
+    "itr.txt": DocumentTypeEnum.ITR,
+}
+
+def write_pdf(lines, path: str, lines_per_page: int = 60):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    pdf = canvas.Canvas(path, pagesize=A4, invariant=1)
+    for start in range(0, len(lines), lines_per_page):
+        text = pdf.beginText(36, A4[1] - 48)
+        text.setFont("Courier", 8)
+        for line in lines[start:start + lines_per_page]:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+def build_corpus(directory: str, copies: int, statement_pages: int):
+    jobs = []
+    for name, doc_type in CORPUS.items():
+        with open(os.path.join(FIXTURES, name)) as f:
+            lines = f.read().splitlines()
+        if doc_type == DocumentTypeEnum.BANK_STATEMENT:
+            # Header once, then transactions repeated to the requested length
+            header, body = lines[:9], lines[9:-1]
+            body = (body * (statement_pages * 60 // len(body) + 1))[:statement_pages * 60 - len(header) - 1]
+            lines = header + body + lines[-1:]
+        path = os.path.join(directory, name.replace(".txt", ".pdf"))
+        write_pdf(lines, path)
+        jobs += [(path, doc_type.value)] * copies
+    return jobs
+
+def run(jobs, executor=None):
+    start = time.perf_counter()
+    if executor is None:
+        results = [extract_file(path, doc_type) for path, doc_type in jobs]
+    else:
+        results = list(executor.map(extract_file, *zip(*jobs), chunksize=4))
+    elapsed = time.perf_counter() - start
+    pages = sum(result["pages"] for result in results)
+    return pages, elapsed, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=20, help="Times each fixture is extracted")
+    parser.add_argument("--statement-pages", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = build_corpus(directory, args.copies, args.statement_pages)
+        pages, inline_s, results = run(jobs)
+        with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            run(jobs[:args.workers], executor)  # start the workers before timing
+            _, pool_s, _ = run(jobs, executor)
+
+    print(f"{len(jobs)} documents, {pages} pages")
+    print(f"inline:                 {pages / inline_s:8.1f} pages/s")
+    print(f"process pool ({args.workers:2d} wk):  {pages / pool_s:8.1f} pages/s")
+    for (path, doc_type), result in zip(jobs[::args.copies], results[::args.copies]):
+        print(f"  {doc_type:<15} confidence {result['confidence']:.2f}  monthly income {result['monthly_income']}")
+
+if __name__ == "__main__":
+    main()
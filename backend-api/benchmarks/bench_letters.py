@@ -0,0 +1,82 @@
+"""Month-end letter regeneration: inline rendering vs the process pool, and the cached re-run.
+
+First checks that letters are dated by the decision, including for a row decided before
+applicants.updated_at existed (dated by created_at); exits 1 if not.
+
+Run from backend-api/:  python -m benchmarks.bench_letters --letters 2000 --workers 4
+"""
+from letters import SANCTION, REJECTION, FIELD_BUILDERS, LetterRenderer, LetterStore
+from datetime import datetime
+from types import SimpleNamespace
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+def make_jobs(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        amount = float(rng.randint(100000, 2000000))
+        if i % 3:
+            jobs.append((SANCTION, {
+                "date": "2024-03-31", "reference": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Applicant {i}",
+                "sanctioned_amount": amount, "processing_fee": amount * 0.01
+            }))
+        else:
+            jobs.append((REJECTION, {
+                "date": "2024-03-31", "reference": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Applicant {i}",
+                "requested_amount": amount, "eligibility_score": rng.uniform(20, 59),
+                "reason": "Eligibility score below minimum threshold"
+            }))
+    return jobs
+
+def check_decision_dates() -> bool:
+    applicant = dict(id=str(uuid.uuid4()), name="Dated Applicant", requested_amount=500000.0,
+                     eligibility_score=40.0, reason_summary="Eligibility score below minimum threshold")
+    cases = [
+        ("decided", SimpleNamespace(**applicant, created_at=datetime(2024, 3, 1), updated_at=datetime(2024, 3, 28)), "2024-03-28"),
+        ("legacy", SimpleNamespace(**applicant, created_at=datetime(2023, 11, 2), updated_at=None), "2023-11-02"),
+    ]
+    ok = True
+    for name, row, expected in cases:
+        dates = {kind: FIELD_BUILDERS[kind](row)["date"] for kind in (SANCTION, REJECTION)}
+        if set(dates.values()) != {expected}:
+            print(f"{name} row dated {dates}, expected {expected}")
+            ok = False
+    return ok
+
+def timed_batch(renderer: LetterRenderer, jobs) -> float:
+    start = time.perf_counter()
+    renderer.render_batch(jobs)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--letters", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if not check_decision_dates():
+        return 1
+    jobs = make_jobs(args.letters)
+    with tempfile.TemporaryDirectory() as inline_dir, tempfile.TemporaryDirectory() as pool_dir:
+        inline = LetterRenderer(LetterStore(inline_dir), workers=0)
+        inline_s = timed_batch(inline, jobs)
+
+        pool = LetterRenderer(LetterStore(pool_dir), workers=args.workers)
+        pool_s = timed_batch(pool, jobs)
+        cached_s = timed_batch(pool, jobs)
+        pool.shutdown()
+
+    print(f"inline, 1 process:       {inline_s:7.2f} s  ({args.letters / inline_s:7.1f} letters/s)")
+    print(f"process pool, {args.workers:2d} workers: {pool_s:7.2f} s  ({args.letters / pool_s:7.1f} letters/s)")
+    print(f"re-run, all cached:      {cached_s:7.2f} s  ({args.letters / cached_s:7.1f} letters/s)")
+    print(f"pool metrics: {pool.metrics()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
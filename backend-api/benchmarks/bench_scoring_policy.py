@@ -0,0 +1,167 @@
+"""Scoring throughput: the compiled policy (bisect over breakpoints) vs the previous if/elif chains.
+
+Both evaluators score the same random applicants; any difference in factors, score or
+decision is reported and fails the run. Also times a hot reload of the policy file and how a
+single factor lookup scales with the number of bands.
+
+Run from backend-api/:  python -m benchmarks.bench_scoring_policy --applicants 200000
+"""
+from scoring_policy import BandFactor, PolicyStore, DEFAULT_POLICY_PATH
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+def chain_evaluate(income, credit_score, requested_amount, employment_type):
+    # The hard-coded UnderwritingAgent._calculate_score_factors/_make_decision this policy replaced
+    factors = {}
+    if income >= 100000:
+        factors["income"] = 25
+    elif income >= 75000:
+        factors["income"] = 20
+    elif income >= 50000:
+        factors["income"] = 15
+    elif income >= 30000:
+        factors["income"] = 10
+    else:
+        factors["income"] = 5
+
+    if credit_score >= 800:
+        factors["credit_score"] = 35
+    elif credit_score >= 750:
+        factors["credit_score"] = 30
+    elif credit_score >= 700:
+        factors["credit_score"] = 25
+    elif credit_score >= 650:
+        factors["credit_score"] = 15
+    else:
+        factors["credit_score"] = 5
+
+    lti_ratio = requested_amount / (income * 12)
+    if lti_ratio <= 2:
+        factors["lti_ratio"] = 25
+    elif lti_ratio <= 3:
+        factors["lti_ratio"] = 20
+    elif lti_ratio <= 5:
+        factors["lti_ratio"] = 15
+    elif lti_ratio <= 8:
+        factors["lti_ratio"] = 10
+    else:
+        factors["lti_ratio"] = 0
+
+    if employment_type == "salaried":
+        factors["employment"] = 15
+    elif employment_type == "self_employed":
+        factors["employment"] = 10
+    else:
+        factors["employment"] = 5
+
+    score = min(100, max(0, sum(factors.values())))
+    # Hard rejects of the original main.py UnderwritingAgent, checked before the score
+    if credit_score < 700:
+        approved, reason = False, f"Credit score {credit_score} below minimum threshold"
+    elif lti_ratio > 8:
+        approved, reason = False, "Requested amount too high relative to income"
+    elif score >= 75:
+        approved, reason = True, f"Strong financial profile with {score:.1f}% eligibility score"
+    elif score >= 60:
+        if credit_score >= 700 and income >= 50000:
+            approved, reason = True, f"Approved with {score:.1f}% score based on good credit and income"
+        else:
+            approved, reason = False, f"Eligibility score {score:.1f}% requires higher credit score or income"
+    else:
+        approved, reason = False, f"Eligibility score {score:.1f}% below minimum threshold"
+    return {"status": "approved" if approved else "rejected", "eligibility_score": score,
+            "reason": reason, "score_factors": factors}
+
+def applicants(count: int, seed: int):
+    rng = random.Random(seed)
+    # Round values land exactly on thresholds often enough to exercise the band edges
+    return [
+        (
+            rng.choice([rng.uniform(10000, 200000), rng.choice([30000, 50000, 75000, 100000])]),
+            rng.choice([rng.randint(300, 900), rng.choice([650, 700, 750, 800])]),
+            rng.uniform(50000, 5000000),
+            rng.choice(["salaried", "self_employed", "contract", None]),
+        )
+        for _ in range(count)
+    ]
+
+def chain_lookup(bands, default):
+    # An if/elif chain over `bands` (highest threshold first), generated the way it would be hand-written
+    lines = ["def lookup(value):"]
+    for position, (threshold, points) in enumerate(bands):
+        lines.append(f"    {'if' if position == 0 else 'elif'} value >= {threshold}:\n        return {points}")
+    lines.append(f"    return {default}")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["lookup"]
+
+def band_scaling(band_counts, values):
+    print("single factor lookup, band count vs ns/lookup:")
+    for count in band_counts:
+        bands = [(300 + i * 600 // count, i + 1) for i in reversed(range(count))]
+        chain = chain_lookup(bands, 0)
+        compiled = BandFactor("credit_score", "credit_score", ">=", bands, 0).score
+        assert all(chain(value) == compiled(value) for value in values)
+        chain_s = timed(chain, [(value,) for value in values])[1]
+        compiled_s = timed(compiled, [(value,) for value in values])[1]
+        print(f"  {count:4d} bands   if/elif {chain_s / len(values) * 1e9:7.1f}   bisect {compiled_s / len(values) * 1e9:7.1f}")
+
+def timed(evaluate, rows):
+    start = time.perf_counter()
+    results = [evaluate(*row) for row in rows]
+    return results, time.perf_counter() - start
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--band-counts", type=int, nargs="*", default=[4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rows = applicants(args.applicants, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scoring_policy.json")
+        shutil.copy(DEFAULT_POLICY_PATH, path)
+        store = PolicyStore(path)
+        policy = store.current()
+
+        chain_results, chain_s = timed(chain_evaluate, rows)
+        policy_results, policy_s = timed(policy.evaluate, rows)
+        # current() on every call, as the agents do (the file is stat'ed every check_interval)
+        _, store_s = timed(lambda *row: store.current().evaluate(*row), rows)
+
+        with open(path) as f:
+            config = json.load(f)
+        config["version"] += "-reloaded"
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(config, f)
+        os.replace(tmp, path)
+        start = time.perf_counter()
+        reloaded = store.reload().version
+        reload_ms = (time.perf_counter() - start) * 1000
+
+    mismatches = [
+        (row, expected, actual) for row, expected, actual in zip(rows, chain_results, policy_results)
+        if {k: v for k, v in actual.items() if k != "policy_version"} != expected
+    ]
+
+    print(f"{args.applicants} applicants, policy {policy.version}")
+    print(f"if/elif chains:             {args.applicants / chain_s:10.0f} evaluations/s")
+    print(f"compiled policy:            {args.applicants / policy_s:10.0f} evaluations/s")
+    print(f"compiled policy via store:  {args.applicants / store_s:10.0f} evaluations/s")
+    print(f"hot reload to {reloaded}: {reload_ms:.2f} ms")
+    for row, expected, actual in mismatches[:5]:
+        print(f"MISMATCH {row}: {expected} != {actual}")
+    print(f"{len(mismatches)} mismatches")
+    band_scaling(args.band_counts, [credit_score for _, credit_score, _, _ in rows])
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
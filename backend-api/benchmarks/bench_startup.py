@@ -0,0 +1,167 @@
+"""Process start-up time of the API in full and fast STARTUP_MODE, with an import-time breakdown.
+
+Each run is a fresh interpreter that imports main and runs the FastAPI startup handlers, the
+same work a uvicorn worker does before it serves its first request. Reports the median over
+--runs of the import and of the startup handlers. One extra run per mode uses
+`python -X importtime`; the modules main imports directly and the packages with the most
+import time are listed from it. Both modes start against a database already prepared with
+`python migrations.py`, as on a restart or scale-out, and their runs alternate.
+
+--save writes the medians as a JSON baseline; --compare reads one and exits 1 if a mode's
+import or startup time grew by more than --tolerance. --max-import-ms fails the run if the
+fast mode's import takes longer.
+
+Run from backend-api/:  python -m benchmarks.bench_startup --runs 7 --save startup-baseline.json
+"""
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("full", "fast")
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+ready = time.perf_counter()
+asyncio.run(main.app.router.shutdown())
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+def child_env(mode: str, database_url: str) -> dict:
+    env = dict(os.environ, STARTUP_MODE=mode, DATABASE_URL=database_url)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [APP_DIR, env.get("PYTHONPATH")]))
+    return env
+
+def run_child(env: dict, workdir: str, importtime: bool = False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"start-up failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+def import_breakdown(stderr: str, top: int):
+    """(modules imported directly by main, packages by self time) from -X importtime output, in ms."""
+    pending, direct, packages = [], [], {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        depth = (len(indent) - 1) // 2
+        pending.append((depth, name, self_us, cumulative_us))
+        if depth > 0:
+            continue
+        # A top-level import closes its subtree, which importtime prints before it
+        if name == "main":
+            direct = [(n, c / 1000) for d, n, s, c in pending if d == 1]
+            for d, n, s, c in pending:
+                package = n.split(".")[0]
+                packages[package] = packages.get(package, 0.0) + s / 1000
+        pending = []
+    direct.sort(key=lambda item: item[1], reverse=True)
+    return direct[:top], sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def measure(modes, runs: int, top: int):
+    """Runs alternate between the modes, so drift in machine load affects them alike."""
+    workdir = tempfile.mkdtemp(prefix="nbfc-startup-")
+    try:
+        envs, samples, importtimes = {}, {mode: [] for mode in modes}, {}
+        for mode in modes:
+            database_url = f"sqlite:///{os.path.join(workdir, f'{mode}.db')}"
+            envs[mode] = child_env(mode, database_url)
+            subprocess.run([sys.executable, os.path.join(APP_DIR, "migrations.py"), "--database-url", database_url],
+                           cwd=workdir, env=envs[mode], check=True, capture_output=True)
+            run_child(envs[mode], workdir)  # untimed: writes .pyc files and, in full mode, the sample data
+        for _ in range(runs):
+            for mode in modes:
+                samples[mode].append(run_child(envs[mode], workdir)[0])
+        for mode in modes:
+            importtimes[mode] = run_child(envs[mode], workdir, importtime=True)[1]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {}
+    for mode in modes:
+        result = results[mode] = {key: round(statistics.median(sample[key] for sample in samples[mode]), 1)
+                                  for key in ("import_ms", "startup_ms")}
+        direct, packages = import_breakdown(importtimes[mode], top)
+        result["imports"] = {name: round(ms, 1) for name, ms in direct}
+        result["packages"] = {name: round(ms, 1) for name, ms in packages}
+    return results
+
+def compare(baseline: dict, results: dict, tolerance: float):
+    regressions = []
+    print(f"\nagainst baseline from {baseline.get('meta', {}).get('created_at', '?')} (tolerance {tolerance:.0%}):")
+    for mode, result in results.items():
+        before = baseline.get("modes", {}).get(mode)
+        if before is None:
+            continue
+        for key in ("import_ms", "startup_ms"):
+            change = result[key] / before[key] - 1 if before[key] else 0.0
+            regressed = change > tolerance
+            print(f"  {mode:5s} {key:11s} {before[key]:8.1f} -> {result[key]:8.1f} ms  {change:+7.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(f"{mode} {key}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", action="append", dest="modes", choices=MODES, help="Default: both")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Modules and packages listed in the breakdown")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the fast mode's median import is slower")
+    parser.add_argument("--save", help="Write results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = measure(args.modes or MODES, args.runs, args.top)
+    for mode, result in results.items():
+        print(f"{mode}: import {result['import_ms']:.1f} ms, startup {result['startup_ms']:.1f} ms (median of {args.runs})")
+        print("  imported by main (cumulative):")
+        for name, ms in result["imports"].items():
+            print(f"    {name:40s} {ms:8.1f} ms")
+        print("  by package (self time):")
+        for name, ms in result["packages"].items():
+            print(f"    {name:40s} {ms:8.1f} ms")
+    if "full" in results and "fast" in results:
+        full, fast = results["full"], results["fast"]
+        print(f"fast vs full: import {full['import_ms'] / fast['import_ms']:.1f}x,"
+              f" import + startup {(full['import_ms'] + full['startup_ms']) / (fast['import_ms'] + fast['startup_ms']):.1f}x")
+
+    failures = []
+    if args.max_import_ms is not None and "fast" in results and results["fast"]["import_ms"] > args.max_import_ms:
+        failures.append(f"fast import {results['fast']['import_ms']:.1f} ms over the {args.max_import_ms:.0f} ms budget")
+    report = {
+        "meta": {"created_at": datetime.utcnow().isoformat(), "runs": args.runs,
+                 "python": platform.python_version(), "cpus": os.cpu_count()},
+        "modes": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            failures += compare(json.load(f), results, args.tolerance)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
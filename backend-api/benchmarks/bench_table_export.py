@@ -0,0 +1,117 @@
+"""Export throughput and output size of applicants and agent_logs by format.
+
+Seeds --applicants applicants with --logs-per-applicant AgentLog rows each (result payloads
+shaped like the underwriting agent's), then exports both tables with
+table_export.export_to_file as CSV, Parquet and Arrow IPC. Reports rows/s, file size and
+bytes per row. Each file is read back and must hold every row. An incremental export after
+--new more applicants must return exactly those.
+
+Run from backend-api/:  python -m benchmarks.bench_table_export --applicants 100000
+"""
+from datetime import datetime, timedelta
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import uuid
+
+def seed(session_factory, count: int, logs_per_applicant: int, base_time: datetime, offset: int = 0):
+    from sqlalchemy import insert
+    from models import Applicant, AgentLog, StatusEnum
+    db = session_factory()
+    try:
+        for start in range(offset, offset + count, 10000):
+            stop = min(offset + count, start + 10000)
+            applicants, logs = [], []
+            for i in range(start, stop):
+                applicant_id = str(uuid.UUID(int=i + 1))
+                created_at = base_time + timedelta(seconds=i - offset)
+                approved = i % 3 != 0
+                applicants.append({
+                    "id": applicant_id, "name": f"Export Applicant {i}", "email": f"export{i}@example.com",
+                    "phone": f"98{i:08d}", "income": 20000 + (i * 7919) % 120000,
+                    "requested_amount": 100000 + (i * 104729) % 2000000, "credit_score": 550 + (i * 31) % 300,
+                    "eligibility_score": 40 + i % 60, "status": StatusEnum.APPROVED if approved else StatusEnum.REJECTED,
+                    "reason_summary": "Meets all eligibility criteria" if approved else "Eligibility score below minimum threshold",
+                    "policy_version": "2024-01-underwriting-v1", "employment_type": "salaried",
+                    "created_at": created_at, "updated_at": created_at,
+                })
+                for j in range(logs_per_applicant):
+                    logs.append({
+                        "id": str(uuid.uuid4()), "applicant_id": applicant_id,
+                        "agent_name": ("VerificationAgent", "UnderwritingAgent", "SanctionAgent")[j % 3],
+                        "action": ("verify_kyc", "evaluate_eligibility", "generate_sanction_letter")[j % 3],
+                        "result": json.dumps({"status": "approved" if approved else "rejected",
+                                              "eligibility_score": 40 + i % 60,
+                                              "score_factors": {"income": 20, "credit_score": 25, "lti_ratio": 15}}),
+                        "execution_time": 0.001 * (i % 50), "timestamp": created_at + timedelta(milliseconds=j),
+                    })
+            db.execute(insert(Applicant), applicants)
+            if logs:
+                db.execute(insert(AgentLog), logs)
+            db.commit()
+    finally:
+        db.close()
+
+def rows_in(path: str, fmt: str) -> int:
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+    import pyarrow.ipc
+    import pyarrow.parquet
+    if fmt == "parquet":
+        return pyarrow.parquet.ParquetFile(path).metadata.num_rows
+    with pyarrow.ipc.open_stream(path) as reader:
+        return sum(batch.num_rows for batch in reader)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=100000)
+    parser.add_argument("--logs-per-applicant", type=int, default=3)
+    parser.add_argument("--new", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'export.db')}"
+    os.environ["EVALUATION_WORKERS"] = "0"
+    os.chdir(workdir)
+    import main as app_main
+    from table_export import EXPORT_TABLES, FORMATS, export_to_file
+    from models import Applicant, AgentLog
+
+    seed(app_main.SessionLocal, args.applicants, args.logs_per_applicant, datetime.utcnow() - timedelta(days=30))
+    db = app_main.SessionLocal()
+    expected = {"applicants": db.query(Applicant).count(), "agent_logs": db.query(AgentLog).count()}
+    print(f"{expected['applicants']} applicants, {expected['agent_logs']} agent logs, chunk {args.chunk_size}")
+    failures = 0
+    watermarks = {}
+    try:
+        for table in EXPORT_TABLES:
+            for fmt in FORMATS:
+                summary = export_to_file(db, table, fmt, os.path.join(workdir, fmt), chunk_size=args.chunk_size)
+                watermarks[table] = summary["watermark"]
+                read_back = rows_in(summary["path"], fmt)
+                ok = summary["rows"] == expected[table] == read_back
+                failures += not ok
+                print(f"  {table:11s} {fmt:8s} {summary['rows'] / summary['seconds']:10.0f} rows/s"
+                      f"  {summary['bytes'] / 1e6:8.2f} MB  {summary['bytes'] / max(1, summary['rows']):7.1f} B/row"
+                      f"{'' if ok else f'  MISMATCH: read back {read_back}'}")
+
+        # Newer than every exported row, including the sample data main seeds at startup
+        seed(app_main.SessionLocal, args.new, 0, datetime.utcnow() + timedelta(seconds=1), offset=args.applicants)
+        since = datetime.fromisoformat(watermarks["applicants"])
+        summary = export_to_file(db, "applicants", "parquet", os.path.join(workdir, "incremental"), since,
+                                 chunk_size=args.chunk_size)
+        ok = summary["rows"] == args.new
+        failures += not ok
+        print(f"  incremental since {summary['since']}: {summary['rows']} rows"
+              f" (expected {args.new}){'' if ok else '  MISMATCH'}")
+    finally:
+        db.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Per-request cost of verify_token: full jwt.decode vs the verified-token cache.
+
+Run from backend-api/:  python -m benchmarks.bench_token_cache --iterations 20000
+"""
+from datetime import datetime, timedelta
+from jose import jwt
+from token_cache import TokenCache
+import argparse
+import time
+
+SECRET_KEY = "bench-secret"
+ALGORITHM = "HS256"
+
+def make_token(subject: str) -> str:
+    claims = {
+        "sub": subject,
+        "role": "officer",
+        "iat": datetime.utcnow(),
+        "exp": datetime.utcnow() + timedelta(minutes=30)
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+def time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--officers", type=int, default=50, help="Distinct tokens polled round-robin")
+    args = parser.parse_args()
+
+    tokens = [make_token(f"officer{i}@nbfc.com") for i in range(args.officers)]
+    cache = TokenCache()
+    position = [0]
+
+    def next_token():
+        position[0] = (position[0] + 1) % len(tokens)
+        return tokens[position[0]]
+
+    def decode():
+        jwt.decode(next_token(), SECRET_KEY, algorithms=[ALGORITHM])
+
+    def cached():
+        token = next_token()
+        claims = cache.get(token)
+        if claims is None:
+            cache.put(token, jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+
+    decode_us = time_per_call(decode, args.iterations)
+    cached_us = time_per_call(cached, args.iterations)
+    print(f"jwt.decode per request:   {decode_us:8.2f} us")
+    print(f"token cache per request:  {cached_us:8.2f} us")
+    print(f"saving per request:       {decode_us - cached_us:8.2f} us ({decode_us / cached_us:.1f}x)")
+    print(f"cache metrics: {cache.metrics()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Concurrency check for Idempotency-Key on /public/check-eligibility.
+
+Fires --concurrency simultaneous requests for each of --keys keys against a fresh database and
+fails unless exactly one applicant was created per key and every response for a key carries
+the same applicant_id. The same burst without keys is run first to show the duplicates.
+
+Run from backend-api/:  python -m benchmarks.check_idempotency --keys 20 --concurrency 8
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import uuid
+
+def burst(client, payloads, concurrency: int, keyed: bool):
+    barrier = threading.Barrier(concurrency)
+
+    def send(payload, key):
+        barrier.wait()
+        headers = {"Idempotency-Key": key} if keyed else {}
+        return key, client.post("/public/check-eligibility", json=payload, headers=headers)
+
+    results = []
+    with ThreadPoolExecutor(concurrency) as pool:
+        for key, payload in payloads:
+            results += list(pool.map(lambda _: send(payload, key), range(concurrency)))
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'idempotency.db')}"
+    os.environ["RATE_LIMIT_PER_SECOND"] = "0"  # all bursts come from one test client
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    from models import Applicant
+    import main as app_main
+
+    def payloads(prefix: str):
+        return [
+            (str(uuid.uuid4()), {"name": f"{prefix} {i}", "income": 40000 + i * 1000, "requested_amount": 300000, "credit_score": 720})
+            for i in range(args.keys)
+        ]
+
+    def applicants_named(prefix: str) -> int:
+        db = app_main.SessionLocal()
+        try:
+            return db.query(Applicant).filter(Applicant.name.like(f"{prefix} %")).count()
+        finally:
+            db.close()
+
+    with TestClient(app_main.app) as client:
+        burst(client, payloads("Unkeyed"), args.concurrency, keyed=False)
+        unkeyed = applicants_named("Unkeyed")
+
+        results = burst(client, payloads("Keyed"), args.concurrency, keyed=True)
+        keyed = applicants_named("Keyed")
+
+    failures = []
+    by_key = {}
+    for key, response in results:
+        if response.status_code != 200:
+            failures.append(f"{key}: HTTP {response.status_code} {response.text}")
+            continue
+        by_key.setdefault(key, set()).add(response.json()["applicant_id"])
+    failures += [f"{key}: {len(ids)} different applicant ids" for key, ids in by_key.items() if len(ids) != 1]
+    if keyed != args.keys:
+        failures.append(f"{keyed} applicants created for {args.keys} keys")
+
+    replayed = sum(1 for _, response in results if response.headers.get("Idempotent-Replayed") == "true")
+    print(f"without keys: {args.keys * args.concurrency} requests -> {unkeyed} applicants")
+    print(f"with keys:    {args.keys * args.concurrency} requests -> {keyed} applicants ({replayed} replayed responses)")
+    print(f"store metrics: {app_main.idempotency_store.metrics()}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("OK: exactly one applicant per key" if not failures else f"{len(failures)} failures")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
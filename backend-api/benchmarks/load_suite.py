@@ -0,0 +1,540 @@
+"""Seeded load suite: every backend-api endpoint plus agents.MasterAgent, in-process or over HTTP.
+
+An isolated SQLite database is seeded at --scale (1k, 100k or 1m applicants, each with a
+document and agent log rows) and cached under --data-dir; every run works on a fresh copy.
+Each scenario is timed on its own and reported as throughput and p50/p95/p99 latency.
+
+  --transport inprocess  drives the ASGI app through TestClient (no network) one request at a
+                         time, and calls agents.MasterAgent.orchestrate_evaluation directly
+  --transport http       starts uvicorn on the copy and drives it with --concurrency clients
+
+--save writes the results as a JSON baseline; --compare reads one and exits 1 if a scenario's
+p95 grew, or its throughput fell, by more than --tolerance.
+
+Run from backend-api/:
+    python -m benchmarks.load_suite --scale 1k --transport inprocess --save baseline-inprocess-1k.json
+    python -m benchmarks.load_suite --scale 100k --transport http --compare baseline-http-100k.json
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+from database import create_db_engine
+from letters import SANCTION, LetterStore, letter_key, render_pdf
+from models import Base, Applicant, Document, AgentLog, StatusEnum, DocumentTypeEnum
+from rollups import rebuild_rollups
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# Bump when the seeded data changes so cached databases are rebuilt
+SEED_VERSION = 1
+SEED_CHUNK_SIZE = 10_000
+SEED_DAYS = 180
+SAMPLE_SIZE = 500
+ADMIN = {"email": "admin@nbfc.com", "password": "admin123"}
+STATUSES = (StatusEnum.EVALUATING, StatusEnum.APPROVED, StatusEnum.REJECTED)
+DOCUMENT_TYPES = list(DocumentTypeEnum)
+EMPLOYMENT_TYPES = ("salaried", "self_employed", "contract")
+# Every request comes from one client, faster than a rate limit allows; the suite times endpoints
+ADMISSION_OFF = {"RATE_LIMIT_PER_SECOND": "0", "ADMISSION_MAX_IN_FLIGHT": "0"}
+
+def applicant_id(i: int) -> str:
+    # Deterministic ids let scenarios sample applicants without querying for them
+    return str(uuid.UUID(int=i + 1))
+
+def percentiles(latencies_ms):
+    if len(latencies_ms) < 2:
+        value = latencies_ms[0] if latencies_ms else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+# --- Seeding ---------------------------------------------------------------------------------
+
+def _seed_rows(start: int, stop: int, count: int, base_time: datetime):
+    applicants, documents, logs = [], [], []
+    for i in range(start, stop):
+        aid = applicant_id(i)
+        status = STATUSES[i % 3]
+        created_at = base_time + timedelta(seconds=i * SEED_DAYS * 86400 // count)  # spread over SEED_DAYS
+        score = float((i * 37) % 101)
+        applicants.append({
+            "id": aid,
+            "name": f"Seed Applicant {i}",
+            "email": f"seed{i}@example.com",
+            "phone": "98765%05d" % (i % 100000),
+            "income": 20000 + (i * 7919) % 130000,
+            "requested_amount": 100000 + (i * 104729) % 1900000,
+            "credit_score": 550 + (i * 31) % 300,
+            "eligibility_score": score if status != StatusEnum.EVALUATING else 0.0,
+            "status": status,
+            "reason_summary": None if status == StatusEnum.EVALUATING else f"Eligibility score {score:.1f}% (seeded)",
+            "pre_approved_limit": 0.0,
+            "employment_type": EMPLOYMENT_TYPES[i % 3],
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+        documents.append({
+            "id": str(uuid.UUID(int=(1 << 64) + i)),
+            "applicant_id": aid,
+            "type": DOCUMENT_TYPES[i % len(DOCUMENT_TYPES)],
+            "ocr_status": "done",
+            "ocr_data": json.dumps({"monthly_income": 20000 + (i * 7919) % 130000}),
+            "confidence": 1.0,
+            "verified": i % 4 != 0,
+            "uploaded_at": created_at,
+        })
+        if status == StatusEnum.EVALUATING:
+            continue
+        for n, (agent, action, result) in enumerate((
+            ("VerificationAgent", "verify_kyc", {"success": True, "checks": {"phone": True, "email": True}}),
+            ("UnderwritingAgent", "evaluate_eligibility", {"status": status.value, "eligibility_score": score}),
+            ("MasterAgent", "orchestrate_evaluation", {"status": status.value, "stage": "completed"}),
+        )):
+            logs.append({
+                "id": str(uuid.UUID(int=(2 << 64) + i * 4 + n)),
+                "applicant_id": aid,
+                "agent_name": agent,
+                "action": action,
+                "result": json.dumps(result),
+                "execution_time": 0.001 * (n + 1),
+                "timestamp": created_at + timedelta(seconds=n),
+            })
+    return applicants, documents, logs
+
+def seed_database(path: str, count: int):
+    """Bulk-insert `count` applicants with documents and agent logs, then rebuild the rollups."""
+
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    base_time = datetime.utcnow() - timedelta(days=SEED_DAYS)
+    started = time.perf_counter()
+    for start in range(0, count, SEED_CHUNK_SIZE):
+        applicants, documents, logs = _seed_rows(start, min(count, start + SEED_CHUNK_SIZE), count, base_time)
+        # Core bulk inserts bypass the ORM rollup listeners; the rollups are rebuilt once below
+        with engine.begin() as connection:
+            connection.execute(insert(Applicant.__table__), applicants)
+            connection.execute(insert(Document.__table__), documents)
+            if logs:
+                connection.execute(insert(AgentLog.__table__), logs)
+        print(f"\rseeded {min(count, start + SEED_CHUNK_SIZE):>9,} / {count:,} applicants", end="", flush=True)
+    with Session(engine) as db:
+        rebuild_rollups(db)
+        db.commit()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    engine.dispose()
+    print(f" in {time.perf_counter() - started:.1f}s")
+
+def seeded_database(data_dir: str, scale: str, reseed: bool) -> str:
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"applicants-{scale}-v{SEED_VERSION}.db")
+    if reseed or not os.path.exists(path):
+        partial = path + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        seed_database(partial, SCALES[scale])
+        os.replace(partial, path)  # only a complete seed is ever reused
+    return path
+
+# --- Scenarios -------------------------------------------------------------------------------
+
+class BenchContext:
+    """Ids, tokens and stored content the scenarios refer to, gathered once per run."""
+
+    def __init__(self, count: int, heavy_requests: int, warmup: int):
+        step = max(1, count // SAMPLE_SIZE)
+        self.ids = [applicant_id(i) for i in range(0, count, step)][:SAMPLE_SIZE]
+        self.heavy_requests = heavy_requests
+        self.warmup = warmup
+        self.run_id = uuid.uuid4().hex[:8]
+        self.recent = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        self.headers = {}
+        self.logout_tokens = []
+        self.sha256 = None
+        self.letter_key = None
+
+    def applicant(self, i: int) -> str:
+        return self.ids[i % len(self.ids)]
+
+class Scenario:
+    def __init__(self, name: str, method: str, route: str, build, heavy: bool = False):
+        self.name = name
+        self.method = method
+        self.route = route  # path template as declared in main.py, for the coverage check
+        self.build = build  # (ctx, i) -> (url, request kwargs)
+        self.heavy = heavy  # bcrypt or multi-row work: run heavy_requests times
+
+def _new_applicant(ctx: BenchContext, i: int):
+    return {"name": f"Load {ctx.run_id} {i}", "income": 30000 + (i * 7919) % 90000,
+            "requested_amount": 200000 + (i * 104729) % 800000, "credit_score": 600 + (i * 31) % 250}
+
+def _upload(ctx: BenchContext, i: int):
+    body = f"SALARY SLIP\nEmployee: Load {ctx.run_id} {i}\nNet Pay: Rs. {50000 + i}\n".encode()
+    return (f"/admin/applicant/{ctx.applicant(i)}/upload",
+            {"files": {"file": (f"slip_{i}.txt", body, "text/plain")}, "params": {"doc_type": "salary_slip"},
+             "headers": ctx.headers})
+
+def _import_file(ctx: BenchContext, i: int):
+    rows = "".join(f"{a['name']},{a['income']},{a['requested_amount']},{a['credit_score']}\n"
+                   for a in (_new_applicant(ctx, i * 100 + j) for j in range(100)))
+    body = ("name,income,requested_amount,credit_score\n" + rows).encode()
+    return ("/admin/applicants/import",
+            {"files": {"file": (f"import_{i}.csv", body, "text/csv")}, "params": {"evaluate": "batch"},
+             "headers": ctx.headers})
+
+SCENARIOS = [
+    Scenario("check_eligibility", "POST", "/public/check-eligibility",
+             lambda ctx, i: ("/public/check-eligibility", {"json": _new_applicant(ctx, i)})),
+    Scenario("check_eligibility_idempotent", "POST", "/public/check-eligibility",
+             lambda ctx, i: ("/public/check-eligibility", {
+                 "json": _new_applicant(ctx, -(i % 10) - 1),
+                 "headers": {"Idempotency-Key": f"{ctx.run_id}-{i % 10}"}
+             })),
+    Scenario("login", "POST", "/admin/login", lambda ctx, i: ("/admin/login", {"json": ADMIN}), heavy=True),
+    Scenario("logout", "POST", "/admin/logout",
+             lambda ctx, i: ("/admin/logout", {"headers": {"Authorization": f"Bearer {ctx.logout_tokens[i % len(ctx.logout_tokens)]}"}}),
+             heavy=True),
+    Scenario("applicants_page", "GET", "/admin/applicants",
+             lambda ctx, i: ("/admin/applicants", {"params": {"limit": 50}, "headers": ctx.headers})),
+    Scenario("applicants_filtered", "GET", "/admin/applicants",
+             lambda ctx, i: ("/admin/applicants", {"params": {"limit": 50, "status": "approved", "min_credit_score": 700},
+                                                    "headers": ctx.headers})),
+    Scenario("applicants_ndjson_recent", "GET", "/admin/applicants",
+             lambda ctx, i: ("/admin/applicants", {"params": {"format": "ndjson", "created_from": ctx.recent},
+                                                    "headers": ctx.headers})),
+    Scenario("applicant_detail", "GET", "/admin/applicant/{applicant_id}",
+             lambda ctx, i: (f"/admin/applicant/{ctx.applicant(i)}", {"headers": ctx.headers})),
+    Scenario("upload_document", "POST", "/admin/applicant/{applicant_id}/upload", _upload),
+    Scenario("applicant_documents", "GET", "/admin/applicant/{applicant_id}/documents",
+             lambda ctx, i: (f"/admin/applicant/{ctx.applicant(i)}/documents", {"headers": ctx.headers})),
+    Scenario("download_document", "GET", "/admin/documents/{sha256}",
+             lambda ctx, i: (f"/admin/documents/{ctx.sha256}", {"headers": ctx.headers})),
+    Scenario("master_evaluate", "POST", "/master/evaluate",
+             lambda ctx, i: ("/master/evaluate", {"params": {"applicant_id": ctx.applicant(i)}})),
+    Scenario("master_evaluate_queued", "POST", "/master/evaluate",
+             lambda ctx, i: ("/master/evaluate", {"params": {"applicant_id": ctx.applicant(i), "queue": True}})),
+    Scenario("master_evaluate_batch", "POST", "/master/evaluate-batch",
+             lambda ctx, i: ("/master/evaluate-batch", {"json": {"applicant_ids": ctx.ids[:100]}, "headers": ctx.headers}),
+             heavy=True),
+    Scenario("applicants_import", "POST", "/admin/applicants/import", _import_file, heavy=True),
+    Scenario("master_status", "GET", "/master/status/{applicant_id}",
+             lambda ctx, i: (f"/master/status/{ctx.applicant(i)}", {})),
+    Scenario("master_status_not_modified", "GET", "/master/status/{applicant_id}",
+             lambda ctx, i: (f"/master/status/{ctx.applicant(i)}", {"headers": {"If-None-Match": "*"}})),
+    Scenario("reports", "GET", "/admin/reports", lambda ctx, i: ("/admin/reports", {"headers": ctx.headers})),
+    Scenario("reports_daily", "GET", "/admin/reports/daily",
+             lambda ctx, i: ("/admin/reports/daily", {"headers": ctx.headers})),
+    Scenario("export_incremental", "GET", "/admin/export/{table}",
+             lambda ctx, i: (f"/admin/export/{('applicants', 'agent_logs')[i % 2]}",
+                             {"params": {"format": ("csv", "parquet")[i // 2 % 2], "since": ctx.recent},
+                              "headers": ctx.headers}),
+             heavy=True),
+    Scenario("agent_log_metrics", "GET", "/admin/agent-logs/metrics",
+             lambda ctx, i: ("/admin/agent-logs/metrics", {"headers": ctx.headers})),
+    Scenario("token_cache_metrics", "GET", "/admin/token-cache/metrics",
+             lambda ctx, i: ("/admin/token-cache/metrics", {"headers": ctx.headers})),
+    Scenario("applicant_cache_metrics", "GET", "/admin/applicant-cache/metrics",
+             lambda ctx, i: ("/admin/applicant-cache/metrics", {"headers": ctx.headers})),
+    Scenario("letter_metrics", "GET", "/admin/letters/metrics",
+             lambda ctx, i: ("/admin/letters/metrics", {"headers": ctx.headers})),
+    Scenario("idempotency_metrics", "GET", "/admin/idempotency/metrics",
+             lambda ctx, i: ("/admin/idempotency/metrics", {"headers": ctx.headers})),
+    Scenario("extraction_metrics", "GET", "/admin/extraction/metrics",
+             lambda ctx, i: ("/admin/extraction/metrics", {"headers": ctx.headers})),
+    Scenario("evaluation_job_metrics", "GET", "/admin/evaluation-jobs/metrics",
+             lambda ctx, i: ("/admin/evaluation-jobs/metrics", {"headers": ctx.headers})),
+    Scenario("scoring_policy", "GET", "/admin/scoring-policy",
+             lambda ctx, i: ("/admin/scoring-policy", {"headers": ctx.headers})),
+    Scenario("scoring_policy_reload", "POST", "/admin/scoring-policy/reload",
+             lambda ctx, i: ("/admin/scoring-policy/reload", {"headers": ctx.headers}), heavy=True),
+    Scenario("prometheus_metrics", "GET", "/metrics", lambda ctx, i: ("/metrics", {})),
+    Scenario("admission_settings", "GET", "/admin/admission",
+             lambda ctx, i: ("/admin/admission", {"headers": ctx.headers})),
+    Scenario("admission_configure", "POST", "/admin/admission",
+             lambda ctx, i: ("/admin/admission", {"json": {"rate": 0}, "headers": ctx.headers})),
+    Scenario("profiling_settings", "GET", "/admin/profiling",
+             lambda ctx, i: ("/admin/profiling", {"headers": ctx.headers})),
+    Scenario("profiling_configure", "POST", "/admin/profiling",
+             lambda ctx, i: ("/admin/profiling", {"json": {"enabled": False}, "headers": ctx.headers})),
+    Scenario("letter_pdf", "GET", "/letters/{kind}/{key}.pdf",
+             lambda ctx, i: (f"/letters/sanction/{ctx.letter_key}.pdf", {})),
+    Scenario("webhook_decision", "POST", "/webhook/decision",
+             lambda ctx, i: ("/webhook/decision", {"params": {"applicant_id": ctx.applicant(i), "status": "approved"}})),
+]
+
+def uncovered_routes(openapi: dict):
+    covered = {(s.method, s.route) for s in SCENARIOS}
+    return sorted(
+        f"{method.upper()} {path}" for path, methods in openapi.get("paths", {}).items()
+        for method in methods if (method.upper(), path) not in covered
+    )
+
+def prepare_context(send, ctx: BenchContext, workdir: str):
+    """Log in, store one document and one letter. `send(method, url, **kwargs)` returns a response."""
+    login = send("POST", "/admin/login", json=ADMIN)
+    login.raise_for_status()
+    ctx.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    # Each logout revokes its token, so mint one per logout request (warmup requests included)
+    ctx.logout_tokens = [send("POST", "/admin/login", json=ADMIN).json()["access_token"]
+                         for _ in range(ctx.heavy_requests + ctx.warmup)]
+
+    url, kwargs = _upload(ctx, -1)
+    upload = send("POST", url, **kwargs)
+    upload.raise_for_status()
+    ctx.sha256 = upload.json()["sha256"]
+
+    # The app serves letters from LETTER_STORAGE_DIR (./letters under the working directory)
+    fields = {"date": "2024-01-01", "reference": ctx.applicant(0), "name": "Seed Applicant 0",
+              "sanctioned_amount": 500000, "processing_fee": 5000}
+    ctx.letter_key = letter_key(SANCTION, fields)
+    LetterStore(os.path.join(workdir, "letters")).write(SANCTION, ctx.letter_key, render_pdf(SANCTION, fields))
+
+def summarize(name: str, latencies_ms, errors: int, elapsed: float, transport: str) -> dict:
+    p50, p95, p99 = percentiles(latencies_ms)
+    return {
+        "scenario": name,
+        "transport": transport,
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "throughput_rps": len(latencies_ms) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": statistics.fmean(latencies_ms) if latencies_ms else 0.0,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+    }
+
+# --- Transports ------------------------------------------------------------------------------
+
+def run_inprocess(db_path: str, workdir: str, count: int, requests: int, heavy_requests: int,
+                  selected, warmup: int):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.update(ADMISSION_OFF)
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    from agents import MasterAgent
+    from log_sink import get_default_log_sink
+    import main as app_main
+
+    ctx = BenchContext(count, heavy_requests, warmup)
+    results = []
+    with TestClient(app_main.app) as client:
+        prepare_context(lambda method, url, **kw: client.request(method, url, **kw), ctx, workdir)
+        missing = uncovered_routes(app_main.app.openapi())
+
+        for scenario in selected:
+            n = heavy_requests if scenario.heavy else requests
+            for i in range(min(warmup, n)):
+                url, kwargs = scenario.build(ctx, n + i)
+                client.request(scenario.method, url, **kwargs)
+            latencies, errors = [], 0
+            started = time.perf_counter()
+            for i in range(n):
+                url, kwargs = scenario.build(ctx, i)
+                start = time.perf_counter()
+                response = client.request(scenario.method, url, **kwargs)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code >= 400
+            results.append(summarize(scenario.name, latencies, errors, time.perf_counter() - started, "inprocess"))
+            print_result(results[-1])
+
+        # agents.MasterAgent is not behind any endpoint, so it is driven directly
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for i in range(requests):
+            db = app_main.SessionLocal()
+            start = time.perf_counter()
+            try:
+                MasterAgent(db, get_default_log_sink()).orchestrate_evaluation(ctx.applicant(i))
+            except Exception:
+                errors += 1
+            finally:
+                db.close()
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append(summarize("agents_master_orchestrate", latencies, errors, time.perf_counter() - started, "direct"))
+        print_result(results[-1])
+    return results, missing
+
+async def _drive_http(client: httpx.AsyncClient, scenario: Scenario, ctx: BenchContext, n: int, concurrency: int,
+                      offset: int = 0):
+    latencies, errors = [], 0
+    queue = iter(range(offset, offset + n))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            url, kwargs = scenario.build(ctx, i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, url, **kwargs)
+                errors += response.status_code >= 400
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, n)))))
+    return latencies, errors, time.perf_counter() - started
+
+async def _run_http_scenarios(base_url: str, ctx: BenchContext, selected, requests: int, heavy_requests: int,
+                              concurrency: int, warmup: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        for scenario in selected:
+            n = heavy_requests if scenario.heavy else requests
+            if warmup:
+                await _drive_http(client, scenario, ctx, min(warmup, n), concurrency, offset=n)
+            latencies, errors, elapsed = await _drive_http(client, scenario, ctx, n, concurrency)
+            results.append(summarize(scenario.name, latencies, errors, elapsed, "http"))
+            print_result(results[-1])
+    return results
+
+def run_http(db_path: str, workdir: str, count: int, requests: int, heavy_requests: int, selected,
+             warmup: int, concurrency: int, port: int, workers: int):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", PYTHONPATH=str(APP_DIR), **ADMISSION_OFF)
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    server = subprocess.Popen(command, cwd=workdir, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base_url, timeout=120.0) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    openapi = client.get("/openapi.json")
+                    if openapi.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.2)
+            ctx = BenchContext(count, heavy_requests, warmup)
+            prepare_context(lambda method, url, **kw: client.request(method, url, **kw), ctx, workdir)
+            missing = uncovered_routes(openapi.json())
+        results = asyncio.run(_run_http_scenarios(base_url, ctx, selected, requests, heavy_requests, concurrency, warmup))
+    finally:
+        server.terminate()
+        server.wait()
+    return results, missing
+
+# --- Reporting -------------------------------------------------------------------------------
+
+def print_result(result: dict):
+    print(f"  {result['scenario']:<30} {result['throughput_rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f}  "
+          f"p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}", flush=True)
+
+def compare(baseline: dict, results, tolerance: float):
+    """Scenarios whose p95 rose, or throughput fell, by more than `tolerance` against the baseline."""
+    previous = {result["scenario"]: result for result in baseline.get("scenarios", [])}
+    regressions = []
+    print(f"\nagainst baseline from {baseline.get('meta', {}).get('created_at', '?')} (tolerance {tolerance:.0%}):")
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        p95_change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = result["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance / (1 + tolerance)
+        print(f"  {result['scenario']:<30} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(result["scenario"])
+    return regressions
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--transport", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--heavy-requests", type=int, default=20, help="Requests for login, logout, batch and reload")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="HTTP clients in flight")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--scenario", action="append", help="Only run these scenarios (repeatable)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "nbfc-load-suite"),
+                        help="Where seeded databases are cached")
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--save", help="Write results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    selected = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    seeded = seeded_database(args.data_dir, args.scale, args.reseed)
+    workdir = tempfile.mkdtemp(prefix="nbfc-load-")
+    try:
+        db_path = os.path.join(workdir, "bench.db")
+        shutil.copy(seeded, db_path)
+        print(f"{args.transport}, {args.scale} applicants, {args.requests} requests per scenario"
+              f"{f', concurrency {args.concurrency}' if args.transport == 'http' else ''}")
+        if args.transport == "inprocess":
+            results, missing = run_inprocess(db_path, workdir, SCALES[args.scale], args.requests,
+                                             args.heavy_requests, selected, args.warmup)
+        else:
+            results, missing = run_http(db_path, workdir, SCALES[args.scale], args.requests, args.heavy_requests,
+                                        selected, args.warmup, args.concurrency, args.port, args.workers)
+    finally:
+        os.chdir(APP_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for route in missing:
+        print(f"WARNING: no scenario covers {route}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "revision": git_revision(),
+            "scale": args.scale,
+            "transport": args.transport,
+            "requests": args.requests,
+            "heavy_requests": args.heavy_requests,
+            "concurrency": args.concurrency if args.transport == "http" else 1,
+            "workers": args.workers,
+            "db_mode": os.getenv("DB_MODE", "sync"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "scenarios": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if {k: baseline["meta"].get(k) for k in ("scale", "transport")} != {k: report["meta"][k] for k in ("scale", "transport")}:
+            print("WARNING: baseline was recorded with a different scale or transport")
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
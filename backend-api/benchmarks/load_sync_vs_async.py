@@ -0,0 +1,112 @@
+"""Throughput and tail latency of the hot endpoints with DB_MODE=sync vs DB_MODE=async.
+
+Starts uvicorn once per mode against a fresh SQLite file and drives it with a fixed number
+of concurrent clients.
+
+Run from backend-api/:  python -m benchmarks.load_sync_vs_async --requests 2000 --concurrency 64
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/openapi.json")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def drive(base_url: str, requests: int, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        await wait_until_up(client)
+        login = await client.post("/admin/login", json={"email": "admin@nbfc.com", "password": "admin123"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        created = await client.post("/public/check-eligibility", json={
+            "name": "Load Test", "income": 60000, "requested_amount": 300000, "credit_score": 720
+        })
+        applicant_id = created.json()["applicant_id"]
+
+        # Mix of the endpoints an officer dashboard and the public form hit
+        def request_for(i: int):
+            kind = i % 4
+            if kind == 0:
+                return client.post("/public/check-eligibility", json={
+                    "name": f"Load {i}", "income": 30000 + i % 90000,
+                    "requested_amount": 200000 + i % 800000, "credit_score": 600 + i % 250
+                })
+            if kind == 1:
+                return client.get("/admin/applicants", params={"limit": 50}, headers=headers)
+            if kind == 2:
+                return client.get(f"/admin/applicant/{applicant_id}", headers=headers)
+            return client.get(f"/master/status/{applicant_id}")
+
+        latencies = []
+        errors = 0
+        queue = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for i in queue:
+                start = time.perf_counter()
+                response = await request_for(i)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 0.99),
+        "errors": errors
+    }
+
+def run_mode(mode: str, port: int, requests: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as workdir:
+        # One client at full speed: leave rate limiting and load shedding out of the comparison
+        env = dict(os.environ, DB_MODE=mode, PYTHONPATH=str(APP_DIR), RATE_LIMIT_PER_SECOND="0", ADMISSION_MAX_IN_FLIGHT="0")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env
+        )
+        try:
+            return asyncio.run(drive(f"http://127.0.0.1:{port}", requests, concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        result = run_mode(mode, args.port, args.requests, args.concurrency)
+        print(f"DB_MODE={mode:<5}  {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms  errors {result['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Concurrent check-eligibility style writes against SQLite: default vs tuned engine profile.
+
+Each writer thread inserts an applicant and runs the MasterAgent evaluation on it, the same
+transactions /public/check-eligibility issues; reader threads poll the applicant list.
+
+Run from backend-api/:  python -m benchmarks.stress_sqlite_writes --writers 16 --readers 4 --seconds 10
+"""
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from models import Base, Applicant
+from agents import MasterAgent
+from applicant_queries import filtered_applicants, keyset_page
+from database import PROFILES, create_db_engine, sqlite_settings
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+def writer(session_factory, deadline: float, stats: dict, lock: threading.Lock):
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        db = session_factory()
+        try:
+            applicant = Applicant(
+                id=str(uuid.uuid4()),
+                name="Stress Test",
+                income=rng.randint(20000, 150000),
+                requested_amount=rng.randint(100000, 2000000),
+                credit_score=rng.randint(550, 850)
+            )
+            db.add(applicant)
+            db.commit()
+            MasterAgent(db).orchestrate_evaluation(applicant.id)
+            outcome = "evaluations"
+        except OperationalError as e:
+            db.rollback()
+            outcome = "locked_errors" if "locked" in str(e) else "other_errors"
+        finally:
+            db.close()
+        with lock:
+            stats[outcome] += 1
+
+def reader(session_factory, deadline: float, latencies: list, stats: dict, lock: threading.Lock):
+    while time.perf_counter() < deadline:
+        db = session_factory()
+        start = time.perf_counter()
+        try:
+            keyset_page(db, filtered_applicants(), 50)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+        except OperationalError:
+            with lock:
+                stats["read_errors"] += 1
+        finally:
+            db.close()
+
+def run_profile(profile_name: str, writers: int, readers: int, seconds: float):
+    with tempfile.TemporaryDirectory() as workdir:
+        url = f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+        engine = create_db_engine(url, PROFILES[profile_name])
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        settings = sqlite_settings(engine)
+
+        stats = {"evaluations": 0, "locked_errors": 0, "other_errors": 0, "read_errors": 0}
+        latencies = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=writer, args=(session_factory, deadline, stats, lock)) for _ in range(writers)]
+        threads += [threading.Thread(target=reader, args=(session_factory, deadline, latencies, stats, lock)) for _ in range(readers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        "settings": settings,
+        "evaluations_per_sec": stats["evaluations"] / elapsed,
+        "read_p50_ms": statistics.median(latencies) if latencies else None,
+        "read_p99_ms": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else None,
+        "reads": len(latencies),
+        **stats
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for name in ("default", "tuned"):
+        result = run_profile(name, args.writers, args.readers, args.seconds)
+        print(f"[{name}] {result.pop('settings')}")
+        print(f"    evaluations/s {result['evaluations_per_sec']:8.1f}   locked errors {result['locked_errors']:5d}   "
+              f"other errors {result['other_errors']}")
+        if result["reads"]:
+            print(f"    reads {result['reads']:6d}   p50 {result['read_p50_ms']:6.1f} ms   p99 {result['read_p99_ms']:6.1f} ms   "
+                  f"read errors {result['read_errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from dataclasses import dataclass, replace
+import os
+from typing import Dict, Any, Optional
+
+DEFAULT_DATABASE_URL = "sqlite:///./nbfc_loan.db"
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Connection settings applied to every pooled connection.
+
+    SQLite PRAGMAs are skipped when set to None; the pool settings apply to file
+    databases and server backends (in-memory SQLite keeps SQLAlchemy's default pool)."""
+    name: str
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    busy_timeout_ms: Optional[int] = None
+    mmap_size: Optional[int] = None
+    cache_size: Optional[int] = None  # pages, or KiB when negative
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_timeout: Optional[float] = None
+    pool_recycle: Optional[int] = None
+    pool_pre_ping: bool = False
+
+    def sqlite_pragmas(self) -> Dict[str, Any]:
+        pragmas = {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "busy_timeout": self.busy_timeout_ms,
+            "mmap_size": self.mmap_size,
+            "cache_size": self.cache_size,
+        }
+        return {name: value for name, value in pragmas.items() if value is not None}
+
+# The engine as originally configured: rollback journal, FULL sync, 5s lock wait
+DEFAULT_PROFILE = EngineProfile(name="default")
+
+# WAL lets readers run alongside the single writer; NORMAL sync is durable across
+# application crashes in WAL mode and only risks the last commits on power loss
+TUNED_PROFILE = EngineProfile(
+    name="tuned",
+    journal_mode="WAL",
+    synchronous="NORMAL",
+    busy_timeout_ms=30000,
+    mmap_size=256 * 1024 * 1024,
+    cache_size=-64000,
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=30,
+    pool_recycle=3600,
+    pool_pre_ping=True,
+)
+
+PROFILES = {profile.name: profile for profile in (DEFAULT_PROFILE, TUNED_PROFILE)}
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else None
+
+def profile_from_env() -> EngineProfile:
+    """DB_PROFILE picks the base profile; individual DB_*/SQLITE_* variables override it."""
+    name = os.getenv("DB_PROFILE", "tuned")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}; expected one of {sorted(PROFILES)}")
+    overrides = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS"),
+        "busy_timeout_ms": _env_int("SQLITE_BUSY_TIMEOUT_MS"),
+        "mmap_size": _env_int("SQLITE_MMAP_SIZE"),
+        "cache_size": _env_int("SQLITE_CACHE_SIZE"),
+        "pool_size": _env_int("DB_POOL_SIZE"),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW"),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT"),
+    }
+    return replace(PROFILES[name], **{key: value for key, value in overrides.items() if value is not None})
+
+def database_url_from_env() -> str:
+    return os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def apply_sqlite_pragmas(engine: Engine, profile: EngineProfile):
+    """Run the profile's PRAGMAs on every new DBAPI connection of `engine`.
+    Also used for the sync engine behind an AsyncEngine."""
+    pragmas = profile.sqlite_pragmas()
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def pool_options(url, profile: EngineProfile) -> Dict[str, Any]:
+    url = make_url(url)
+    if _is_memory_sqlite(url):
+        return {}
+    options = {
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": profile.pool_timeout,
+        "pool_recycle": profile.pool_recycle,
+    }
+    options = {name: value for name, value in options.items() if value is not None}
+    if profile.pool_pre_ping:
+        options["pool_pre_ping"] = True
+    return options
+
+def create_db_engine(url: Optional[str] = None, profile: Optional[EngineProfile] = None, **engine_kwargs) -> Engine:
+    """Engine for `url` (default: DATABASE_URL) configured with `profile` (default: from env)."""
+    url = url or database_url_from_env()
+    profile = profile or profile_from_env()
+    if make_url(url).get_backend_name() == "sqlite":
+        engine_kwargs.setdefault("connect_args", {"check_same_thread": False})
+    for name, value in pool_options(url, profile).items():
+        engine_kwargs.setdefault(name, value)
+    engine = create_engine(url, **engine_kwargs)
+    apply_sqlite_pragmas(engine, profile)
+    return engine
+
+def sqlite_settings(engine: Engine) -> Dict[str, Any]:
+    """Current PRAGMA values as seen by a pooled connection."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as connection:
+        cursor = connection.connection.driver_connection
+        return {
+            name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+        }
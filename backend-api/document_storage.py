@@ -0,0 +1,72 @@
+"""Content-addressed storage for uploaded documents.
+
+Uploads are streamed to a temporary file in fixed-size chunks while their SHA-256 is computed,
+then moved to <root>/<hash[:2]>/<hash[2:4]>/<hash>. A document uploaded twice is stored once.
+"""
+from dataclasses import dataclass
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+class DocumentTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Document exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+@dataclass
+class StoredDocument:
+    sha256: str
+    size: int
+    path: str
+    deduplicated: bool
+
+class DocumentStore:
+    def __init__(self, root: str, chunk_size: int = DEFAULT_CHUNK_SIZE, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path(sha256))
+
+    def save(self, source: BinaryIO) -> StoredDocument:
+        """Stream `source` into the store; only one chunk is held in memory at a time."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise DocumentTooLarge(self.max_bytes)
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self.path(sha256)
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+                return StoredDocument(sha256, size, path, deduplicated=True)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            return StoredDocument(sha256, size, path, deduplicated=False)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+def storage_url(sha256: str) -> str:
+    return f"/admin/documents/{sha256}"
@@ -0,0 +1,419 @@
+"""Persistent queue of evaluation jobs behind POST /master/evaluate?queue=true.
+
+Jobs are rows in evaluation_jobs. Workers claim the oldest runnable row with a single
+guarded UPDATE ... RETURNING, so two workers (threads here or in other processes) never run
+the same job. A failed attempt is retried after an exponential backoff until max_attempts;
+a job whose worker died is requeued once its lease expires.
+"""
+from sqlalchemy import select, update, func, case
+from sqlalchemy.orm import Session
+from models import EvaluationJob
+from applicant_cache import applicant_cache, mark_changed
+from metrics import Histogram, registry
+from datetime import datetime, timedelta
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+JOB_STATUSES = (STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED)
+
+DEFAULT_HANDLER = "main:run_master_evaluation"
+
+JOB_SECONDS = registry.register(Histogram(
+    "nbfc_evaluation_job_seconds", "Evaluation job run time by outcome", ("outcome",)
+))
+JOB_WAIT_SECONDS = registry.register(Histogram(
+    "nbfc_evaluation_job_wait_seconds", "Time a runnable evaluation job waited before a worker claimed it"
+))
+
+Handler = Callable[[Session, str], Dict[str, Any]]
+
+def settings_from_env() -> Dict[str, float]:
+    """EVALUATION_JOB_* tuning shared by the API's worker threads and `python evaluation_jobs.py worker`."""
+    return {
+        "max_attempts": int(os.getenv("EVALUATION_JOB_MAX_ATTEMPTS", "3")),
+        "backoff_base": float(os.getenv("EVALUATION_JOB_BACKOFF_SECONDS", "2")),
+        "backoff_max": float(os.getenv("EVALUATION_JOB_BACKOFF_MAX_SECONDS", "300")),
+        "lease_timeout": float(os.getenv("EVALUATION_JOB_LEASE_SECONDS", "600")),
+        "poll_interval": float(os.getenv("EVALUATION_JOB_POLL_SECONDS", "1.0")),
+    }
+
+def enqueue_evaluation(db: Session, applicant_id: str, max_attempts: int = 3) -> Tuple[EvaluationJob, bool]:
+    """Queue an evaluation; an applicant that already has a queued or running job gets that one back."""
+    pending = db.query(EvaluationJob).filter(
+        EvaluationJob.applicant_id == applicant_id,
+        EvaluationJob.status.in_((STATUS_QUEUED, STATUS_RUNNING))
+    ).order_by(EvaluationJob.created_at.desc()).first()
+    if pending is not None:
+        return pending, False
+    job = EvaluationJob(applicant_id=applicant_id, status=STATUS_QUEUED, max_attempts=max_attempts)
+    db.add(job)
+    db.commit()
+    return job, True
+
+def latest_job(db: Session, applicant_id: str) -> Optional[EvaluationJob]:
+    return db.query(EvaluationJob).filter(
+        EvaluationJob.applicant_id == applicant_id
+    ).order_by(EvaluationJob.created_at.desc()).first()
+
+def job_summary(job: EvaluationJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "applicant_id": job.applicant_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "last_error": job.last_error,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+def queue_depth(db: Session) -> Dict[str, int]:
+    counts = dict(db.query(EvaluationJob.status, func.count()).group_by(EvaluationJob.status).all())
+    return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+def requeue_failed(db: Session) -> int:
+    result = db.execute(
+        update(EvaluationJob)
+        .where(EvaluationJob.status == STATUS_FAILED)
+        .values(status=STATUS_QUEUED, attempts=0, run_after=datetime.utcnow(), finished_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount:
+        applicant_cache.clear()
+    return result.rowcount
+
+def resolve_handler(path: str) -> Handler:
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+class ClaimedJob:
+    def __init__(self, id: str, applicant_id: str, attempts: int, max_attempts: int, run_after: datetime):
+        self.id = id
+        self.applicant_id = applicant_id
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.run_after = run_after
+
+class EvaluationWorkerPool:
+    """`workers` threads that claim jobs through `session_factory` and run `handler(db, applicant_id)`,
+    whose return value is stored as the job result. notify() wakes idle workers at once;
+    otherwise they poll every `poll_interval` seconds."""
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        handler: Handler,
+        workers: int = 2,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+        lease_timeout: float = 600.0,
+        poll_interval: float = 1.0
+    ):
+        self.session_factory = session_factory
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self._next_recovery = 0.0
+        self._busy = 0
+        self._stats = {"claimed": 0, "succeeded": 0, "retried": 0, "failed": 0, "recovered": 0, "lost": 0}
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(f"{self.name}:{index}",),
+                                      name=f"evaluation-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def shutdown(self, wait: bool = True):
+        """Stop claiming; with wait, running jobs finish first. Jobs left running are recovered after the lease."""
+        self._stop.set()
+        self.notify()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def drain(self, stop: Optional[threading.Event] = None, timeout: Optional[float] = None) -> bool:
+        """Block until no job is queued or running (in any process); False on stop or timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while stop is None or not stop.is_set():
+            with self._lock:
+                busy = self._busy
+            if busy == 0:
+                db = self.session_factory()
+                try:
+                    depth = queue_depth(db)
+                finally:
+                    db.close()
+                if depth[STATUS_QUEUED] == 0 and depth[STATUS_RUNNING] == 0:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.poll_interval, 0.05))
+        return False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["busy"] = self._busy
+        stats["workers"] = self.workers
+        return stats
+
+    def claim(self, worker_id: str) -> Optional[ClaimedJob]:
+        now = datetime.utcnow()
+        # SKIP LOCKED lets concurrent claimers on Postgres pass over each other's row; SQLite
+        # serializes writers and drops the clause. The status guard makes the claim exclusive either way.
+        next_job = select(EvaluationJob.id).where(
+            EvaluationJob.status == STATUS_QUEUED,
+            EvaluationJob.run_after <= now
+        ).order_by(EvaluationJob.run_after).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+        stmt = (
+            update(EvaluationJob)
+            .where(EvaluationJob.id == next_job, EvaluationJob.status == STATUS_QUEUED)
+            .values(status=STATUS_RUNNING, locked_by=worker_id, locked_at=now, started_at=now,
+                    attempts=EvaluationJob.attempts + 1)
+            .returning(EvaluationJob.id, EvaluationJob.applicant_id, EvaluationJob.attempts,
+                       EvaluationJob.max_attempts, EvaluationJob.run_after)
+            .execution_options(synchronize_session=False)
+        )
+        db = self.session_factory()
+        try:
+            row = db.execute(stmt).first()
+            if row is not None:
+                mark_changed(db, [row.applicant_id])
+            db.commit()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        self._count("claimed")
+        JOB_WAIT_SECONDS.observe(max(0.0, (now - row.run_after).total_seconds()))
+        return ClaimedJob(*row)
+
+    def recover_expired(self) -> int:
+        """Requeue (or fail, when out of attempts) running jobs whose lease has expired."""
+        now = datetime.utcnow()
+        out_of_attempts = EvaluationJob.attempts >= EvaluationJob.max_attempts
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.status == STATUS_RUNNING,
+                       EvaluationJob.locked_at < now - timedelta(seconds=self.lease_timeout))
+                .values(status=case((out_of_attempts, STATUS_FAILED), else_=STATUS_QUEUED),
+                        finished_at=case((out_of_attempts, now), else_=None),
+                        run_after=now, locked_by=None, locked_at=None,
+                        last_error="Lease expired: worker stopped before finishing the job")
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+        if result.rowcount:
+            applicant_cache.clear()
+            logger.warning("Recovered %d evaluation jobs with expired leases", result.rowcount)
+            self._count("recovered", result.rowcount)
+        return result.rowcount
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                self._maybe_recover()
+                job = self.claim(worker_id)
+            except Exception:
+                logger.exception("Claiming an evaluation job failed")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    if not self._stop.is_set():
+                        self._wakeup.wait(self.poll_interval)
+                continue
+            self._execute(worker_id, job)
+
+    def _maybe_recover(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_recovery:
+                return
+            self._next_recovery = now + self.lease_timeout / 4
+        self.recover_expired()
+
+    def _execute(self, worker_id: str, job: ClaimedJob):
+        with self._lock:
+            self._busy += 1
+        start = time.perf_counter()
+        result, error = None, None
+        db = self.session_factory()
+        try:
+            result = self.handler(db, job.applicant_id)
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"
+            logger.warning("Evaluation job %s attempt %d failed: %s", job.id, job.attempts, error)
+        finally:
+            db.close()
+        try:
+            outcome = self._finish(worker_id, job, result, error)
+        except Exception:
+            # The row stays running and is retried once its lease expires
+            logger.exception("Recording evaluation job %s failed", job.id)
+            outcome = "lost"
+        JOB_SECONDS.observe(time.perf_counter() - start, outcome)
+        with self._lock:
+            self._busy -= 1
+            self._stats[outcome] += 1
+
+    def _finish(self, worker_id: str, job: ClaimedJob, result: Optional[Dict[str, Any]], error: Optional[str]) -> str:
+        now = datetime.utcnow()
+        if error is None:
+            outcome = "succeeded"
+            values = {"status": STATUS_DONE, "result": json.dumps(result, default=str), "finished_at": now,
+                      "last_error": None}
+        elif job.attempts >= job.max_attempts:
+            outcome = "failed"
+            values = {"status": STATUS_FAILED, "last_error": error, "finished_at": now}
+        else:
+            outcome = "retried"
+            values = {"status": STATUS_QUEUED, "last_error": error,
+                      "run_after": now + timedelta(seconds=self.backoff(job.attempts))}
+        db = self.session_factory()
+        try:
+            # Guarded on the lock holder: after a lease expiry another worker may own the job
+            updated = db.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.id == job.id, EvaluationJob.locked_by == worker_id,
+                       EvaluationJob.status == STATUS_RUNNING)
+                .values(locked_by=None, locked_at=None, **values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            mark_changed(db, [job.applicant_id])
+            db.commit()
+        finally:
+            db.close()
+        return outcome if updated else "lost"
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+_default_job_pool: Optional[EvaluationWorkerPool] = None
+
+def get_default_job_pool() -> Optional[EvaluationWorkerPool]:
+    return _default_job_pool
+
+def set_default_job_pool(pool: Optional[EvaluationWorkerPool]):
+    global _default_job_pool
+    _default_job_pool = pool
+
+def run_worker_process(handler_path: str, threads: int, drain: bool, stop: Optional[Any] = None) -> Dict[str, Any]:
+    """Entry point of a worker process: `threads` workers on main.SessionLocal until stopped (or drained)."""
+    from main import SessionLocal
+
+    pool = EvaluationWorkerPool(SessionLocal, resolve_handler(handler_path), threads, **settings_from_env())
+    pool.start()
+    try:
+        if drain:
+            pool.drain(stop)
+        elif stop is not None:
+            stop.wait()
+        else:
+            threading.Event().wait()
+    finally:
+        pool.shutdown()
+    return pool.metrics()
+
+def _process_main(handler_path: str, threads: int, drain: bool, stop):
+    metrics = run_worker_process(handler_path, threads, drain, stop)
+    print(f"worker {os.getpid()}: {metrics}", flush=True)
+
+def run_workers(handler_path: str, processes: int, threads: int, drain: bool) -> int:
+    if processes <= 1:
+        try:
+            print(run_worker_process(handler_path, threads, drain))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    children = [context.Process(target=_process_main, args=(handler_path, threads, drain, stop))
+                for _ in range(processes)]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for child in children:
+            child.join()
+    return max(child.exitcode or 0 for child in children)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluation job queue: run workers, show depth, requeue failures")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="Claim and run jobs (EVALUATION_JOB_* settings apply)")
+    worker.add_argument("--processes", type=int, default=1)
+    worker.add_argument("--threads", type=int, default=2, help="Worker threads per process")
+    worker.add_argument("--drain", action="store_true", help="Exit once no job is queued or running")
+    worker.add_argument("--handler", default=DEFAULT_HANDLER, help="module:function(db, applicant_id) to run")
+    commands.add_parser("status", help="Job counts by status")
+    commands.add_parser("requeue-failed", help="Give failed jobs a fresh set of attempts")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        return run_workers(args.handler, args.processes, args.threads, args.drain)
+
+    from main import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "status":
+            print(queue_depth(db))
+        else:
+            print(f"requeued {requeue_failed(db)} failed jobs")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+"""Document text extraction after upload.
+
+Text is pulled from PDF (text layer) or plain-text documents on a process pool, parsed into
+structured fields per document type, and written back to Document.ocr_data, .confidence and
+.verified. Results are reused for any document with the same content hash and type.
+"""
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy.orm import Session
+from models import Document, DocumentTypeEnum
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when parsing changes so cached results from older versions are not reused
+EXTRACTION_VERSION = "1"
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# A document is verified when enough fields were found and, for income documents,
+# the income it shows is within tolerance of the income the applicant declared
+VERIFY_MIN_CONFIDENCE = 0.75
+INCOME_TOLERANCE = 0.25
+
+_AMOUNT = r"(?:rs\.?|inr|₹)?\s*([\d,]+(?:\.\d{1,2})?)"
+_LABEL_END = r"\s*[:\-]?\s*"
+
+FIELD_PATTERNS = {
+    DocumentTypeEnum.SALARY_SLIP: {
+        "employer": r"(?:employer|company)\s*[:\-]\s*(.+)",
+        "employee_name": r"employee\s*name\s*[:\-]\s*(.+)",
+        "pay_period": r"(?:pay\s*period|salary\s*month)\s*[:\-]\s*(.+)",
+        "gross_salary": r"gross\s*(?:salary|pay|earnings)" + _LABEL_END + _AMOUNT,
+        "net_salary": r"net\s*(?:salary|pay)" + _LABEL_END + _AMOUNT,
+    },
+    DocumentTypeEnum.BANK_STATEMENT: {
+        "account_holder": r"account\s*(?:holder|name)\s*[:\-]\s*(.+)",
+        "account_number": r"account\s*(?:number|no\.?)\s*[:\-]\s*([\dXx*]{6,20})",
+        "ifsc": r"ifsc(?:\s*code)?\s*[:\-]\s*([A-Za-z]{4}0[A-Za-z0-9]{6})",
+        "opening_balance": r"opening\s*balance" + _LABEL_END + _AMOUNT,
+        "closing_balance": r"closing\s*balance" + _LABEL_END + _AMOUNT,
+    },
+    DocumentTypeEnum.ITR: {
+        "pan": r"\b([A-Z]{5}\d{4}[A-Z])\b",
+        "assessment_year": r"assessment\s*year" + _LABEL_END + r"(\d{4}\s*-\s*\d{2,4})",
+        "gross_total_income": r"gross\s*total\s*income" + _LABEL_END + _AMOUNT,
+        "total_income": r"(?<!gross )total\s*income" + _LABEL_END + _AMOUNT,
+        "tax_paid": r"(?:total\s*)?tax\s*(?:paid|payable)" + _LABEL_END + _AMOUNT,
+    },
+    DocumentTypeEnum.PAN: {
+        "pan": r"\b([A-Z]{5}\d{4}[A-Z])\b",
+        "name": r"\bname\s*[:\-]\s*(.+)",
+    },
+    DocumentTypeEnum.AADHAR: {
+        "aadhaar_number": r"\b(\d{4}\s?\d{4}\s?\d{4})\b",
+        "name": r"\bname\s*[:\-]\s*(.+)",
+    },
+}
+
+AMOUNT_FIELDS = {
+    "gross_salary", "net_salary", "opening_balance", "closing_balance",
+    "gross_total_income", "total_income", "tax_paid",
+}
+
+# Only the last four digits of identifiers are kept in ocr_data
+MASKED_FIELDS = {"account_number", "aadhaar_number"}
+
+_SALARY_CREDIT = re.compile(r"salary.*?" + _AMOUNT + r"\s*(?:cr|credit)\b", re.IGNORECASE)
+
+# PAN numbers are upper case by definition; everything else is matched case-insensitively
+CASE_SENSITIVE_FIELDS = {"pan"}
+
+_COMPILED = {
+    doc_type: {
+        field: re.compile(pattern, 0 if field in CASE_SENSITIVE_FIELDS else re.IGNORECASE)
+        for field, pattern in fields.items()
+    }
+    for doc_type, fields in FIELD_PATTERNS.items()
+}
+
+def extract_pages(data: bytes) -> List[str]:
+    """Text of each page: the PDF text layer, or the decoded text split on form feeds."""
+    if data.startswith(b"%PDF"):
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(data))
+        return [page.extract_text() or "" for page in reader.pages]
+    return data.decode("utf-8", errors="replace").split("\f")
+
+def _amount(value: str) -> float:
+    return float(value.replace(",", ""))
+
+def _mask(value: str) -> str:
+    digits = re.sub(r"\s", "", value)
+    return "X" * (len(digits) - 4) + digits[-4:]
+
+def parse_fields(pages: List[str], doc_type: DocumentTypeEnum) -> Dict[str, Any]:
+    text = "\n".join(pages)
+    patterns = _COMPILED[doc_type]
+    fields: Dict[str, Any] = {}
+    for field, pattern in patterns.items():
+        match = pattern.search(text)
+        if not match:
+            continue
+        value = match.group(1).strip()
+        if field in AMOUNT_FIELDS:
+            value = _amount(value)
+        elif field in MASKED_FIELDS:
+            value = _mask(value)
+        fields[field] = value
+
+    monthly_income = None
+    if doc_type == DocumentTypeEnum.SALARY_SLIP:
+        monthly_income = fields.get("net_salary", fields.get("gross_salary"))
+    elif doc_type == DocumentTypeEnum.BANK_STATEMENT:
+        credits = [_amount(m.group(1)) for m in _SALARY_CREDIT.finditer(text)]
+        if credits:
+            fields["salary_credits"] = len(credits)
+            monthly_income = sum(credits) / len(credits)
+    elif doc_type == DocumentTypeEnum.ITR:
+        annual = fields.get("total_income", fields.get("gross_total_income"))
+        monthly_income = annual / 12 if annual is not None else None
+
+    has_text = any(page.strip() for page in pages)
+    confidence = len([f for f in patterns if f in fields]) / len(patterns) if has_text else 0.0
+    return {
+        "version": EXTRACTION_VERSION,
+        "pages": len(pages),
+        "has_text_layer": has_text,
+        "fields": fields,
+        "missing": [f for f in patterns if f not in fields],
+        "monthly_income": round(monthly_income, 2) if monthly_income is not None else None,
+        "confidence": round(confidence, 2),
+    }
+
+def extract_file(path: str, doc_type_value: str) -> Dict[str, Any]:
+    """Runs in the worker processes."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return parse_fields(extract_pages(data), DocumentTypeEnum(doc_type_value))
+
+def is_verified(extraction: Dict[str, Any], declared_income: Optional[float]) -> bool:
+    if extraction["confidence"] < VERIFY_MIN_CONFIDENCE:
+        return False
+    monthly_income = extraction.get("monthly_income")
+    if monthly_income is None or not declared_income:
+        return True
+    return abs(monthly_income - declared_income) / declared_income <= INCOME_TOLERANCE
+
+def cached_extraction(db: Session, content_hash: str, doc_type: DocumentTypeEnum) -> Optional[Dict[str, Any]]:
+    """A finished extraction of the same content and type, if any document has one."""
+    row = db.query(Document.ocr_data).filter(
+        Document.content_hash == content_hash,
+        Document.type == doc_type,
+        Document.ocr_status == STATUS_DONE
+    ).first()
+    if row is None:
+        return None
+    extraction = json.loads(row.ocr_data)
+    return extraction if extraction.get("version") == EXTRACTION_VERSION else None
+
+def apply_extraction(document: Document, extraction: Dict[str, Any]):
+    document.ocr_data = json.dumps(extraction)
+    document.confidence = extraction["confidence"]
+    document.verified = is_verified(extraction, document.applicant.income if document.applicant else None)
+    document.ocr_status = STATUS_DONE
+
+class DocumentExtractor:
+    """Runs extraction on a process pool and writes results back through `session_factory`.
+    Concurrent submissions of the same content share one extraction; with workers=0
+    extraction runs inline."""
+
+    def __init__(self, session_factory: Callable, path_for_hash: Callable[[str], str], workers: Optional[int] = None):
+        self.session_factory = session_factory
+        self.path_for_hash = path_for_hash
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._waiting: Dict[Tuple[str, DocumentTypeEnum], List[str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "cache_hits": 0, "extracted": 0, "failed": 0, "pages": 0}
+
+    def submit(self, document_id: str, content_hash: str, doc_type: DocumentTypeEnum):
+        key = (content_hash, doc_type)
+        with self._lock:
+            self._stats["submitted"] += 1
+            if key in self._waiting:
+                self._waiting[key].append(document_id)
+                self._stats["cache_hits"] += 1
+                return
+            self._waiting[key] = [document_id]
+
+        try:
+            self._start(key)
+        except Exception:
+            # Nothing would finish the key, and later uploads of the same content would wait on it
+            logger.exception("Extraction of %s could not be started", content_hash)
+            self._finish(key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = sum(len(ids) for ids in self._waiting.values())
+        stats["workers"] = self.workers
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _start(self, key):
+        content_hash, doc_type = key
+        db = self.session_factory()
+        try:
+            cached = cached_extraction(db, content_hash, doc_type)
+        finally:
+            db.close()
+        if cached is not None:
+            self._count("cache_hits")
+            self._finish(key, cached)
+            return
+
+        if self.workers == 0:
+            try:
+                extraction = extract_file(self.path_for_hash(content_hash), doc_type.value)
+            except Exception:
+                logger.exception("Extraction of %s failed", content_hash)
+                self._finish(key, None)
+                return
+            self._finish(key, extraction)
+            return
+
+        try:
+            future = self._pool().submit(extract_file, self.path_for_hash(content_hash), doc_type.value)
+        except BrokenProcessPool:
+            self._executor = None
+            future = self._pool().submit(extract_file, self.path_for_hash(content_hash), doc_type.value)
+        future.add_done_callback(lambda done: self._on_done(key, done))
+
+    def _on_done(self, key, future: Future):
+        try:
+            extraction = future.result()
+        except Exception:
+            logger.exception("Extraction of %s failed", key[0])
+            extraction = None
+        self._finish(key, extraction)
+
+    def _finish(self, key, extraction: Optional[Dict[str, Any]]):
+        with self._lock:
+            document_ids = self._waiting.pop(key, [])
+            if extraction is None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["extracted"] += 1
+                self._stats["pages"] += extraction["pages"]
+        db = self.session_factory()
+        try:
+            for document in db.query(Document).filter(Document.id.in_(document_ids)):
+                if extraction is None:
+                    document.ocr_status = STATUS_FAILED
+                else:
+                    apply_extraction(document, extraction)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Saving extraction for %s failed", document_ids)
+        finally:
+            db.close()
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+_default_extractor: Optional[DocumentExtractor] = None
+
+def get_default_extractor() -> Optional[DocumentExtractor]:
+    return _default_extractor
+
+def set_default_extractor(extractor: Optional[DocumentExtractor]):
+    global _default_extractor
+    _default_extractor = extractor
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run extraction for stored documents that are pending or failed")
+    parser.add_argument("--status", choices=[STATUS_PENDING, STATUS_FAILED], default=STATUS_PENDING)
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes (0 = inline)")
+    args = parser.parse_args(argv)
+
+    from main import SessionLocal, document_store
+
+    db = SessionLocal()
+    try:
+        documents = db.query(Document.id, Document.content_hash, Document.type).filter(
+            Document.ocr_status == args.status, Document.content_hash.isnot(None)
+        ).all()
+    finally:
+        db.close()
+
+    extractor = DocumentExtractor(SessionLocal, document_store.path, args.workers)
+    try:
+        for document in documents:
+            extractor.submit(document.id, document.content_hash, document.type)
+    finally:
+        extractor.shutdown()
+    print(f"{len(documents)} documents: {extractor.metrics()}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from models import IdempotencyKey
+from datetime import datetime, timedelta
+import argparse
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETED = "completed"
+
+MAX_KEY_LENGTH = 255
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used with a different request body."""
+
+class IdempotencyKeyInProgress(Exception):
+    """Another request with the key is still running after the wait timeout."""
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+class Claim:
+    def __init__(self, key: str, endpoint: str, response: Optional[Dict[str, Any]] = None, status_code: Optional[int] = None):
+        self.key = key
+        self.endpoint = endpoint
+        self.response = response
+        self.status_code = status_code
+
+    @property
+    def is_replay(self) -> bool:
+        return self.response is not None
+
+class IdempotencyStore:
+    """Claims keys by inserting an in_progress row (the primary key makes exactly one insert win).
+    Later requests with the same key wait for that row to complete and replay its response.
+    Completed rows live for `ttl`. An owner's in-progress row is a lease of `stale_after`, renewed
+    by a background thread while the request runs; only a lapsed lease (a crashed owner) is taken over."""
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        ttl: timedelta = timedelta(hours=24),
+        wait_timeout: float = 10.0,
+        stale_after: timedelta = timedelta(seconds=60),
+        poll_interval: float = 0.05,
+        purge_interval: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        # Wakes waiters in this process as soon as an owner finishes; other processes poll
+        self._finished = threading.Condition()
+        self._last_purge = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {"claimed": 0, "replayed": 0, "waited": 0, "mismatches": 0, "timeouts": 0, "purged": 0,
+                       "taken_over": 0, "renew_errors": 0}
+        # Claims owned by this process, renewed every stale_after / 3 until completed or abandoned
+        self._held: Set[Tuple[str, str]] = set()
+        self._renewer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def begin(self, key: str, endpoint: str, request_hash: str) -> Claim:
+        """Returns an owner claim (is_replay False) or the stored response of an earlier request."""
+        self._maybe_purge()
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            if self._try_insert(key, endpoint, request_hash):
+                self._count("claimed")
+                self._hold(key, endpoint)
+                return Claim(key, endpoint)
+
+            db = self.session_factory()
+            try:
+                row = db.get(IdempotencyKey, (key, endpoint))
+                if row is not None and self._is_dead(row):
+                    # Guarded: an owner that completed or renewed since the read keeps its row
+                    result = db.execute(delete(IdempotencyKey).where(
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.endpoint == endpoint,
+                        IdempotencyKey.status == row.status,
+                        IdempotencyKey.expires_at < datetime.utcnow()
+                    ))
+                    db.commit()
+                    if result.rowcount and row.status == STATUS_IN_PROGRESS:
+                        self._count("taken_over")
+                    continue
+            finally:
+                db.close()
+            if row is None:
+                continue  # the owner gave up between our insert and read; try to claim again
+            if row.request_hash != request_hash:
+                self._count("mismatches")
+                raise IdempotencyKeyMismatch()
+            if row.status == STATUS_COMPLETED:
+                self._count("replayed")
+                if waited:
+                    self._count("waited")
+                return Claim(key, endpoint, json.loads(row.response_body), row.response_status)
+
+            if time.monotonic() >= deadline:
+                self._count("timeouts")
+                raise IdempotencyKeyInProgress()
+            waited = True
+            with self._finished:
+                self._finished.wait(self.poll_interval)
+
+    def complete(self, claim: Claim, response: Dict[str, Any], status_code: int = 200):
+        self._release(claim)
+        db = self.session_factory()
+        try:
+            row = db.get(IdempotencyKey, (claim.key, claim.endpoint))
+            if row is not None:
+                row.status = STATUS_COMPLETED
+                row.response_status = status_code
+                row.response_body = json.dumps(response, default=str)
+                row.expires_at = datetime.utcnow() + self.ttl
+                db.commit()
+        finally:
+            db.close()
+        self._notify()
+
+    def abandon(self, claim: Claim):
+        """Release a claim whose request failed so a retry can run it again."""
+        self._release(claim)
+        db = self.session_factory()
+        try:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.key == claim.key,
+                IdempotencyKey.endpoint == claim.endpoint,
+                IdempotencyKey.status == STATUS_IN_PROGRESS
+            ))
+            db.commit()
+        finally:
+            db.close()
+        self._notify()
+
+    def purge_expired(self) -> int:
+        db = self.session_factory()
+        try:
+            result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+        self._count("purged", result.rowcount)
+        return result.rowcount
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["held"] = len(self._held)
+        return stats
+
+    def shutdown(self):
+        """Stop renewing; claims still held lapse after stale_after and can be taken over."""
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join()
+            self._renewer = None
+
+    def renew(self) -> int:
+        """Extend the lease of every in-progress claim this process holds."""
+        with self._stats_lock:
+            held = list(self._held)
+        if not held:
+            return 0
+        expires_at = datetime.utcnow() + self.stale_after
+        db = self.session_factory()
+        try:
+            renewed = 0
+            for key, endpoint in held:
+                renewed += db.execute(update(IdempotencyKey).where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.endpoint == endpoint,
+                    IdempotencyKey.status == STATUS_IN_PROGRESS
+                ).values(expires_at=expires_at)).rowcount
+            db.commit()
+        finally:
+            db.close()
+        return renewed
+
+    def _try_insert(self, key: str, endpoint: str, request_hash: str) -> bool:
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            db.add(IdempotencyKey(
+                key=key,
+                endpoint=endpoint,
+                request_hash=request_hash,
+                status=STATUS_IN_PROGRESS,
+                created_at=now,
+                expires_at=now + self.stale_after
+            ))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    def _hold(self, key: str, endpoint: str):
+        with self._stats_lock:
+            self._held.add((key, endpoint))
+            if self._renewer is None:
+                self._stop.clear()
+                self._renewer = threading.Thread(target=self._renew_loop, name="idempotency-renewer", daemon=True)
+                self._renewer.start()
+
+    def _release(self, claim: Claim):
+        with self._stats_lock:
+            self._held.discard((claim.key, claim.endpoint))
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.stale_after.total_seconds() / 3):
+            try:
+                self.renew()
+            except Exception:
+                logger.exception("Renewing idempotency claims failed")
+                self._count("renew_errors")
+
+    def _is_dead(self, row: IdempotencyKey) -> bool:
+        # Expired completed responses, or an owner that crashed without completing
+        return row.expires_at < datetime.utcnow()
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self.purge_expired()
+
+    def _notify(self):
+        with self._finished:
+            self._finished.notify_all()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain stored idempotency keys")
+    parser.add_argument("command", choices=["purge"])
+    args = parser.parse_args(argv)
+
+    from main import SessionLocal
+
+    purged = IdempotencyStore(SessionLocal).purge_expired()
+    print(f"Purged {purged} expired idempotency keys")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
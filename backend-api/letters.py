@@ -0,0 +1,370 @@
+"""Sanction and rejection letters: shared text templates, PDF rendering on a process pool
+and content-addressed storage of the rendered files.
+
+A letter is identified by the SHA-256 of its template version, kind and fields, so the same
+inputs always map to the same file and are only rendered once.
+"""
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache
+from string import Formatter
+import argparse
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when a template or the layout changes so existing letters are re-rendered
+TEMPLATE_VERSION = "1"
+
+SANCTION = "sanction"
+REJECTION = "rejection"
+
+TEMPLATES = {
+    SANCTION: """
+LOAN SANCTION LETTER
+
+Date: {date}
+Reference: {reference}
+
+Dear {name},
+
+We are pleased to inform you that your loan application has been APPROVED.
+
+Loan Details:
+- Sanctioned Amount: ₹{sanctioned_amount:,.2f}
+- Interest Rate: 10.5% per annum
+- Tenure: Up to 60 months
+- Processing Fee: ₹{processing_fee:,.2f}
+
+This sanction is valid for 30 days from the date of issue.
+
+Best Regards,
+Loanify NBFC Limited
+""",
+    REJECTION: """
+LOAN APPLICATION STATUS REPORT
+
+Date: {date}
+Reference: {reference}
+
+Dear {name},
+
+We regret to inform you that your loan application could not be approved at this time.
+
+Application Details:
+- Requested Amount: ₹{requested_amount:,.2f}
+- Eligibility Score: {eligibility_score:.1f}%
+- Reason: {reason}
+
+Recommendations for Future Applications:
+1. Improve your credit score through timely payments
+2. Consider applying for a lower loan amount
+3. Increase your monthly income documentation
+
+You may reapply after 3 months.
+
+Best Regards,
+Loanify NBFC Limited
+""",
+}
+
+# The standard PDF fonts have no rupee glyph
+PDF_SUBSTITUTIONS = {"₹": "Rs. "}
+
+def decision_date(applicant) -> str:
+    """Letters are dated by the decision (updated_at, which every decision sets), not by when they
+    are rendered, so regenerating a letter later maps to the same key and file. Rows decided before
+    updated_at existed fall back to created_at, and failing that to today."""
+    decided_at = applicant.updated_at or applicant.created_at or datetime.utcnow()
+    return decided_at.strftime('%Y-%m-%d')
+
+def sanction_letter_fields(applicant) -> Dict[str, Any]:
+    return {
+        "date": decision_date(applicant),
+        "reference": applicant.id,
+        "name": applicant.name,
+        "sanctioned_amount": applicant.requested_amount,
+        "processing_fee": applicant.requested_amount * 0.01,
+    }
+
+def rejection_letter_fields(applicant) -> Dict[str, Any]:
+    return {
+        "date": decision_date(applicant),
+        "reference": applicant.id,
+        "name": applicant.name,
+        "requested_amount": applicant.requested_amount,
+        "eligibility_score": applicant.eligibility_score,
+        "reason": applicant.reason_summary,
+    }
+
+FIELD_BUILDERS = {SANCTION: sanction_letter_fields, REJECTION: rejection_letter_fields}
+
+@lru_cache(maxsize=None)
+def compiled_template(kind: str) -> Tuple[Tuple[Tuple[str, Optional[str], str], ...], ...]:
+    """Template split once into blocks (separated by blank lines) of (literal, field, format_spec) parts."""
+    if kind not in TEMPLATES:
+        raise ValueError(f"Unknown letter kind: {kind}")
+    blocks = []
+    for block in TEMPLATES[kind].strip().split("\n\n"):
+        parts = tuple(
+            (literal, field, spec or "")
+            for literal, field, spec, _ in Formatter().parse(block)
+        )
+        blocks.append(parts)
+    return tuple(blocks)
+
+def _render_block(parts, fields: Dict[str, Any]) -> str:
+    out = []
+    for literal, field, spec in parts:
+        out.append(literal)
+        if field is not None:
+            out.append(format(fields[field], spec))
+    return "".join(out)
+
+def render_text(kind: str, fields: Dict[str, Any]) -> str:
+    return "\n" + "\n\n".join(_render_block(parts, fields) for parts in compiled_template(kind)) + "\n"
+
+def letter_key(kind: str, fields: Dict[str, Any]) -> str:
+    payload = json.dumps({"version": TEMPLATE_VERSION, "kind": kind, "fields": fields}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    # Built once per worker process
+    from reportlab.lib.styles import getSampleStyleSheet
+    sheet = getSampleStyleSheet()
+    return {"title": sheet["Title"], "body": sheet["BodyText"], "bullet": sheet["Bullet"]}
+
+def render_pdf(kind: str, fields: Dict[str, Any]) -> bytes:
+    """Lay out one letter. Runs in the worker processes; output is byte-for-byte
+    deterministic for the same inputs (reportlab invariant mode)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from xml.sax.saxutils import escape
+
+    styles = _pdf_styles()
+    story = []
+    for index, parts in enumerate(compiled_template(kind)):
+        text = _render_block(parts, fields)
+        for symbol, replacement in PDF_SUBSTITUTIONS.items():
+            text = text.replace(symbol, replacement)
+        if index == 0:
+            story.append(Paragraph(escape(text), styles["title"]))
+            continue
+        for line in text.split("\n"):
+            style = styles["bullet"] if line.startswith("- ") or line[:2].rstrip(".").isdigit() else styles["body"]
+            story.append(Paragraph(escape(line), style))
+        story.append(Spacer(1, 8))
+
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, invariant=1,
+        title=compiled_template(kind)[0][0][0], author="Loanify NBFC Limited"
+    )
+    document.build(story)
+    return buffer.getvalue()
+
+def _render_job(job: Tuple[str, Dict[str, Any]]) -> bytes:
+    return render_pdf(*job)
+
+class LetterStore:
+    """Rendered PDFs on local disk under <root>/<kind>/<key[:2]>/<key>.pdf."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, key[:2], f"{key}.pdf")
+
+    def exists(self, kind: str, key: str) -> bool:
+        return os.path.exists(self.path(kind, key))
+
+    def write(self, kind: str, key: str, data: bytes) -> str:
+        path = self.path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+class LetterRenderer:
+    """Renders letters off the request path. `submit` returns the letter key at once and
+    lays the PDF out on a process pool; `path` waits for a pending render if needed.
+    With workers=0 letters are rendered inline (tests, small CLI runs)."""
+
+    def __init__(self, store: LetterStore, workers: Optional[int] = None):
+        self.store = store
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.RLock()
+        self._stats = {"submitted": 0, "cache_hits": 0, "rendered": 0, "failed": 0, "resubmitted": 0}
+
+    def url_for(self, kind: str, key: str) -> str:
+        return f"/letters/{kind}/{key}.pdf"
+
+    def submit(self, kind: str, fields: Dict[str, Any]) -> str:
+        key = letter_key(kind, fields)
+        with self._lock:
+            self._stats["submitted"] += 1
+            if (kind, key) in self._pending or self.store.exists(kind, key):
+                self._stats["cache_hits"] += 1
+                return key
+            if self.workers:
+                # Resolved once the PDF is on disk, not merely rendered
+                stored = Future()
+                self._pending[(kind, key)] = stored
+                self._render_in_pool(kind, key, fields, stored)
+                return key
+        self._write(kind, key, render_pdf(kind, fields))
+        return key
+
+    def path(self, kind: str, key: str, timeout: Optional[float] = 30.0) -> Optional[str]:
+        """Path of a rendered letter, waiting up to `timeout` seconds if it is still rendering."""
+        with self._lock:
+            future = self._pending.get((kind, key))
+        if future is not None and future.exception(timeout) is not None:
+            return None
+        return self.store.path(kind, key) if self.store.exists(kind, key) else None
+
+    def render_batch(self, jobs: Iterable[Tuple[str, Dict[str, Any]]], chunksize: int = 16) -> List[str]:
+        """Render many letters in parallel (month-end regeneration); returns their keys in order."""
+        keys, todo, seen = [], [], set()
+        for kind, fields in jobs:
+            key = letter_key(kind, fields)
+            keys.append(key)
+            if (kind, key) in seen or self.store.exists(kind, key):
+                self._count("cache_hits")
+                continue
+            seen.add((kind, key))
+            todo.append((kind, key, fields))
+
+        jobs_to_render = [(kind, fields) for kind, _, fields in todo]
+        if self.workers == 0:
+            rendered = map(_render_job, jobs_to_render)
+        else:
+            rendered = self._pool().map(_render_job, jobs_to_render, chunksize=chunksize)
+        for (kind, key, _), data in zip(todo, rendered):
+            self._write(kind, key, data)
+        return keys
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["workers"] = self.workers
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: the API process runs other threads (log sink, bcrypt pool) that must not be forked
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _render_in_pool(self, kind: str, key: str, fields: Dict[str, Any], stored: Future, retry: bool = True):
+        with self._lock:
+            executor = self._pool()
+            try:
+                future = executor.submit(render_pdf, kind, fields)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool
+                self._discard_pool(executor)
+                executor = self._pool()
+                future = executor.submit(render_pdf, kind, fields)
+        future.add_done_callback(lambda done: self._store_result(kind, key, fields, executor, done, stored, retry))
+
+    def _discard_pool(self, executor: ProcessPoolExecutor):
+        # Every render pending on a broken pool fails at once; only the first replaces it
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False)
+
+    def _store_result(self, kind: str, key: str, fields: Dict[str, Any], executor: ProcessPoolExecutor,
+                      future: Future, stored: Future, retry: bool):
+        if retry and isinstance(future.exception(), BrokenProcessPool):
+            # The worker died mid-render, possibly because of another job: render once more on a fresh pool
+            self._discard_pool(executor)
+            self._count("resubmitted")
+            self._render_in_pool(kind, key, fields, stored, retry=False)
+            return
+        try:
+            self._write(kind, key, future.result())
+            stored.set_result(None)
+        except Exception as e:
+            logger.exception("Rendering %s letter %s failed", kind, key)
+            self._count("failed")
+            stored.set_exception(e)
+        finally:
+            with self._lock:
+                self._pending.pop((kind, key), None)
+
+    def _write(self, kind: str, key: str, data: bytes):
+        self.store.write(kind, key, data)
+        self._count("rendered")
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+_default_renderer: Optional[LetterRenderer] = None
+
+def get_default_letter_renderer() -> Optional[LetterRenderer]:
+    return _default_renderer
+
+def set_default_letter_renderer(renderer: Optional[LetterRenderer]):
+    global _default_renderer
+    _default_renderer = renderer
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Regenerate sanction and rejection letters for decided applicants")
+    parser.add_argument("--storage-dir", default=os.getenv("LETTER_STORAGE_DIR", "./letters"))
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count, 0 = inline)")
+    parser.add_argument("--since", type=lambda value: datetime.strptime(value, "%Y-%m-%d"), default=None,
+                        help="Only applicants updated on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--chunksize", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import func
+    from main import SessionLocal
+    from models import Applicant, StatusEnum
+
+    kinds = {StatusEnum.APPROVED: SANCTION, StatusEnum.REJECTED: REJECTION}
+    db = SessionLocal()
+    try:
+        query = db.query(Applicant).filter(Applicant.status.in_(list(kinds)))
+        if args.since is not None:
+            query = query.filter(func.coalesce(Applicant.updated_at, Applicant.created_at) >= args.since)
+        jobs = []
+        for applicant in query.yield_per(1000):
+            kind = kinds[applicant.status]
+            jobs.append((kind, FIELD_BUILDERS[kind](applicant)))
+    finally:
+        db.close()
+
+    renderer = LetterRenderer(LetterStore(args.storage_dir), args.workers)
+    try:
+        renderer.render_batch(jobs, chunksize=args.chunksize)
+    finally:
+        renderer.shutdown()
+    print(f"{len(jobs)} letters: {renderer.metrics()}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
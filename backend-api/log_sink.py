@@ -0,0 +1,227 @@
+from sqlalchemy import insert
+from models import AgentLog
+from agent_log_storage import compact_rows
+from datetime import datetime
+import threading
+import logging
+import queue
+import time
+import json
+import os
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP = "drop"
+OVERFLOW_SPILL = "spill"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP, OVERFLOW_SPILL)
+
+_STOP = object()
+
+def agent_log_row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(entry)
+    row["result"] = json.dumps(entry["result"])
+    return row
+
+class AgentLogSink:
+    """Buffers AgentLog entries in a bounded queue and bulk-inserts them from a
+    background thread once `batch_size` rows are waiting or `flush_interval`
+    seconds have passed."""
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow_policy: str = OVERFLOW_BLOCK,
+        spill_path: str = "./agent_logs.spill.ndjson",
+        synchronous: bool = False
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+        self.synchronous = synchronous
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_flush_latency_ms": 0.0,
+            "max_flush_latency_ms": 0.0,
+            "total_flush_latency_ms": 0.0
+        }
+
+    def start(self):
+        if self.synchronous or self._thread is not None:
+            return
+        self.replay_spill()
+        self._thread = threading.Thread(target=self._run, name="agent-log-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: Dict[str, Any]):
+        if self.synchronous:
+            self._write([entry])
+            return
+
+        try:
+            if self.overflow_policy == OVERFLOW_BLOCK:
+                self._queue.put(entry)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.overflow_policy == OVERFLOW_SPILL:
+                self._spill([entry])
+            else:
+                self._count("dropped")
+            return
+        self._count("enqueued")
+
+    def submit_many(self, entries: List[Dict[str, Any]]):
+        if self.synchronous:
+            self._write(entries)
+            return
+        for entry in entries:
+            self.submit(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far has been written."""
+        if self.synchronous or self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 10.0):
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total_latency = stats.pop("total_flush_latency_ms")
+        stats["avg_flush_latency_ms"] = total_latency / stats["flushes"] if stats["flushes"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["overflow_policy"] = self.overflow_policy
+        stats["synchronous"] = self.synchronous
+        return stats
+
+    def replay_spill(self):
+        """Insert rows left in the spill file by a previous overflow or failed flush."""
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return
+            replay_path = f"{self.spill_path}.replay"
+            os.replace(self.spill_path, replay_path)
+
+        entries = []
+        with open(replay_path) as spill_file:
+            for line in spill_file:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+                    entries.append(entry)
+        for i in range(0, len(entries), self.batch_size):
+            self._write(entries[i:i + self.batch_size])
+        os.remove(replay_path)
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                batch.extend(self._drain())
+                self._write(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                deadline = time.monotonic() + self.flush_interval
+                continue
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        entries = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return entries
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                entries.append(item)
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        if not entries:
+            return
+        start_time = time.perf_counter()
+        db = self.session_factory()
+        try:
+            rows = [agent_log_row(entry) for entry in entries]
+            db.execute(insert(AgentLog), compact_rows(db.connection(), rows))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to write %d agent log rows", len(entries))
+            self._count("failed", len(entries))
+            self._spill(entries)
+            return
+        finally:
+            db.close()
+
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        with self._stats_lock:
+            self._stats["written"] += len(entries)
+            self._stats["flushes"] += 1
+            self._stats["last_flush_latency_ms"] = latency_ms
+            self._stats["max_flush_latency_ms"] = max(self._stats["max_flush_latency_ms"], latency_ms)
+            self._stats["total_flush_latency_ms"] += latency_ms
+
+    def _spill(self, entries: List[Dict[str, Any]]):
+        with self._spill_lock:
+            with open(self.spill_path, "a") as spill_file:
+                for entry in entries:
+                    spill_file.write(json.dumps(entry, default=str) + "\n")
+        self._count("spilled", len(entries))
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+_default_sink: Optional[AgentLogSink] = None
+
+def get_default_log_sink() -> Optional[AgentLogSink]:
+    return _default_sink
+
+def set_default_log_sink(sink: Optional[AgentLogSink]):
+    global _default_sink
+    _default_sink = sink
@@ -1,17 +1,60 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Header
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, Enum, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
-from pydantic import BaseModel
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+from datetime import date, datetime, timedelta
+from dataclasses import asdict
 import uuid
+import hashlib
 import json
-from typing import Optional, List
-from enum import Enum as PyEnum
+import os
+import re
+import logging
+import time
+from typing import Any, Dict, Optional, List
+from models import Base, Applicant, Document, User, StatusEnum, DocumentTypeEnum, EvaluationJob
+from table_export import EXPORT_TABLES, FORMATS as EXPORT_FORMATS, DEFAULT_CHUNK_SIZE as EXPORT_CHUNK_SIZE, ExportError, TableExport
+from applicant_import import (
+    EVALUATE_MODES, EVALUATE_QUEUE, FORMATS as IMPORT_FORMATS, DEFAULT_CHUNK_SIZE as IMPORT_CHUNK_SIZE,
+    DEFAULT_MAX_ERRORS as IMPORT_MAX_ERRORS, ImportFileError, detect_format, import_applicants
+)
+from applicant_queries import (
+    filtered_applicants, keyset_page, stream_ndjson, InvalidCursor,
+    keyset_select, page_from_rows, newest_first, ndjson_chunk,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DEFAULT_STREAM_CHUNK_SIZE
+)
+from database import create_db_engine, database_url_from_env, profile_from_env
+from migrations import upgrade_schema
+from sample_data import init_sample_data
+from async_database import configure_async_database, dispose_async_database, get_async_db, write_slot
+from rollups import read_report, read_daily_report, ensure_rollups
+from token_cache import token_cache
+from applicant_cache import Snapshot, applicant_cache, etag_matches
+from password_hashing import BCRYPT_ROUNDS, PasswordVerifier, PasswordVerifierBusy, get_pwd_context
+from log_sink import AgentLogSink, get_default_log_sink, set_default_log_sink
+from document_storage import DocumentStore, DocumentTooLarge, storage_url
+from extraction import DocumentExtractor, STATUS_PENDING as EXTRACTION_PENDING, get_default_extractor, set_default_extractor
+from idempotency import (
+    IdempotencyStore, IdempotencyKeyMismatch, IdempotencyKeyInProgress, Claim,
+    request_fingerprint, MAX_KEY_LENGTH
+)
+from scoring_policy import ScoringPolicyError, current_policy, get_default_policy_store
+from admission import AdmissionMiddleware, controller_from_env
+from metrics import AGENT_ACTION_SECONDS, CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, registry
+from profiling import EvaluationProfiler, get_default_profiler, set_default_profiler, profile_evaluation
+from letters import TEMPLATES, LetterRenderer, LetterStore, get_default_letter_renderer, set_default_letter_renderer
+from evaluation_jobs import (
+    EvaluationWorkerPool, enqueue_evaluation, latest_job, job_summary, queue_depth, settings_from_env,
+    get_default_job_pool, set_default_job_pool
+)
+
+logger = logging.getLogger(__name__)
 
 # FastAPI app
 app = FastAPI(
@@ -20,6 +63,12 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Admission control: per-client token buckets on /public/ (RATE_LIMIT_*, off by default) and an
+# in-flight cap that sheds with 503, keeping ADMISSION_ADMIN_RESERVED slots for /admin/ requests
+# whose bearer token verifies (resolved at request time, after verified_claims is defined)
+admission_controller = controller_from_env(admin_check=lambda token: verified_claims(token) is not None)
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,71 +77,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database setup (SQLite as H2 alternative)
-DATABASE_URL = "sqlite:///./nbfc_loan.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# "full" creates or upgrades the schema on import and seeds sample data on startup. "fast" (production)
+# does neither and benchmarks bcrypt in the background; run `python migrations.py` on deploy instead
+STARTUP_MODE = os.getenv("STARTUP_MODE", "full")
+FAST_STARTUP = STARTUP_MODE == "fast"
+
+# Database setup (SQLite as H2 alternative); DB_PROFILE and the SQLITE_*/DB_POOL_* variables tune the engine
+DATABASE_URL = database_url_from_env()
+DB_ENGINE_PROFILE = profile_from_env()
+engine = create_db_engine(DATABASE_URL, DB_ENGINE_PROFILE)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
 
-# Security
-SECRET_KEY = "nbfc-secret-key-2024"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-security = HTTPBearer()
+# Latency histograms for HTTP routes and DB round-trips, served at /metrics (agent actions are always timed)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
 
-# Enums
-class StatusEnum(PyEnum):
-    EVALUATING = "evaluating"
-    APPROVED = "approved"
-    REJECTED = "rejected"
+# "sync" serves the hot endpoints with blocking sessions on the threadpool, "async" with AsyncSession
+DB_MODE = os.getenv("DB_MODE", "sync")
 
-class RoleEnum(PyEnum):
-    ADMIN = "admin"
-    OFFICER = "officer"
-    UNDERWRITER = "underwriter"
+# Agent audit log sink: "direct" commits each AgentLog row, "async" batches them
+# on a background thread, "sync" uses the sink inline (tests)
+AGENT_LOG_SINK_MODE = os.getenv("AGENT_LOG_SINK_MODE", "direct")
 
-# Database Models
-class Applicant(Base):
-    __tablename__ = "applicants"
-    
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String, nullable=False)
-    income = Column(Float, nullable=False)
-    requested_amount = Column(Float, nullable=False)
-    credit_score = Column(Integer, default=650)
-    eligibility_score = Column(Float, default=0.0)
-    status = Column(Enum(StatusEnum), default=StatusEnum.EVALUATING)
-    reason_summary = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    documents = relationship("Document", back_populates="applicant")
+# Sanction/rejection letter PDFs: render processes (0 = inline) and content-addressed storage root
+LETTER_RENDER_WORKERS = int(os.getenv("LETTER_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+LETTER_STORAGE_DIR = os.getenv("LETTER_STORAGE_DIR", "./letters")
+LETTER_KEY = re.compile(r"^[0-9a-f]{64}$")
 
-class Document(Base):
-    __tablename__ = "documents"
-    
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    applicant_id = Column(String, ForeignKey("applicants.id"))
-    type = Column(String, nullable=False)
-    storage_url = Column(String)
-    ocr_data = Column(Text)
-    confidence = Column(Float, default=0.0)
-    
-    applicant = relationship("Applicant", back_populates="documents")
+# Uploaded documents: content-addressed storage root, streaming chunk size and per-file limit
+document_store = DocumentStore(
+    os.getenv("DOCUMENT_STORAGE_DIR", "./uploads"),
+    chunk_size=int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024))),
+    max_bytes=int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+)
+# Idempotency-Key support: how long stored responses are replayed and how long duplicates wait
+idempotency_store = IdempotencyStore(
+    SessionLocal,
+    ttl=timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))),
+    wait_timeout=float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+)
+# Document text extraction processes (0 = inline in the upload request)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(2, os.cpu_count() or 1))))
 
-class User(Base):
-    __tablename__ = "users"
-    
-    email = Column(String, primary_key=True)
-    password = Column(String, nullable=False)
-    role = Column(Enum(RoleEnum), default=RoleEnum.OFFICER)
-    last_login = Column(DateTime)
+# Queued evaluations (POST /master/evaluate?queue=true): worker threads in this process
+# (0 = leave the queue to `python evaluation_jobs.py worker` processes); EVALUATION_JOB_* tune retries
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "2"))
+EVALUATION_JOB_SETTINGS = settings_from_env()
+
+# Sampled cProfile dumps of slow evaluations; also switchable at runtime via /admin/profiling
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+
+# Security
+SECRET_KEY = "nbfc-secret-key-2024"
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+password_verifier = PasswordVerifier(
+    get_pwd_context,
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "4")),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", "16")),
+    timeout=float(os.getenv("PASSWORD_VERIFY_TIMEOUT", "10"))
+)
+security = HTTPBearer()
 
 # Pydantic Models
 class EligibilityRequest(BaseModel):
     name: str
-    income: float
-    requested_amount: float
+    # Both divide into the loan-to-income ratio; a zero row could never be scored
+    income: float = Field(gt=0)
+    requested_amount: float = Field(gt=0)
     credit_score: Optional[int] = 650
 
 class EligibilityResponse(BaseModel):
@@ -120,6 +175,47 @@ class ApplicantResponse(BaseModel):
     reason_summary: Optional[str]
     created_at: datetime
 
+class DocumentResponse(BaseModel):
+    id: str
+    type: str
+    storage_url: Optional[str]
+    filename: Optional[str]
+    size_bytes: Optional[int]
+    ocr_status: Optional[str]
+    ocr_data: Optional[dict]
+    confidence: Optional[float]
+    verified: Optional[bool]
+    uploaded_at: Optional[datetime]  # NULL on documents from databases upgraded before the backfill
+
+class ApplicantPage(BaseModel):
+    items: List[ApplicantResponse]
+    next_cursor: Optional[str]
+    limit: int
+
+class BatchEvaluationRequest(BaseModel):
+    applicant_ids: Optional[List[str]] = None
+    statuses: Optional[List[str]] = None
+    chunk_size: Optional[int] = None  # default: batch_underwriting.DEFAULT_CHUNK_SIZE
+
+class ProfilingSettings(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = None
+    threshold_ms: Optional[float] = None
+
+class AdmissionLimits(BaseModel):
+    rate: Optional[float] = None
+    burst: Optional[int] = None
+    max_in_flight: Optional[int] = None
+    admin_reserved: Optional[int] = None
+
+class BatchEvaluationResponse(BaseModel):
+    evaluated: int
+    approved: int
+    rejected: int
+    skipped: int
+    policy_version: str
+    execution_time: float
+
 class ReportsResponse(BaseModel):
     total_applicants: int
     approved: int
@@ -128,8 +224,13 @@ class ReportsResponse(BaseModel):
     avg_credit_score: float
     avg_eligibility_score: float
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+class DailyReportResponse(ReportsResponse):
+    day: date
+    pending_documents: int
+
+# Create tables and upgrade databases created by older schemas
+if not FAST_STARTUP:
+    upgrade_schema(engine)
 
 # Dependency
 def get_db():
@@ -141,10 +242,10 @@ def get_db():
 
 # Auth functions
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -152,19 +253,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti keeps tokens issued in the same second distinct, so revoking one leaves the others valid
+    # iat keeps sub-second precision (a NumericDate may be fractional): a subject revocation must also
+    # reject tokens issued earlier in the same second
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": str(uuid.uuid4())})
+    from jose import jwt  # loads the cryptography backends; deferred to the first token
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return email
-    except JWTError:
+def verified_claims(token: str) -> Optional[Dict[str, Any]]:
+    """The token's claims if it is valid and not revoked, else None. Cached after the first decode."""
+    payload = token_cache.get(token)
+    if payload is None:
+        from jose import JWTError, jwt
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        if payload.get("sub") is None or not token_cache.put(token, payload):
+            return None
+    return payload
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = verified_claims(credentials.credentials)
+    if payload is None:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload["sub"]
 
 # AI Agent Services
 class MasterAgent:
@@ -174,12 +288,17 @@ class MasterAgent:
         self.underwriting_agent = UnderwritingAgent(db)
     
     def evaluate(self, applicant_id: str):
+        with profile_evaluation("evaluate", applicant_id), AGENT_ACTION_SECONDS.time("MasterAgent", "evaluate"):
+            return self._evaluate(applicant_id)
+    
+    def _evaluate(self, applicant_id: str):
         applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
         if not applicant:
             raise HTTPException(status_code=404, detail="Applicant not found")
         
         # Step 1: Verification
-        verified = self.verification_agent.verify(applicant_id)
+        with AGENT_ACTION_SECONDS.time("VerificationAgent", "verify"):
+            verified = self.verification_agent.verify(applicant_id)
         if not verified:
             applicant.status = StatusEnum.REJECTED
             applicant.reason_summary = "KYC verification failed"
@@ -187,7 +306,8 @@ class MasterAgent:
             return applicant
         
         # Step 2: Underwriting
-        result = self.underwriting_agent.evaluate(applicant_id)
+        with AGENT_ACTION_SECONDS.time("UnderwritingAgent", "evaluate"):
+            result = self.underwriting_agent.evaluate(applicant_id)
         return result
 
 class VerificationAgent:
@@ -206,92 +326,188 @@ class UnderwritingAgent:
     def evaluate(self, applicant_id: str):
         applicant = self.db.query(Applicant).filter(Applicant.id == applicant_id).first()
         
-        # AI Decision Logic
-        credit_score = applicant.credit_score
-        income = applicant.income
-        requested_amount = applicant.requested_amount
+        # Same versioned policy as agents.UnderwritingAgent and the batch engine
+        policy = current_policy()
+        result = policy.evaluate(applicant.income, applicant.credit_score,
+                                 applicant.requested_amount, applicant.employment_type)
         
-        # Calculate eligibility score
-        score = 0
-        income_ratio = requested_amount / (income * 12)
+        applicant.eligibility_score = result["eligibility_score"]
+        applicant.status = StatusEnum.APPROVED if result["status"] == "approved" else StatusEnum.REJECTED
+        applicant.reason_summary = result["reason"]
+        applicant.policy_version = policy.version
         
-        if income_ratio <= 3:
-            score += 40
-        elif income_ratio <= 5:
-            score += 30
-        else:
-            score += 10
+        self.db.commit()
+        return applicant
+
+# Async counterparts for DB_MODE=async: the same steps and policy, awaiting the AsyncSession
+class AsyncMasterAgent:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.verification_agent = AsyncVerificationAgent(db)
+        self.underwriting_agent = AsyncUnderwritingAgent(db)
+    
+    async def evaluate(self, applicant_id: str):
+        with AGENT_ACTION_SECONDS.time("MasterAgent", "evaluate"):
+            return await self._evaluate(applicant_id)
+    
+    async def _evaluate(self, applicant_id: str):
+        applicant = await self.db.get(Applicant, applicant_id)
+        if not applicant:
+            raise HTTPException(status_code=404, detail="Applicant not found")
         
-        if credit_score >= 750:
-            score += 35
-        elif credit_score >= 700:
-            score += 25
-        elif credit_score >= 650:
-            score += 15
-        else:
-            score += 5
+        with AGENT_ACTION_SECONDS.time("VerificationAgent", "verify"):
+            verified = await self.verification_agent.verify(applicant_id)
+        if not verified:
+            applicant.status = StatusEnum.REJECTED
+            applicant.reason_summary = "KYC verification failed"
+            await self.db.commit()
+            return applicant
         
-        score += min(20, income / 10000)  # Income factor
+        with AGENT_ACTION_SECONDS.time("UnderwritingAgent", "evaluate"):
+            result = await self.underwriting_agent.evaluate(applicant_id)
+        return result
+
+class AsyncVerificationAgent:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def verify(self, applicant_id: str) -> bool:
+        applicant = await self.db.get(Applicant, applicant_id)
+        return applicant and applicant.name and applicant.income > 0
+
+class AsyncUnderwritingAgent:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def evaluate(self, applicant_id: str):
+        applicant = await self.db.get(Applicant, applicant_id)
         
-        applicant.eligibility_score = min(100, score)
+        policy = current_policy()
+        result = policy.evaluate(applicant.income, applicant.credit_score,
+                                 applicant.requested_amount, applicant.employment_type)
         
-        # Decision logic
-        if credit_score < 700:
-            applicant.status = StatusEnum.REJECTED
-            applicant.reason_summary = f"Credit score {credit_score} below minimum threshold"
-        elif income_ratio > 8:
-            applicant.status = StatusEnum.REJECTED
-            applicant.reason_summary = "Requested amount too high relative to income"
-        elif applicant.eligibility_score >= 70:
-            applicant.status = StatusEnum.APPROVED
-            applicant.reason_summary = "Application approved based on strong financial profile"
-        else:
-            applicant.status = StatusEnum.REJECTED
-            applicant.reason_summary = f"Eligibility score {applicant.eligibility_score:.1f}% below approval threshold"
+        # float() as the row would read back: the session does not expire attributes on commit
+        applicant.eligibility_score = float(result["eligibility_score"])
+        applicant.status = StatusEnum.APPROVED if result["status"] == "approved" else StatusEnum.REJECTED
+        applicant.reason_summary = result["reason"]
+        applicant.policy_version = policy.version
         
-        self.db.commit()
+        await self.db.commit()
         return applicant
 
-# Initialize sample data
-def init_sample_data(db: Session):
-    # Create admin user
-    admin_exists = db.query(User).filter(User.email == "admin@nbfc.com").first()
-    if not admin_exists:
-        admin_user = User(
-            email="admin@nbfc.com",
-            password=get_password_hash("admin123"),
-            role=RoleEnum.ADMIN
-        )
-        db.add(admin_user)
-    
-    # Create sample applicants
-    sample_applicants = [
-        {"name": "Rajesh Kumar", "income": 75000, "requested_amount": 500000, "credit_score": 750},
-        {"name": "Priya Sharma", "income": 45000, "requested_amount": 300000, "credit_score": 680},
-        {"name": "Amit Patel", "income": 55000, "requested_amount": 800000, "credit_score": 620},
-        {"name": "Sneha Reddy", "income": 65000, "requested_amount": 400000, "credit_score": 720},
-        {"name": "Vikram Singh", "income": 85000, "requested_amount": 600000, "credit_score": 780},
-    ]
-    
-    for data in sample_applicants:
-        exists = db.query(Applicant).filter(Applicant.name == data["name"]).first()
-        if not exists:
-            applicant = Applicant(**data)
-            db.add(applicant)
-    
-    db.commit()
+def evaluation_response(applicant: Applicant) -> dict:
+    return {
+        "applicant_id": applicant.id,
+        "status": applicant.status.value,
+        "eligibility_score": applicant.eligibility_score,
+        "reason": applicant.reason_summary,
+        "policy_version": applicant.policy_version
+    }
+
+def run_master_evaluation(db: Session, applicant_id: str) -> dict:
+    """The /master/evaluate pipeline, shared by the synchronous endpoint and the job queue workers"""
+    return evaluation_response(MasterAgent(db).evaluate(applicant_id))
 
 # API Endpoints
+def configure_log_sink():
+    if AGENT_LOG_SINK_MODE == "direct":
+        return
+    sink = AgentLogSink(
+        SessionLocal,
+        max_queue_size=int(os.getenv("AGENT_LOG_QUEUE_SIZE", "10000")),
+        batch_size=int(os.getenv("AGENT_LOG_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("AGENT_LOG_FLUSH_INTERVAL", "1.0")),
+        overflow_policy=os.getenv("AGENT_LOG_OVERFLOW", "block"),
+        spill_path=os.getenv("AGENT_LOG_SPILL_PATH", "./agent_logs.spill.ndjson"),
+        synchronous=AGENT_LOG_SINK_MODE == "sync"
+    )
+    sink.start()
+    set_default_log_sink(sink)
+
+def configure_extractor():
+    set_default_extractor(DocumentExtractor(SessionLocal, document_store.path, EXTRACTION_WORKERS))
+
+def configure_job_pool():
+    pool = EvaluationWorkerPool(SessionLocal, run_master_evaluation, EVALUATION_WORKERS, **EVALUATION_JOB_SETTINGS)
+    pool.start()
+    set_default_job_pool(pool)
+
+def configure_profiler():
+    set_default_profiler(EvaluationProfiler(
+        PROFILE_DIR,
+        enabled=os.getenv("PROFILE_EVALUATIONS", "0") == "1",
+        sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0.01")),
+        threshold_ms=float(os.getenv("PROFILE_THRESHOLD_MS", "500")),
+        max_dumps=int(os.getenv("PROFILE_MAX_DUMPS", "50"))
+    ))
+
+def _component_metrics(getter):
+    return lambda: getter().metrics() if getter() is not None else None
+
+registry.register_component("agent_log_sink", _component_metrics(get_default_log_sink))
+registry.register_component("letters", _component_metrics(get_default_letter_renderer))
+registry.register_component("extraction", _component_metrics(get_default_extractor))
+registry.register_component("idempotency", idempotency_store.metrics)
+registry.register_component("token_cache", token_cache.metrics)
+registry.register_component("applicant_cache", applicant_cache.metrics)
+registry.register_component("password_verifier", password_verifier.metrics)
+registry.register_component("admission", admission_controller.metrics)
+registry.register_component("scoring_policy", _component_metrics(get_default_policy_store))
+registry.register_component("evaluation_jobs", _component_metrics(get_default_job_pool))
+registry.register_component("profiler", lambda: get_default_profiler().settings() if get_default_profiler() else None)
+
+def configure_letter_renderer():
+    set_default_letter_renderer(LetterRenderer(LetterStore(LETTER_STORAGE_DIR), LETTER_RENDER_WORKERS))
+
 @app.on_event("startup")
 def startup_event():
-    db = SessionLocal()
-    init_sample_data(db)
-    db.close()
+    if FAST_STARTUP:
+        password_verifier.benchmark_in_background().add_done_callback(
+            lambda future: logger.info("bcrypt cost %d: %.1f ms per hash", BCRYPT_ROUNDS, future.result())
+        )
+    else:
+        hash_ms = password_verifier.benchmark()
+        logger.info("bcrypt cost %d: %.1f ms per hash", BCRYPT_ROUNDS, hash_ms)
+        db = SessionLocal()
+        init_sample_data(db)
+        ensure_rollups(db)
+        db.close()
+    configure_log_sink()
+    configure_letter_renderer()
+    configure_extractor()
+    configure_profiler()
+    configure_job_pool()
+    logger.info("Scoring policy %s", current_policy().version)
+    if DB_MODE == "async":
+        async_engine = configure_async_database(os.getenv("ASYNC_DATABASE_URL", DATABASE_URL), DB_ENGINE_PROFILE)
+        if METRICS_ENABLED:
+            instrument_engine(async_engine.sync_engine, "async")
 
-@app.post("/public/check-eligibility", response_model=EligibilityResponse)
-def check_eligibility(request: EligibilityRequest, db: Session = Depends(get_db)):
-    """Public endpoint for instant eligibility check"""
-    
+@app.on_event("shutdown")
+async def shutdown_event():
+    password_verifier.shutdown()
+    if DB_MODE == "async":
+        await dispose_async_database()
+    sink = get_default_log_sink()
+    if sink is not None:
+        sink.shutdown()
+        set_default_log_sink(None)
+    renderer = get_default_letter_renderer()
+    if renderer is not None:
+        renderer.shutdown()
+        set_default_letter_renderer(None)
+    extractor = get_default_extractor()
+    if extractor is not None:
+        extractor.shutdown()
+        set_default_extractor(None)
+    set_default_profiler(None)
+    idempotency_store.shutdown()
+    pool = get_default_job_pool()
+    if pool is not None:
+        pool.shutdown()
+        set_default_job_pool(None)
+
+def evaluate_new_applicant(request: EligibilityRequest, db: Session) -> EligibilityResponse:
     # Create applicant record
     applicant = Applicant(
         name=request.name,
@@ -314,36 +530,161 @@ def check_eligibility(request: EligibilityRequest, db: Session = Depends(get_db)
         applicant_id=result.id
     )
 
+def claim_idempotency_key(key: str, endpoint: str, payload: dict) -> Claim:
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+    try:
+        return idempotency_store.begin(key, endpoint, request_fingerprint(payload))
+    except IdempotencyKeyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    except IdempotencyKeyInProgress:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress",
+                            headers={"Retry-After": "1"})
+
+def replayed_response(claim: Claim) -> JSONResponse:
+    return JSONResponse(claim.response, status_code=claim.status_code, headers={"Idempotent-Replayed": "true"})
+
+@app.post("/public/check-eligibility", response_model=EligibilityResponse)
+def check_eligibility(
+    request: EligibilityRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Public endpoint for instant eligibility check"""
+    if idempotency_key is None:
+        return evaluate_new_applicant(request, db)
+    
+    # Retries and double submits with the same key get the first response instead of a new applicant
+    claim = claim_idempotency_key(idempotency_key, "check-eligibility", request.model_dump())
+    if claim.is_replay:
+        return replayed_response(claim)
+    try:
+        response = evaluate_new_applicant(request, db)
+    except Exception:
+        idempotency_store.abandon(claim)
+        raise
+    idempotency_store.complete(claim, response.model_dump())
+    return response
+
 @app.post("/admin/login", response_model=Token)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """Admin login with JWT token"""
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == request.email).first())
+    
+    # bcrypt runs on its own bounded pool; when that pool is saturated fail fast instead of queueing
+    try:
+        valid, new_hash = await password_verifier.verify_and_update(request.password, user.password if user else None)
+    except PasswordVerifierBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent logins, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    if not user or not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="User is deactivated")
     
-    user.last_login = datetime.utcnow()
-    db.commit()
+    claims = {"sub": user.email, "role": user.role.value}
+    
+    def record_login():
+        if new_hash:
+            user.password = new_hash
+        user.last_login = datetime.utcnow()
+        db.commit()
+    
+    await run_in_threadpool(record_login)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value}, 
+        data=claims, 
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.get("/admin/applicants", response_model=List[ApplicantResponse])
-def get_applicants(db: Session = Depends(get_db), current_user: str = Depends(verify_token)):
-    """Get all applicants"""
-    applicants = db.query(Applicant).all()
-    return applicants
+@app.post("/admin/logout")
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: str = Depends(verify_token)
+):
+    """Revoke the bearer token"""
+    claims = token_cache.get(credentials.credentials) or {}
+    token_cache.revoke_token(credentials.credentials, claims.get("exp"))
+    return {"message": "Logged out"}
+
+class ApplicantListParams:
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        min_credit_score: Optional[int] = None,
+        max_credit_score: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+        chunk_size: int = Query(DEFAULT_STREAM_CHUNK_SIZE, ge=1, le=10000)
+    ):
+        try:
+            status_filter = StatusEnum(status) if status else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+        self.stmt = filtered_applicants(status_filter, min_credit_score, max_credit_score, created_from, created_to)
+        self.limit = limit
+        self.cursor = cursor
+        self.format = format
+        self.chunk_size = chunk_size
 
-@app.get("/admin/applicant/{applicant_id}", response_model=ApplicantResponse)
-def get_applicant(applicant_id: str, db: Session = Depends(get_db), current_user: str = Depends(verify_token)):
-    """Get specific applicant details"""
+@app.get("/admin/applicants", response_model=ApplicantPage)
+def get_applicants(
+    params: ApplicantListParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: str = Depends(verify_token)
+):
+    """List applicants newest first, keyset-paginated on (created_at, id) or streamed as NDJSON"""
+    if params.format == "ndjson":
+        return StreamingResponse(stream_ndjson(db, params.stmt, params.chunk_size), media_type="application/x-ndjson")
+    
+    try:
+        items, next_cursor = keyset_page(db, params.stmt, params.limit, params.cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ApplicantPage(
+        items=[ApplicantResponse(**row._asdict()) for row in items],
+        next_cursor=next_cursor,
+        limit=params.limit
+    )
+
+def render_snapshot(content, *version) -> Snapshot:
+    """Serialize once for the applicant cache; the strong ETag hashes what the body was built from."""
+    etag = '"%s"' % hashlib.blake2b(repr(version).encode(), digest_size=12).hexdigest()
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return Snapshot(etag, body.encode("utf-8"))
+
+def snapshot_response(snapshot: Optional[Snapshot], if_none_match: Optional[str]) -> Response:
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Applicant not found")
+    if etag_matches(if_none_match, snapshot.etag):
+        applicant_cache.count_not_modified()
+        return Response(status_code=304, headers={"ETag": snapshot.etag})
+    return Response(snapshot.body, media_type="application/json", headers={"ETag": snapshot.etag, "Cache-Control": "no-cache"})
+
+def applicant_snapshot(db: Session, applicant_id: str) -> Optional[Snapshot]:
     applicant = db.query(Applicant).filter(Applicant.id == applicant_id).first()
     if not applicant:
-        raise HTTPException(status_code=404, detail="Applicant not found")
-    return applicant
+        return None
+    return render_snapshot(ApplicantResponse.model_validate(applicant, from_attributes=True), applicant.id, applicant.updated_at)
+
+@app.get("/admin/applicant/{applicant_id}", response_model=ApplicantResponse)
+def get_applicant(
+    applicant_id: str,
+    db: Session = Depends(get_db),
+    current_user: str = Depends(verify_token),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get specific applicant details; If-None-Match with the last ETag returns 304"""
+    snapshot = applicant_cache.get_or_load(("applicant", applicant_id), lambda: applicant_snapshot(db, applicant_id))
+    return snapshot_response(snapshot, if_none_match)
 
 @app.post("/admin/applicant/{applicant_id}/upload")
 def upload_document(
@@ -358,69 +699,320 @@ def upload_document(
     if not applicant:
         raise HTTPException(status_code=404, detail="Applicant not found")
     
+    try:
+        document_type = DocumentTypeEnum(doc_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unsupported document type: {doc_type}")
+    
+    if file.size is not None and file.size > document_store.max_bytes:
+        raise HTTPException(status_code=413, detail=f"Document exceeds the {document_store.max_bytes} byte limit")
+    try:
+        stored = document_store.save(file.file)
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
     # Save document record
     document = Document(
         applicant_id=applicant_id,
-        type=doc_type,
-        storage_url=f"/uploads/{file.filename}",
-        ocr_data=json.dumps({"filename": file.filename, "size": file.size}),
-        confidence=0.95
+        type=document_type,
+        storage_url=storage_url(stored.sha256),
+        content_hash=stored.sha256,
+        size_bytes=stored.size,
+        filename=file.filename,
+        content_type=file.content_type,
+        ocr_status=EXTRACTION_PENDING,
+        confidence=0.0
     )
     db.add(document)
     db.commit()
     
-    return {"message": "Document uploaded successfully", "document_id": document.id}
-
-@app.post("/master/evaluate")
-def master_evaluate(applicant_id: str, db: Session = Depends(get_db)):
-    """Master Agent evaluation endpoint"""
-    master_agent = MasterAgent(db)
-    result = master_agent.evaluate(applicant_id)
+    # ocr_data, confidence and verified are filled in by the extraction pool
+    extractor = get_default_extractor()
+    if extractor is not None:
+        extractor.submit(document.id, stored.sha256, document_type)
+    
     return {
-        "applicant_id": result.id,
-        "status": result.status.value,
-        "eligibility_score": result.eligibility_score,
-        "reason": result.reason_summary
+        "message": "Document uploaded successfully",
+        "document_id": document.id,
+        "sha256": stored.sha256,
+        "size": stored.size,
+        "deduplicated": stored.deduplicated,
+        "ocr_status": document.ocr_status
     }
 
-@app.get("/master/status/{applicant_id}")
-def get_status(applicant_id: str, db: Session = Depends(get_db)):
-    """Get evaluation status"""
-    applicant = db.query(Applicant).filter(Applicant.id == applicant_id).first()
-    if not applicant:
+@app.get("/admin/applicant/{applicant_id}/documents", response_model=List[DocumentResponse])
+def get_applicant_documents(applicant_id: str, db: Session = Depends(get_db), current_user: str = Depends(verify_token)):
+    """Uploaded documents of an applicant with their extraction results"""
+    documents = db.query(Document).filter(Document.applicant_id == applicant_id).order_by(Document.uploaded_at).all()
+    return [
+        DocumentResponse(
+            id=document.id,
+            type=document.type.value,
+            storage_url=document.storage_url,
+            filename=document.filename,
+            size_bytes=document.size_bytes,
+            ocr_status=document.ocr_status,
+            ocr_data=json.loads(document.ocr_data) if document.ocr_data else None,
+            confidence=document.confidence,
+            verified=document.verified,
+            uploaded_at=document.uploaded_at
+        )
+        for document in documents
+    ]
+
+@app.get("/admin/documents/{sha256}")
+def download_document(sha256: str, db: Session = Depends(get_db), current_user: str = Depends(verify_token)):
+    """Download a stored document by content hash"""
+    document = db.query(Document).filter(Document.content_hash == sha256).first()
+    if document is None or not document_store.exists(sha256):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return FileResponse(
+        document_store.path(sha256),
+        media_type=document.content_type or "application/octet-stream",
+        filename=document.filename
+    )
+
+def queued_response(job: EvaluationJob, created: bool) -> JSONResponse:
+    if created:
+        pool = get_default_job_pool()
+        if pool is not None:
+            pool.notify()
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "applicant_id": job.applicant_id,
+        "status": job.status,
+        "status_url": f"/master/status/{job.applicant_id}"
+    })
+
+def enqueue_existing(db: Session, applicant_id: str):
+    if db.get(Applicant, applicant_id) is None:
         raise HTTPException(status_code=404, detail="Applicant not found")
-    
+    return enqueue_evaluation(db, applicant_id, EVALUATION_JOB_SETTINGS["max_attempts"])
+
+def status_response(applicant: Applicant, job: Optional[EvaluationJob]) -> dict:
     return {
         "applicant_id": applicant.id,
         "status": applicant.status.value,
         "eligibility_score": applicant.eligibility_score,
-        "reason": applicant.reason_summary
+        "reason": applicant.reason_summary,
+        "policy_version": applicant.policy_version,
+        "job": job_summary(job) if job is not None else None
     }
 
+def status_snapshot(db: Session, applicant_id: str) -> Optional[Snapshot]:
+    applicant = db.query(Applicant).filter(Applicant.id == applicant_id).first()
+    if not applicant:
+        return None
+    job = latest_job(db, applicant_id)
+    job_version = (job.id, job.status, job.attempts) if job is not None else None
+    return render_snapshot(status_response(applicant, job), applicant.id, applicant.updated_at, job_version)
+
+@app.post("/master/evaluate")
+def master_evaluate(applicant_id: str, queue: bool = False, db: Session = Depends(get_db)):
+    """Master Agent evaluation endpoint; with queue=true returns 202 and a job id to poll /master/status with"""
+    if queue:
+        return queued_response(*enqueue_existing(db, applicant_id))
+    return run_master_evaluation(db, applicant_id)
+
+@app.post("/master/evaluate-batch", response_model=BatchEvaluationResponse)
+def master_evaluate_batch(
+    request: BatchEvaluationRequest,
+    db: Session = Depends(get_db),
+    current_user: str = Depends(verify_token)
+):
+    """Vectorized underwriting re-score of pending (or selected) applicants"""
+    if request.chunk_size is not None and request.chunk_size <= 0:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    try:
+        statuses = [StatusEnum(s) for s in request.statuses] if request.statuses else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    from batch_underwriting import evaluate_batch, DEFAULT_CHUNK_SIZE  # numpy, loaded on first use
+    summary = evaluate_batch(db, request.applicant_ids, statuses, request.chunk_size or DEFAULT_CHUNK_SIZE)
+    return BatchEvaluationResponse(**summary)
+
+@app.post("/admin/applicants/import")
+def import_applicants_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson; default from the file name or content type"),
+    evaluate: Optional[str] = Query(None, description="batch: score imported rows now, queue: enqueue evaluation jobs"),
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=50000),
+    max_errors: int = Query(IMPORT_MAX_ERRORS, ge=0, le=100000),
+    db: Session = Depends(get_db),
+    current_user: str = Depends(verify_token)
+):
+    """Bulk import applicants from a CSV or NDJSON file; invalid rows are reported by line and skipped"""
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format; use one of {', '.join(IMPORT_FORMATS)}")
+    if evaluate is not None and evaluate not in EVALUATE_MODES:
+        raise HTTPException(status_code=400, detail=f"evaluate must be one of {', '.join(EVALUATE_MODES)}")
+    
+    # The upload is spooled to a temporary file, which is read one row at a time
+    try:
+        summary = import_applicants(db, file.file, fmt, EligibilityRequest, chunk_size, evaluate, max_errors,
+                                    max_attempts=EVALUATION_JOB_SETTINGS["max_attempts"])
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if evaluate == EVALUATE_QUEUE and summary["evaluation"]["queued"]:
+        pool = get_default_job_pool()
+        if pool is not None:
+            pool.notify()
+    return summary
+
+@app.get("/master/status/{applicant_id}")
+def get_status(applicant_id: str, db: Session = Depends(get_db), if_none_match: Optional[str] = Header(None)):
+    """Get evaluation status, with the latest queued evaluation job (queued/running/done/failed)"""
+    snapshot = applicant_cache.get_or_load(("status", applicant_id), lambda: status_snapshot(db, applicant_id))
+    return snapshot_response(snapshot, if_none_match)
+
 @app.get("/admin/reports", response_model=ReportsResponse)
 def get_reports(db: Session = Depends(get_db), current_user: str = Depends(verify_token)):
     """Get analytics and reports"""
-    total = db.query(Applicant).count()
-    approved = db.query(Applicant).filter(Applicant.status == StatusEnum.APPROVED).count()
-    rejected = db.query(Applicant).filter(Applicant.status == StatusEnum.REJECTED).count()
-    evaluating = db.query(Applicant).filter(Applicant.status == StatusEnum.EVALUATING).count()
-    
-    avg_credit = db.query(Applicant).with_entities(
-        db.func.avg(Applicant.credit_score)
-    ).scalar() or 0
-    
-    avg_eligibility = db.query(Applicant).with_entities(
-        db.func.avg(Applicant.eligibility_score)
-    ).scalar() or 0
+    return ReportsResponse(**read_report(db))
+
+@app.get("/admin/reports/daily", response_model=List[DailyReportResponse])
+def get_daily_reports(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: str = Depends(verify_token)
+):
+    """Per-day application counts and averages by creation date"""
+    return [DailyReportResponse(**row) for row in read_daily_report(db, start, end)]
+
+@app.get("/admin/export/{table}")
+def export_table(
+    table: str,
+    format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    since: Optional[datetime] = Query(None, description="Only rows newer than this watermark (exclusive)"),
+    until: Optional[datetime] = Query(None, description="Default: the newest row when the export starts"),
+    chunk_size: int = Query(EXPORT_CHUNK_SIZE, ge=100, le=100000),
+    db: Session = Depends(get_db),
+    current_user: str = Depends(verify_token)
+):
+    """Stream applicants or agent_logs as CSV, Parquet or Arrow IPC; X-Export-Watermark is the next since"""
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export table: {table}")
+    try:
+        export = TableExport(db, table, format, since, until, chunk_size)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return ReportsResponse(
-        total_applicants=total,
-        approved=approved,
-        rejected=rejected,
-        evaluating=evaluating,
-        avg_credit_score=round(avg_credit, 2),
-        avg_eligibility_score=round(avg_eligibility, 2)
-    )
+    headers = {"Content-Disposition": f'attachment; filename="{export.filename}"'}
+    if export.watermark is not None:
+        headers["X-Export-Watermark"] = export.watermark.isoformat()
+    return StreamingResponse(iter(export), media_type=export.media_type, headers=headers)
+
+@app.get("/admin/agent-logs/metrics")
+def get_agent_log_metrics(current_user: str = Depends(verify_token)):
+    """Queue depth and flush latency of the agent audit log sink"""
+    sink = get_default_log_sink()
+    if sink is None:
+        return {"mode": AGENT_LOG_SINK_MODE}
+    return {"mode": AGENT_LOG_SINK_MODE, **sink.metrics()}
+
+@app.get("/admin/token-cache/metrics")
+def get_token_cache_metrics(current_user: str = Depends(verify_token)):
+    """Hit/miss counters of the verified-token cache"""
+    return token_cache.metrics()
+
+@app.get("/admin/applicant-cache/metrics")
+def get_applicant_cache_metrics(current_user: str = Depends(verify_token)):
+    """Hit ratio, invalidations and 304 count of the applicant snapshot cache"""
+    return applicant_cache.metrics()
+
+@app.get("/admin/letters/metrics")
+def get_letter_metrics(current_user: str = Depends(verify_token)):
+    """Render counts, cache hits and pending jobs of the letter renderer"""
+    renderer = get_default_letter_renderer()
+    return renderer.metrics() if renderer is not None else {}
+
+@app.get("/admin/idempotency/metrics")
+def get_idempotency_metrics(current_user: str = Depends(verify_token)):
+    """Claimed, replayed and timed-out Idempotency-Key requests"""
+    return idempotency_store.metrics()
+
+@app.get("/admin/extraction/metrics")
+def get_extraction_metrics(current_user: str = Depends(verify_token)):
+    """Extraction pool counters (extracted, cache hits, pages, pending)"""
+    extractor = get_default_extractor()
+    return extractor.metrics() if extractor is not None else {}
+
+@app.get("/admin/evaluation-jobs/metrics")
+def get_evaluation_job_metrics(db: Session = Depends(get_db), current_user: str = Depends(verify_token)):
+    """Job counts by status and this process's worker pool counters"""
+    pool = get_default_job_pool()
+    return {"queue": queue_depth(db), "workers": pool.metrics() if pool is not None else {}}
+
+@app.get("/admin/scoring-policy")
+def get_scoring_policy(current_user: str = Depends(verify_token)):
+    """Compiled breakpoint tables of the active scoring policy, with reload counters"""
+    store = get_default_policy_store()
+    return {**store.current().describe(), "store": store.metrics()}
+
+@app.post("/admin/scoring-policy/reload")
+def reload_scoring_policy(current_user: str = Depends(verify_token)):
+    """Re-read the policy file now; an invalid file is rejected and the active policy kept"""
+    try:
+        policy = get_default_policy_store().reload()
+    except ScoringPolicyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"version": policy.version}
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of route, DB and agent latency histograms and component counters"""
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/admin/profiling")
+def get_profiling(current_user: str = Depends(verify_token)):
+    """Evaluation profiler settings and the stored pstats dumps"""
+    profiler = get_default_profiler()
+    if profiler is None:
+        return {"enabled": False, "dumps": []}
+    return {**profiler.settings(), "dumps": profiler.dumps()}
+
+@app.post("/admin/profiling")
+def configure_profiling(settings: ProfilingSettings, current_user: str = Depends(verify_token)):
+    """Switch sampled profiling of slow evaluations on or off without a restart"""
+    profiler = get_default_profiler()
+    if profiler is None:
+        raise HTTPException(status_code=503, detail="Profiler is not configured")
+    try:
+        return profiler.configure(settings.enabled, settings.sample_rate, settings.threshold_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/admin/admission")
+def get_admission(current_user: str = Depends(verify_token)):
+    """Rate limit and in-flight cap settings, with admitted / rate-limited / shed counters"""
+    admission_controller.refresh(force=True)
+    return {**asdict(admission_controller.settings), **admission_controller.metrics()}
+
+@app.post("/admin/admission")
+def configure_admission(limits: AdmissionLimits, current_user: str = Depends(verify_token)):
+    """Change the rate limit or in-flight cap without a restart (all workers, with the SQLite backend)"""
+    try:
+        return admission_controller.configure(**limits.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/letters/{kind}/{key}.pdf")
+def get_letter(kind: str, key: str):
+    """Download a rendered sanction letter or rejection report by its content key"""
+    renderer = get_default_letter_renderer()
+    if renderer is None or kind not in TEMPLATES or not LETTER_KEY.match(key):
+        raise HTTPException(status_code=404, detail="Letter not found")
+    try:
+        path = renderer.path(kind, key)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Letter is still rendering", headers={"Retry-After": "5"})
+    if path is None:
+        raise HTTPException(status_code=404, detail="Letter not found")
+    return FileResponse(path, media_type="application/pdf", filename=f"{kind}_{key[:12]}.pdf")
 
 @app.post("/webhook/decision")
 def webhook_decision(applicant_id: str, status: str):
@@ -431,6 +1023,130 @@ def webhook_decision(applicant_id: str, status: str):
         "timestamp": datetime.utcnow()
     }
 
+# Async endpoints (DB_MODE=async): same paths and responses as the sync handlers above,
+# served from an AsyncSession so they do not hold a threadpool worker while waiting on the database
+async_router = APIRouter()
+
+@async_router.post("/public/check-eligibility", response_model=EligibilityResponse)
+async def check_eligibility_async(
+    request: EligibilityRequest,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Public endpoint for instant eligibility check"""
+    claim = None
+    if idempotency_key is not None:
+        claim = await run_in_threadpool(claim_idempotency_key, idempotency_key, "check-eligibility", request.model_dump())
+        if claim.is_replay:
+            return replayed_response(claim)
+    
+    try:
+        applicant = Applicant(
+            name=request.name,
+            income=request.income,
+            requested_amount=request.requested_amount,
+            credit_score=request.credit_score
+        )
+        async with write_slot():
+            db.add(applicant)
+            await db.commit()
+            result = await AsyncMasterAgent(db).evaluate(applicant.id)
+        response = EligibilityResponse(
+            eligibility_score=result.eligibility_score,
+            status=result.status.value,
+            reason_summary=result.reason_summary or "",
+            applicant_id=result.id
+        )
+    except Exception:
+        if claim is not None:
+            await run_in_threadpool(idempotency_store.abandon, claim)
+        raise
+    if claim is not None:
+        await run_in_threadpool(idempotency_store.complete, claim, response.model_dump())
+    return response
+
+@async_router.get("/admin/applicants", response_model=ApplicantPage)
+async def get_applicants_async(
+    params: ApplicantListParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(verify_token)
+):
+    """List applicants newest first, keyset-paginated on (created_at, id) or streamed as NDJSON"""
+    if params.format == "ndjson":
+        async def stream():
+            result = await db.stream(newest_first(params.stmt).execution_options(yield_per=params.chunk_size))
+            async for partition in result.partitions():
+                yield ndjson_chunk(partition)
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+    
+    try:
+        rows = (await db.execute(keyset_select(params.stmt, params.limit, params.cursor))).all()
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items, next_cursor = page_from_rows(rows, params.limit)
+    return ApplicantPage(
+        items=[ApplicantResponse(**row._asdict()) for row in items],
+        next_cursor=next_cursor,
+        limit=params.limit
+    )
+
+@async_router.get("/admin/applicant/{applicant_id}", response_model=ApplicantResponse)
+async def get_applicant_async(
+    applicant_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(verify_token),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get specific applicant details; If-None-Match with the last ETag returns 304"""
+    snapshot = await applicant_cache.aget_or_load(
+        ("applicant", applicant_id), lambda: db.run_sync(lambda session: applicant_snapshot(session, applicant_id))
+    )
+    return snapshot_response(snapshot, if_none_match)
+
+@async_router.post("/master/evaluate")
+async def master_evaluate_async(applicant_id: str, queue: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Master Agent evaluation endpoint; with queue=true returns 202 and a job id to poll /master/status with"""
+    async with write_slot():
+        if queue:
+            return queued_response(*await db.run_sync(lambda session: enqueue_existing(session, applicant_id)))
+        return evaluation_response(await AsyncMasterAgent(db).evaluate(applicant_id))
+
+@async_router.get("/master/status/{applicant_id}")
+async def get_status_async(applicant_id: str, db: AsyncSession = Depends(get_async_db), if_none_match: Optional[str] = Header(None)):
+    """Get evaluation status, with the latest queued evaluation job (queued/running/done/failed)"""
+    snapshot = await applicant_cache.aget_or_load(
+        ("status", applicant_id), lambda: db.run_sync(lambda session: status_snapshot(session, applicant_id))
+    )
+    return snapshot_response(snapshot, if_none_match)
+
+@async_router.get("/admin/reports", response_model=ReportsResponse)
+async def get_reports_async(db: AsyncSession = Depends(get_async_db), current_user: str = Depends(verify_token)):
+    """Get analytics and reports"""
+    return ReportsResponse(**await db.run_sync(read_report))
+
+@async_router.get("/admin/reports/daily", response_model=List[DailyReportResponse])
+async def get_daily_reports_async(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(verify_token)
+):
+    """Per-day application counts and averages by creation date"""
+    rows = await db.run_sync(lambda session: read_daily_report(session, start, end))
+    return [DailyReportResponse(**row) for row in rows]
+
+def use_async_routes():
+    """Replace the sync handlers that have an async counterpart."""
+    overridden = {(route.path, method) for route in async_router.routes for method in route.methods}
+    app.router.routes = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute) and any((route.path, method) in overridden for method in route.methods))
+    ]
+    app.include_router(async_router)
+
+if DB_MODE == "async":
+    use_async_routes()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
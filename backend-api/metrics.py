@@ -0,0 +1,255 @@
+"""In-process latency histograms and counters, exposed in Prometheus text format.
+
+Observations update fixed buckets under a per-metric lock; a scrape only formats the current
+counts, so neither side does work proportional to traffic. Agents are timed in log_action,
+DB round-trips by engine events and HTTP routes by MetricsMiddleware.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; from sub-millisecond DB reads up to multi-second bcrypt logins and batch runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SQL_OPERATIONS = {"select", "insert", "update", "delete", "pragma", "begin", "commit", "rollback"}
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values]
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._le = tuple('le="' + _number(bound) + '"' for bound in self.buckets + (math.inf,))
+        # labels -> [per-bucket counts (last is +Inf), sum, pre-rendered sample prefixes]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, None]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def snapshot(self, *labelvalues: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                return None
+            counts, total = list(series[0]), series[1]
+        return {"count": sum(counts), "sum": total, "buckets": dict(zip(self.buckets + (math.inf,), counts))}
+
+    def _prefixes(self, labels: Tuple[str, ...]) -> Tuple[Tuple[str, ...], str, str]:
+        # Formatting label sets dominates a scrape, so each series does it once
+        buckets = tuple(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} " for le in self._le)
+        plain = _labels(self.labelnames, labels)
+        return buckets, f"{self.name}_sum{plain} ", f"{self.name}_count{plain} "
+
+    def render(self) -> List[str]:
+        with self._lock:
+            for labels, series in self._series.items():
+                if series[2] is None:
+                    series[2] = self._prefixes(labels)
+            series = sorted((labels, list(counts), total, prefixes) for labels, (counts, total, prefixes) in self._series.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for _, counts, total, (bucket_prefixes, sum_prefix, count_prefix) in series:
+            cumulative = 0
+            for prefix, count in zip(bucket_prefixes, counts):
+                cumulative += count
+                lines.append(prefix + str(cumulative))
+            lines.append(sum_prefix + _number(total))
+            lines.append(count_prefix + str(cumulative))
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: Dict[str, Callable[[], Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_component(self, component: str, stats: Callable[[], Optional[Dict[str, Any]]]):
+        """Expose a component's metrics() dict: each numeric entry becomes a gauge sample."""
+        with self._lock:
+            self._collectors[component] = stats
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = sorted(self._collectors.items())
+        lines: List[str] = []
+        for metric in metrics:
+            lines += metric.render()
+        lines += [
+            "# HELP nbfc_component_stat Counters and gauges reported by background components",
+            "# TYPE nbfc_component_stat gauge",
+        ]
+        for component, stats in collectors:
+            for stat, value in sorted((stats() or {}).items()):
+                if isinstance(value, (int, float)):
+                    value = int(value) if isinstance(value, bool) else value
+                    labels = _labels(("component", "stat"), (component, stat))
+                    lines.append(f"nbfc_component_stat{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+AGENT_ACTION_SECONDS = registry.register(Histogram(
+    "nbfc_agent_action_seconds", "Agent action latency, as written to AgentLog.execution_time", ("agent", "action")
+))
+DB_STATEMENT_SECONDS = registry.register(Histogram(
+    "nbfc_db_statement_seconds", "Database round-trip latency per statement", ("engine", "operation")
+))
+DB_ERRORS = registry.register(Counter(
+    "nbfc_db_errors_total", "Statements that raised a database error", ("engine", "operation")
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "nbfc_http_request_seconds", "HTTP request latency by route template", ("method", "route")
+))
+HTTP_RESPONSES = registry.register(Counter(
+    "nbfc_http_responses_total", "HTTP responses by route template and status code", ("method", "route", "status")
+))
+
+EVALUATION_DAG_SECONDS = registry.register(Histogram(
+    "nbfc_evaluation_dag_seconds",
+    "Per evaluation: wall time, critical path and the sum of all steps of the agent step graph", ("measure",)
+))
+EVALUATION_STEPS = registry.register(Counter(
+    "nbfc_evaluation_steps_total", "Agent step graph steps by outcome (ok, skipped, failed, timeout)", ("step", "status")
+))
+
+def observe_agent_action(agent: str, action: str, seconds: float):
+    AGENT_ACTION_SECONDS.observe(seconds, agent, action)
+
+def observe_evaluation_dag(summary: Dict[str, Any]):
+    """Record a DagRun.summary() of one evaluation."""
+    EVALUATION_DAG_SECONDS.observe(summary["wall_ms"] / 1000, "wall")
+    EVALUATION_DAG_SECONDS.observe(summary["critical_path_ms"] / 1000, "critical_path")
+    EVALUATION_DAG_SECONDS.observe(summary["serial_ms"] / 1000, "serial")
+    for step, record in summary["steps"].items():
+        EVALUATION_STEPS.inc(step, record["status"])
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:8].split(None, 1)
+    keyword = keyword[0].lower() if keyword else ""
+    return keyword if keyword in SQL_OPERATIONS else "other"
+
+def instrument_engine(engine: Engine, name: str = "sync"):
+    """Time every cursor execution on `engine` (for AsyncEngine pass its .sync_engine)."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["metrics_start"].pop()
+        DB_STATEMENT_SECONDS.observe(time.perf_counter() - start, name, _operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_start"):
+            conn.info["metrics_start"].pop()
+        DB_ERRORS.inc(name, _operation(exception_context.statement or ""))
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request under its route template (/admin/applicant/{applicant_id})
+    rather than the raw path, so ids do not create new series. Unrouted paths share one label."""
+
+    def __init__(self, app):
+        self.app = app
+        self._paths: Dict[Any, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route(scope)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route)
+            HTTP_RESPONSES.inc(scope["method"], route, str(status))
+
+    def _route(self, scope) -> str:
+        # The router stores the matched endpoint in the shared scope dict
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is not None:
+                    self._paths[route.endpoint] = route.path
+            path = self._paths.get(endpoint, "unmatched")
+        return path
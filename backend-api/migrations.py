@@ -0,0 +1,95 @@
+from sqlalchemy import DateTime, inspect, text, bindparam
+from sqlalchemy.engine import Engine
+from models import Base, DocumentTypeEnum
+import argparse
+from typing import List, Optional
+
+def _add_missing_columns(engine: Engine) -> List[str]:
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    applied = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                # Backfill scalar Python-side defaults so old rows behave like new ones
+                if column.default is not None and column.default.is_scalar:
+                    connection.execute(
+                        text(f'UPDATE {table.name} SET "{column.name}" = :value WHERE "{column.name}" IS NULL')
+                        .bindparams(bindparam("value", value=column.default.arg, type_=column.type))
+                    )
+                # Timestamps default to datetime.utcnow, which old rows never ran: use the row's own
+                # creation time where the table already had one, else the upgrade time
+                elif column.default is not None and column.default.is_callable and isinstance(column.type, DateTime):
+                    fallback = "COALESCE(created_at, CURRENT_TIMESTAMP)" if "created_at" in existing_columns else "CURRENT_TIMESTAMP"
+                    connection.execute(text(f'UPDATE {table.name} SET "{column.name}" = {fallback} WHERE "{column.name}" IS NULL'))
+                applied.append(f"add column {table.name}.{column.name}")
+    return applied
+
+def _normalize_document_types(engine: Engine) -> List[str]:
+    # The original main.py schema stored document types as lowercase values; the Enum column stores names
+    if "documents" not in inspect(engine).get_table_names():
+        return []
+    with engine.begin() as connection:
+        updated = 0
+        for document_type in DocumentTypeEnum:
+            result = connection.execute(
+                text("UPDATE documents SET type = :name WHERE type = :value"),
+                {"name": document_type.name, "value": document_type.value}
+            )
+            updated += result.rowcount
+    return [f"normalize {updated} document types"] if updated else []
+
+def _create_missing_indexes(engine: Engine) -> List[str]:
+    inspector = inspect(engine)
+    applied = []
+    for table in Base.metadata.sorted_tables:
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                applied.append(f"create index {index.name}")
+    return applied
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """Bring an existing database up to the current models: new tables, new columns, indexes."""
+    applied = _add_missing_columns(engine)
+    applied += _normalize_document_types(engine)
+    Base.metadata.create_all(bind=engine)
+    applied += _create_missing_indexes(engine)
+    return applied
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Upgrade the database schema to the current models (run on deploy with STARTUP_MODE=fast)"
+    )
+    parser.add_argument("--database-url", default=None, help="Defaults to the application's DATABASE_URL")
+    parser.add_argument("--seed", action="store_true", help="Also add the sample applicants and admin user")
+    args = parser.parse_args(argv)
+
+    # Not `from main import engine`: importing the app would upgrade the schema itself in full startup mode
+    from database import create_db_engine
+    from rollups import ensure_rollups
+    from sqlalchemy.orm import Session
+
+    engine = create_db_engine(args.database_url)
+    applied = upgrade_schema(engine)
+    with Session(engine) as db:
+        if args.seed:
+            from sample_data import init_sample_data
+            init_sample_data(db)
+            applied.append("seed sample data")
+        ensure_rollups(db)
+    for step in applied:
+        print(step)
+    print(f"Schema up to date ({len(applied)} changes applied)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
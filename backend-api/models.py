@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, Float, DateTime, Date, Text, Enum, ForeignKey, Boolean, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -38,6 +38,7 @@ class Applicant(Base):
     eligibility_score = Column(Float, default=0.0)
     status = Column(Enum(StatusEnum), default=StatusEnum.EVALUATING)
     reason_summary = Column(Text)
+    policy_version = Column(String)  # scoring policy that produced eligibility_score
     pre_approved_limit = Column(Float, default=0.0)
     employment_type = Column(String, default="salaried")
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -45,6 +46,13 @@ class Applicant(Base):
     
     documents = relationship("Document", back_populates="applicant", cascade="all, delete-orphan")
     agent_logs = relationship("AgentLog", back_populates="applicant", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_applicants_status", "status"),
+        Index("ix_applicants_created_at_id", "created_at", "id"),  # keyset pagination
+        Index("ix_applicants_name", "name"),
+        Index("ix_applicants_credit_score", "credit_score"),
+    )
 
 class Document(Base):
     __tablename__ = "documents"
@@ -53,12 +61,22 @@ class Document(Base):
     applicant_id = Column(String, ForeignKey("applicants.id"), nullable=False)
     type = Column(Enum(DocumentTypeEnum), nullable=False)
     storage_url = Column(String)
+    content_hash = Column(String(64))  # SHA-256 of the stored file, see document_storage.py
+    size_bytes = Column(Integer)
+    filename = Column(String)
+    content_type = Column(String)
+    ocr_status = Column(String)  # pending / done / failed, see extraction.py
     ocr_data = Column(Text)
     confidence = Column(Float, default=0.0)
     verified = Column(Boolean, default=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     
     applicant = relationship("Applicant", back_populates="documents")
+    
+    __table_args__ = (
+        Index("ix_documents_applicant_id", "applicant_id"),
+        Index("ix_documents_content_hash", "content_hash"),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -78,11 +96,33 @@ class AgentLog(Base):
     applicant_id = Column(String, ForeignKey("applicants.id"), nullable=False)
     agent_name = Column(String, nullable=False)
     action = Column(String, nullable=False)
-    result = Column(Text)
+    result = Column(Text)  # NULL when the JSON was moved to log_payloads
+    payload_hash = Column(String(64))  # LogPayload.sha256 holding the result
     execution_time = Column(Float, default=0.0)
     timestamp = Column(DateTime, default=datetime.utcnow)
     
     applicant = relationship("Applicant", back_populates="agent_logs")
+    
+    __table_args__ = (
+        Index("ix_agent_logs_applicant_id_timestamp", "applicant_id", "timestamp"),
+        Index("ix_agent_logs_timestamp", "timestamp"),
+        # Only the rows whose result was moved out, to find payloads that are no longer referenced
+        Index("ix_agent_logs_payload_hash", "payload_hash",
+              sqlite_where=payload_hash.isnot(None), postgresql_where=payload_hash.isnot(None)),
+    )
+
+class LogPayload(Base):
+    """Compressed AgentLog.result too large to keep inline, stored once per content (agent_log_storage.py)."""
+    __tablename__ = "log_payloads"
+    
+    sha256 = Column(String(64), primary_key=True)  # of the uncompressed JSON
+    codec = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    stored_bytes = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = {"sqlite_with_rowid": False}  # the hash is the only key; no second copy in a rowid index
 
 class LoanProduct(Base):
     __tablename__ = "loan_products"
@@ -96,4 +136,65 @@ class LoanProduct(Base):
     interest_rate = Column(Float, nullable=False)
     processing_fee = Column(Float, default=0.0)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RollupColumns:
+    total_count = Column(Integer, nullable=False, default=0)
+    evaluating_count = Column(Integer, nullable=False, default=0)
+    approved_count = Column(Integer, nullable=False, default=0)
+    rejected_count = Column(Integer, nullable=False, default=0)
+    pending_documents_count = Column(Integer, nullable=False, default=0)
+    credit_score_sum = Column(Float, nullable=False, default=0.0)
+    credit_score_count = Column(Integer, nullable=False, default=0)
+    eligibility_score_sum = Column(Float, nullable=False, default=0.0)
+    eligibility_score_count = Column(Integer, nullable=False, default=0)
+
+class ApplicantRollup(RollupColumns, Base):
+    __tablename__ = "applicant_rollups"
+    
+    bucket = Column(String, primary_key=True)  # "all"
+
+class ApplicantDailyRollup(RollupColumns, Base):
+    __tablename__ = "applicant_daily_rollups"
+    
+    day = Column(Date, primary_key=True)  # Applicant.created_at date
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request sent with an Idempotency-Key header, see idempotency.py."""
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String, primary_key=True)
+    endpoint = Column(String, primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String, nullable=False)  # in_progress / completed
+    response_status = Column(Integer)
+    response_body = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+class EvaluationJob(Base):
+    """Queued /master/evaluate run, claimed and executed by evaluation_jobs.EvaluationWorkerPool."""
+    __tablename__ = "evaluation_jobs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    applicant_id = Column(String, ForeignKey("applicants.id"), nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued / running / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)  # retry backoff
+    locked_by = Column(String)
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    result = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_evaluation_jobs_status_run_after", "status", "run_after"),  # claim order
+        Index("ix_evaluation_jobs_applicant_id_created_at", "applicant_id", "created_at"),
+    )
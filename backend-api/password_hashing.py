@@ -0,0 +1,121 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Any, Callable, Optional, Tuple, Union
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    # passlib and the bcrypt backend are imported with the first hash, not at startup
+    from passlib.context import CryptContext
+    # Hashes below the configured cost are rehashed transparently on the next successful login
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS
+    )
+
+class PasswordVerifierBusy(Exception):
+    pass
+
+class PasswordVerifier:
+    """Runs bcrypt on a dedicated, size-limited thread pool. At most `workers + max_queue`
+    verifications are admitted at once; anything beyond that fails fast with
+    PasswordVerifierBusy instead of queueing behind the request threadpool. `context` is a
+    passlib CryptContext, or a function returning one on first use."""
+
+    def __init__(self, context: Union[Any, Callable[[], Any]], workers: int = 4, max_queue: int = 16, timeout: float = 10.0):
+        self._context = context
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._dummy_hash: Optional[str] = None
+        self._stats = {"verified": 0, "rejected_busy": 0, "timeouts": 0, "rehashed": 0, "total_verify_ms": 0.0}
+        self.hash_benchmark_ms: Optional[float] = None
+
+    @property
+    def context(self):
+        if callable(self._context):
+            self._context = self._context()
+        return self._context
+
+    def benchmark(self) -> float:
+        """Time one hash at the configured cost; also prepares the hash used for unknown users."""
+        start = time.perf_counter()
+        self._dummy_hash = self.context.hash("benchmark-password")
+        self.hash_benchmark_ms = (time.perf_counter() - start) * 1000
+        return self.hash_benchmark_ms
+
+    def benchmark_in_background(self) -> Future:
+        """benchmark() on the bcrypt pool, for a startup that should not wait for it."""
+        return self._executor.submit(self.benchmark)
+
+    async def verify_and_update(self, secret: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated settings."""
+        unknown_user = hashed is None
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected_busy")
+            raise PasswordVerifierBusy()
+        with self._stats_lock:
+            self._in_flight += 1
+
+        future = self._executor.submit(self._timed_verify, secret, hashed)
+        future.add_done_callback(self._release)
+        try:
+            valid, new_hash = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise PasswordVerifierBusy()
+
+        if unknown_user:
+            return False, None
+        if new_hash is not None:
+            self._count("rehashed")
+        return valid, new_hash
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight
+        total_ms = stats.pop("total_verify_ms")
+        stats["avg_verify_ms"] = total_ms / stats["verified"] if stats["verified"] else 0.0
+        stats["workers"] = self.workers
+        stats["capacity"] = self.capacity
+        stats["hash_benchmark_ms"] = self.hash_benchmark_ms
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _timed_verify(self, secret: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        if hashed is None:
+            # Unknown user: spend the same bcrypt time so response latency does not reveal it. Before
+            # the startup benchmark has run (fast startup) the dummy hash is made here, on the pool
+            if self._dummy_hash is None:
+                self._dummy_hash = self.context.hash("benchmark-password")
+            hashed = self._dummy_hash
+        start = time.perf_counter()
+        result = self.context.verify_and_update(secret, hashed)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats["verified"] += 1
+            self._stats["total_verify_ms"] += elapsed_ms
+        return result
+
+    def _release(self, future):
+        with self._stats_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
@@ -0,0 +1,108 @@
+"""Sampled cProfile dumps of slow evaluations, switched on and off at runtime.
+
+While enabled, `sample_rate` of evaluations run under cProfile in their own thread; the ones
+slower than `threshold_ms` are written as pstats files (`python -m pstats FILE`) to
+`directory`, keeping the newest `max_dumps`.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+class EvaluationProfiler:
+    def __init__(self, directory: str, enabled: bool = False, sample_rate: float = 0.01,
+                 threshold_ms: float = 500.0, max_dumps: int = 50):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.threshold_ms = threshold_ms
+        self.max_dumps = max_dumps
+        self._lock = threading.Lock()
+        self._stats = {"sampled": 0, "dumped": 0}
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  threshold_ms: Optional[float] = None) -> Dict[str, Any]:
+        if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if threshold_ms is not None and threshold_ms < 0:
+            raise ValueError("threshold_ms must not be negative")
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            if threshold_ms is not None:
+                self.threshold_ms = threshold_ms
+        return self.settings()
+
+    def settings(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "sample_rate": self.sample_rate, "threshold_ms": self.threshold_ms,
+                    "directory": self.directory, "max_dumps": self.max_dumps, **self._stats}
+
+    @contextmanager
+    def profile(self, name: str, label: str = ""):
+        """Profile the block if this call is sampled; costs one random() when it is not."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield
+            return
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._count("sampled")
+            if elapsed_ms >= self.threshold_ms:
+                self._dump(profiler, name, label, elapsed_ms)
+
+    def dumps(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for filename in sorted(os.listdir(self.directory), reverse=True):
+            if filename.endswith(".pstats"):
+                path = os.path.join(self.directory, filename)
+                entries.append({"file": filename, "size": os.path.getsize(path)})
+        return entries
+
+    def _dump(self, profiler: cProfile.Profile, name: str, label: str, elapsed_ms: float):
+        os.makedirs(self.directory, exist_ok=True)
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]", "_", label)[:64]
+        filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{name}-{int(elapsed_ms)}ms-{safe_label}.pstats"
+        profiler.dump_stats(os.path.join(self.directory, filename))
+        self._count("dumped")
+        for stale in self.dumps()[self.max_dumps:]:
+            try:
+                os.remove(os.path.join(self.directory, stale["file"]))
+            except FileNotFoundError:
+                pass
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+_default_profiler: Optional[EvaluationProfiler] = None
+
+def get_default_profiler() -> Optional[EvaluationProfiler]:
+    return _default_profiler
+
+def set_default_profiler(profiler: Optional[EvaluationProfiler]):
+    global _default_profiler
+    _default_profiler = profiler
+
+@contextmanager
+def profile_evaluation(name: str, label: str = ""):
+    profiler = _default_profiler
+    if profiler is None:
+        yield
+        return
+    with profiler.profile(name, label):
+        yield
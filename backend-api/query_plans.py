@@ -0,0 +1,211 @@
+"""EXPLAIN QUERY PLAN regression check for the queries the endpoints and agents issue.
+
+Runs the endpoint functions and agents against a seeded in-memory SQLite database,
+captures every SELECT/UPDATE/DELETE they send, and fails if any plan falls back to a
+full table scan.  Run from backend-api/:  python query_plans.py
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models import Base, Applicant, Document, AgentLog, User, StatusEnum, RoleEnum, DocumentTypeEnum
+from datetime import datetime, timedelta
+import argparse
+import io
+import re
+import sys
+import tempfile
+import uuid
+from typing import Dict, Any, List, Tuple
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(\w+)$")
+PLANNED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+class StatementRecorder:
+    def __init__(self, engine):
+        self.statements: Dict[str, Tuple[str, Any, str]] = {}
+        self.label = "setup"
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(PLANNED_STATEMENTS):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.setdefault(statement, (statement, parameters, self.label))
+
+def seed(session, count: int):
+    base_time = datetime.utcnow() - timedelta(days=30)
+    for i in range(count):
+        applicant = Applicant(
+            id=str(uuid.uuid4()),
+            name=f"Applicant {i}",
+            email=f"applicant{i}@example.com",
+            phone="9876543210",
+            income=20000 + (i * 7919) % 130000,
+            requested_amount=100000 + (i * 104729) % 1900000,
+            credit_score=550 + (i * 31) % 300,
+            created_at=base_time + timedelta(minutes=i)
+        )
+        session.add(applicant)
+        session.add(Document(applicant_id=applicant.id, type=DocumentTypeEnum.SALARY_SLIP))
+    session.add(User(email="admin@nbfc.com", password="x", role=RoleEnum.ADMIN))
+    session.commit()
+
+def run_workload(session, recorder: StatementRecorder):
+    import main
+    from agents import MasterAgent, VerificationAgent, UnderwritingAgent, SanctionAgent, RejectionAgent
+    from batch_underwriting import evaluate_batch, check_parity
+    from rollups import read_report, read_daily_report
+    from applicant_queries import filtered_applicants, keyset_page, stream_ndjson
+    from document_storage import DocumentStore
+    from table_export import TableExport
+    from agent_log_storage import archive_logs, iter_archive, compact_inline, read_result
+    from idempotency import IdempotencyStore
+    from extraction import cached_extraction
+    from evaluation_jobs import EvaluationWorkerPool, queue_depth
+    from starlette.datastructures import UploadFile
+
+    def step(label):
+        recorder.label = label
+
+    step("init_sample_data")
+    session.query(User).filter(User.email == "admin@nbfc.com").first()
+    session.query(Applicant).filter(Applicant.name == "Rajesh Kumar").first()
+
+    step("check_eligibility")
+    created = main.check_eligibility(main.EligibilityRequest(name="Plan Check", income=60000, requested_amount=300000), session, None)
+    applicant_id = created.applicant_id
+
+    step("idempotency")
+    store = IdempotencyStore(sessionmaker(bind=session.get_bind()))
+    claim = store.begin("plan-check", "check-eligibility", "hash")
+    store.complete(claim, {"applicant_id": applicant_id})
+    store.begin("plan-check", "check-eligibility", "hash")
+    store.abandon(store.begin("plan-check-2", "check-eligibility", "hash"))
+    store.purge_expired()
+
+    step("get_applicants")
+    page = main.get_applicants(main.ApplicantListParams(
+        limit=50, cursor=None, status=None, min_credit_score=None, max_credit_score=None,
+        created_from=None, created_to=None, format="json", chunk_size=100
+    ), session, "check")
+    main.get_applicants(main.ApplicantListParams(
+        limit=50, cursor=page.next_cursor, status="evaluating", min_credit_score=650, max_credit_score=800,
+        created_from=datetime.utcnow() - timedelta(days=60), created_to=datetime.utcnow(),
+        format="json", chunk_size=100
+    ), session, "check")
+    for status in StatusEnum:
+        keyset_page(session, filtered_applicants(status=status), 50)
+    keyset_page(session, filtered_applicants(min_credit_score=700), 50)
+    keyset_page(session, filtered_applicants(created_from=datetime.utcnow() - timedelta(days=1)), 50)
+    for _ in stream_ndjson(session, filtered_applicants(), 100):
+        pass
+    for _ in stream_ndjson(session, filtered_applicants(status=StatusEnum.APPROVED), 100):
+        pass
+
+    step("get_applicant / status")
+    main.get_applicant(applicant_id, session, "check", None)
+    main.get_status(applicant_id, session, None)
+
+    step("upload_document")
+    with tempfile.TemporaryDirectory() as storage_root:
+        main.document_store = DocumentStore(storage_root)
+        uploaded = main.upload_document(applicant_id, UploadFile(io.BytesIO(b"%PDF"), filename="salary.pdf"), "salary_slip", session, "check")
+        main.download_document(uploaded["sha256"], session, "check")
+        cached_extraction(session, uploaded["sha256"], DocumentTypeEnum.SALARY_SLIP)
+        main.get_applicant_documents(applicant_id, session, "check")
+
+    step("master_evaluate")
+    main.master_evaluate(applicant_id, db=session)
+
+    step("evaluation_jobs")
+    jobs = EvaluationWorkerPool(sessionmaker(bind=session.get_bind()), main.run_master_evaluation, workers=0)
+    main.master_evaluate(applicant_id, queue=True, db=session)
+    main.master_evaluate(applicant_id, queue=True, db=session)
+    jobs._execute("plan-check", jobs.claim("plan-check"))
+    jobs.recover_expired()
+    main.get_status(applicant_id, session, None)
+    queue_depth(session)
+
+    step("agents")
+    pending = [row.id for row in session.query(Applicant.id).filter(Applicant.status == StatusEnum.EVALUATING).limit(5)]
+    master = MasterAgent(session)
+    for pending_id in pending[:3]:
+        master.orchestrate_evaluation(pending_id)
+    VerificationAgent(session).verify_kyc(pending[3])
+    UnderwritingAgent(session).evaluate_eligibility(pending[3])
+    SanctionAgent(session).generate_sanction_letter(pending[3])
+    RejectionAgent(session).generate_rejection_report(pending[4])
+    session.query(AgentLog).filter(AgentLog.applicant_id == pending[0]).order_by(AgentLog.timestamp).all()
+    session.query(Document).filter(Document.applicant_id == pending[0]).all()
+
+    step("evaluate_batch")
+    check_parity(session, chunk_size=100)
+    evaluate_batch(session, chunk_size=100)
+    evaluate_batch(session, applicant_ids=pending, chunk_size=100)
+
+    step("applicant_import")
+    rows = b"name,income,requested_amount,credit_score\nPlan Import,50000,200000,700\nPlan Import,x,1,\n"
+    for evaluate in ("batch", "queue"):
+        main.import_applicants_file(UploadFile(io.BytesIO(rows), filename="import.csv"), None, evaluate, 100, 10, session, "check")
+
+    step("table_export")
+    since = datetime.utcnow() - timedelta(days=1)
+    for table in ("applicants", "agent_logs"):
+        for export in (TableExport(session, table, chunk_size=100), TableExport(session, table, since=since, chunk_size=100)):
+            for _ in export:
+                pass
+
+    step("reports")
+    read_report(session)
+    read_daily_report(session, (datetime.utcnow() - timedelta(days=7)).date(), datetime.utcnow().date())
+
+    step("agent_log_storage")
+    for log in session.query(AgentLog).filter(AgentLog.applicant_id == pending[0]).order_by(AgentLog.timestamp).all():
+        read_result(session, log)
+    compact_inline(session, chunk_size=100)
+    with tempfile.TemporaryDirectory() as archive_dir:
+        archive_logs(session, archive_dir, datetime.utcnow() + timedelta(seconds=1), chunk_size=100)
+        for _ in iter_archive(archive_dir, pending[0]):
+            pass
+
+def full_scans(engine, recorder: StatementRecorder) -> List[Dict[str, Any]]:
+    failures = []
+    with engine.connect() as connection:
+        cursor_connection = connection.connection.driver_connection
+        for statement, parameters, label in recorder.statements.values():
+            plan = cursor_connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            details = [row[-1] for row in plan]
+            scans = [detail for detail in details if FULL_SCAN.match(detail)]
+            if scans:
+                failures.append({"label": label, "statement": " ".join(statement.split()), "plan": details})
+    return failures
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if any endpoint or agent query does a full table scan")
+    parser.add_argument("--applicants", type=int, default=500)
+    parser.add_argument("--verbose", action="store_true", help="Print every captured statement")
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    seed(session, args.applicants)
+
+    recorder = StatementRecorder(engine)
+    run_workload(session, recorder)
+    session.close()
+
+    failures = full_scans(engine, recorder)
+    if args.verbose:
+        for statement, _, label in recorder.statements.values():
+            print(f"[{label}] {' '.join(statement.split())}")
+    for failure in failures:
+        print(f"FULL SCAN in {failure['label']}: {failure['statement']}")
+        for detail in failure["plan"]:
+            print(f"    {detail}")
+    print(f"{len(recorder.statements)} statements checked, {len(failures)} full table scans")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+from sqlalchemy import event, inspect, func, update, insert, delete
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from models import Applicant, ApplicantRollup, ApplicantDailyRollup, StatusEnum
+from datetime import date, datetime
+from collections import defaultdict
+import argparse
+from typing import Dict, Any, List, Optional
+
+TOTAL_BUCKET = "all"
+
+STATUS_COUNT_COLUMNS = {
+    StatusEnum.EVALUATING: "evaluating_count",
+    StatusEnum.APPROVED: "approved_count",
+    StatusEnum.REJECTED: "rejected_count",
+    StatusEnum.PENDING_DOCUMENTS: "pending_documents_count",
+}
+
+ROLLUP_COLUMNS = [
+    "total_count",
+    *STATUS_COUNT_COLUMNS.values(),
+    "credit_score_sum",
+    "credit_score_count",
+    "eligibility_score_sum",
+    "eligibility_score_count",
+]
+
+class RollupDelta:
+    """Pending changes to the total and per-day rollup rows."""
+
+    def __init__(self):
+        self.total: Dict[str, float] = defaultdict(float)
+        self.daily: Dict[date, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def add(self, created_at: Optional[datetime], status: Optional[StatusEnum], credit_score: Optional[int],
+            eligibility_score: Optional[float], sign: int = 1):
+        contribution = {"total_count": 1}
+        if status in STATUS_COUNT_COLUMNS:
+            contribution[STATUS_COUNT_COLUMNS[status]] = 1
+        if credit_score is not None:
+            contribution["credit_score_sum"] = credit_score
+            contribution["credit_score_count"] = 1
+        if eligibility_score is not None:
+            contribution["eligibility_score_sum"] = eligibility_score
+            contribution["eligibility_score_count"] = 1
+
+        day = created_at.date() if created_at is not None else None
+        for column, value in contribution.items():
+            self.total[column] += sign * value
+            if day is not None:
+                self.daily[day][column] += sign * value
+
+    def apply(self, connection: Connection):
+        _apply_bucket(connection, ApplicantRollup, ApplicantRollup.bucket, TOTAL_BUCKET, self.total)
+        for day, changes in self.daily.items():
+            _apply_bucket(connection, ApplicantDailyRollup, ApplicantDailyRollup.day, day, changes)
+
+def _apply_bucket(connection: Connection, model, key_column, key, changes: Dict[str, float]):
+    changes = {column: value for column, value in changes.items() if value}
+    if not changes:
+        return
+    table = model.__table__
+    result = connection.execute(
+        update(table)
+        .where(key_column == key)
+        .values({column: table.c[column] + value for column, value in changes.items()})
+    )
+    if result.rowcount == 0:
+        values = {column: 0 for column in ROLLUP_COLUMNS}
+        values.update(changes)
+        values[key_column.key] = key
+        connection.execute(insert(table).values(values))
+
+def _old_value(state, attribute: str):
+    history = state.attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.object, attribute)
+
+# Keep rollups in the same transaction as every Applicant insert, status change and delete
+@event.listens_for(Applicant, "after_insert")
+def _rollup_after_insert(mapper, connection, target):
+    delta = RollupDelta()
+    delta.add(target.created_at, target.status, target.credit_score, target.eligibility_score)
+    delta.apply(connection)
+
+@event.listens_for(Applicant, "after_update")
+def _rollup_after_update(mapper, connection, target):
+    state = inspect(target)
+    tracked = ("status", "credit_score", "eligibility_score", "created_at")
+    if not any(state.attrs[attribute].history.has_changes() for attribute in tracked):
+        return
+    delta = RollupDelta()
+    delta.add(*(_old_value(state, attribute) for attribute in ("created_at", "status", "credit_score", "eligibility_score")),
+              sign=-1)
+    delta.add(target.created_at, target.status, target.credit_score, target.eligibility_score)
+    delta.apply(connection)
+
+@event.listens_for(Applicant, "after_delete")
+def _rollup_after_delete(mapper, connection, target):
+    delta = RollupDelta()
+    delta.add(target.created_at, target.status, target.credit_score, target.eligibility_score, sign=-1)
+    delta.apply(connection)
+
+def _averages(row) -> Dict[str, float]:
+    return {
+        "avg_credit_score": round(row.credit_score_sum / row.credit_score_count, 2) if row.credit_score_count else 0,
+        "avg_eligibility_score": round(row.eligibility_score_sum / row.eligibility_score_count, 2) if row.eligibility_score_count else 0,
+    }
+
+def read_report(db: Session) -> Dict[str, Any]:
+    row = db.query(ApplicantRollup).filter(ApplicantRollup.bucket == TOTAL_BUCKET).first()
+    if row is None:
+        return {
+            "total_applicants": 0,
+            "approved": 0,
+            "rejected": 0,
+            "evaluating": 0,
+            "avg_credit_score": 0,
+            "avg_eligibility_score": 0
+        }
+    return {
+        "total_applicants": row.total_count,
+        "approved": row.approved_count,
+        "rejected": row.rejected_count,
+        "evaluating": row.evaluating_count,
+        **_averages(row)
+    }
+
+def read_daily_report(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+    query = db.query(ApplicantDailyRollup)
+    if start is not None:
+        query = query.filter(ApplicantDailyRollup.day >= start)
+    if end is not None:
+        query = query.filter(ApplicantDailyRollup.day < end)
+    return [
+        {
+            "day": row.day,
+            "total_applicants": row.total_count,
+            "approved": row.approved_count,
+            "rejected": row.rejected_count,
+            "evaluating": row.evaluating_count,
+            "pending_documents": row.pending_documents_count,
+            **_averages(row)
+        }
+        for row in query.order_by(ApplicantDailyRollup.day).all()
+    ]
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute every rollup row from the applicants table in one grouped scan."""
+    grouped = db.query(
+        func.date(Applicant.created_at),
+        Applicant.status,
+        func.count(Applicant.id),
+        func.coalesce(func.sum(Applicant.credit_score), 0),
+        func.count(Applicant.credit_score),
+        func.coalesce(func.sum(Applicant.eligibility_score), 0),
+        func.count(Applicant.eligibility_score)
+    ).group_by(func.date(Applicant.created_at), Applicant.status).all()
+
+    delta = RollupDelta()
+    for day, status, count, credit_sum, credit_count, eligibility_sum, eligibility_count in grouped:
+        changes = {
+            "total_count": count,
+            "credit_score_sum": credit_sum,
+            "credit_score_count": credit_count,
+            "eligibility_score_sum": eligibility_sum,
+            "eligibility_score_count": eligibility_count
+        }
+        if status in STATUS_COUNT_COLUMNS:
+            changes[STATUS_COUNT_COLUMNS[status]] = count
+        buckets = [delta.total]
+        if day is not None:
+            buckets.append(delta.daily[date.fromisoformat(str(day))])
+        for bucket in buckets:
+            for column, value in changes.items():
+                bucket[column] += value
+
+    try:
+        connection = db.connection()
+        connection.execute(delete(ApplicantDailyRollup.__table__))
+        connection.execute(delete(ApplicantRollup.__table__))
+        delta.apply(connection)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(delta.daily)
+
+def ensure_rollups(db: Session):
+    """Build rollups for databases that predate the rollup tables."""
+    has_rollup = db.query(ApplicantRollup.bucket).filter(ApplicantRollup.bucket == TOTAL_BUCKET).first()
+    if has_rollup is None and db.query(Applicant.id).first() is not None:
+        rebuild_rollups(db)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the applicant reporting rollups")
+    parser.add_argument("command", choices=["rebuild", "show"])
+    args = parser.parse_args(argv)
+
+    from main import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            days = rebuild_rollups(db)
+            print(f"Rebuilt rollups ({days} daily buckets)")
+        print(read_report(db))
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+"""Admin user and sample applicants for a new database. Used by the full-mode startup and by
+`python migrations.py --seed`, which must not import the app to get them."""
+from sqlalchemy.orm import Session
+from models import Applicant, User, RoleEnum
+from password_hashing import get_pwd_context
+
+SAMPLE_APPLICANTS = [
+    {"name": "Rajesh Kumar", "income": 75000, "requested_amount": 500000, "credit_score": 750},
+    {"name": "Priya Sharma", "income": 45000, "requested_amount": 300000, "credit_score": 680},
+    {"name": "Amit Patel", "income": 55000, "requested_amount": 800000, "credit_score": 620},
+    {"name": "Sneha Reddy", "income": 65000, "requested_amount": 400000, "credit_score": 720},
+    {"name": "Vikram Singh", "income": 85000, "requested_amount": 600000, "credit_score": 780},
+]
+
+def init_sample_data(db: Session):
+    # Create admin user
+    admin_exists = db.query(User).filter(User.email == "admin@nbfc.com").first()
+    if not admin_exists:
+        admin_user = User(
+            email="admin@nbfc.com",
+            password=get_pwd_context().hash("admin123"),
+            role=RoleEnum.ADMIN
+        )
+        db.add(admin_user)
+    
+    # Create sample applicants
+    names = [data["name"] for data in SAMPLE_APPLICANTS]
+    existing = {row.name for row in db.query(Applicant.name).filter(Applicant.name.in_(names))}
+    for data in SAMPLE_APPLICANTS:
+        if data["name"] not in existing:
+            db.add(Applicant(**data))
+    
+    db.commit()
@@ -0,0 +1,333 @@
+"""Underwriting scoring policy loaded from a versioned JSON file.
+
+Factor bands are compiled once into sorted breakpoint tuples and looked up with bisect, so a
+score costs one binary search per factor instead of a chain of comparisons. The policy file is
+re-read when it changes on disk (or on an explicit reload) and swapped in as a whole; an
+evaluation always uses a single policy and records its version.
+"""
+from bisect import bisect_left, bisect_right
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_policy.json")
+
+INPUTS = ("income", "credit_score", "lti_ratio", "employment_type")
+COMPARISONS = (">=", "<=")
+# Decision rules compare these values: min_<value> is an inclusive lower bound, max_<value> an upper one
+DECISION_INPUTS = ("score", "credit_score", "income", "lti_ratio")
+RULE_CONDITIONS = tuple(f"{bound}_{name}" for name in DECISION_INPUTS for bound in ("min", "max"))
+
+class ScoringPolicyError(ValueError):
+    """The policy file is missing, malformed or inconsistent."""
+
+class BandFactor:
+    """Numeric factor: points for the first band whose threshold the input meets.
+
+    `>=` bands award the highest threshold at or below the input, `<=` bands the lowest
+    threshold at or above it. Both compile to ascending breakpoints plus one more point value
+    than breakpoints, indexed by bisect_right (>=) or bisect_left (<=)."""
+
+    def __init__(self, name: str, input_name: str, compare: str, bands: List[Tuple[float, float]], default: float):
+        self.name = name
+        self.input = input_name
+        self.compare = compare
+        ordered = sorted(bands)
+        self.breakpoints = tuple(threshold for threshold, _ in ordered)
+        if compare == ">=":
+            self.points = (default,) + tuple(points for _, points in ordered)
+        else:
+            self.points = tuple(points for _, points in ordered) + (default,)
+        self.score = self._lookup()
+
+    def _lookup(self):
+        breakpoints, points = self.breakpoints, self.points
+        index = bisect_right if self.compare == ">=" else bisect_left
+        return lambda value: points[index(breakpoints, value)]
+
+class CategoryFactor:
+    def __init__(self, name: str, input_name: str, categories: Dict[str, float], default: float):
+        self.name = name
+        self.input = input_name
+        self.categories = dict(categories)
+        self.default = default
+        self.score = self._lookup()
+
+    def _lookup(self):
+        get, default = self.categories.get, self.default
+        return lambda value: get(value, default)
+
+class DecisionRule:
+    def __init__(self, approve: bool, reason: str, **conditions: float):
+        self.approve = approve
+        self.reason = reason
+        self.conditions = conditions
+
+    def bounds(self) -> Dict[str, Tuple[float, float]]:
+        """(low, high) for every decision input the rule constrains; a missing side is unbounded."""
+        bounds = {}
+        for name in DECISION_INPUTS:
+            low, high = self.conditions.get(f"min_{name}"), self.conditions.get(f"max_{name}")
+            if low is not None or high is not None:
+                bounds[name] = (float("-inf") if low is None else low, float("inf") if high is None else high)
+        return bounds
+
+    def compiled(self) -> Tuple[Tuple[int, float, float], ...]:
+        # Only the constrained inputs are compared: (position in DECISION_INPUTS, low, high)
+        return tuple((DECISION_INPUTS.index(name), low, high) for name, (low, high) in self.bounds().items())
+
+    def format_reason(self, score: float, credit_score: float, income: float, lti_ratio: float) -> str:
+        return self.reason.format(score=score, credit_score=credit_score, income=income, lti_ratio=lti_ratio)
+
+class ScoringPolicy:
+    def __init__(self, version: str, factors: List[Any], rules: List[DecisionRule],
+                 score_range: Tuple[float, float] = (0, 100)):
+        self.version = version
+        self.factors = tuple(factors)
+        # The default decision is the last rule and has no conditions
+        self.rules = tuple(rules)
+        self.min_score, self.max_score = score_range
+        # Flattened for the per-applicant path: (name, position in the input tuple, lookup)
+        self._lookups = tuple((factor.name, INPUTS.index(factor.input), factor.score) for factor in self.factors)
+        self._decisions = tuple((rule.compiled(), rule) for rule in self.rules)
+
+    def score_factors(self, income: float, credit_score: float, requested_amount: float,
+                      employment_type: Optional[str]) -> Dict[str, float]:
+        inputs = (income, credit_score, requested_amount / (income * 12), employment_type)
+        return {name: lookup(inputs[position]) for name, position, lookup in self._lookups}
+
+    def clamp(self, score: float) -> float:
+        return min(self.max_score, max(self.min_score, score))
+
+    def decision_rule(self, score: float, credit_score: float, income: float, lti_ratio: float) -> DecisionRule:
+        """The first rule whose conditions all hold; the default rule has none."""
+        values = (score, credit_score, income, lti_ratio)
+        for checks, rule in self._decisions:
+            for position, low, high in checks:
+                if not low <= values[position] <= high:
+                    break
+            else:
+                return rule
+
+    def decide(self, score: float, credit_score: float, income: float, requested_amount: float) -> Dict[str, Any]:
+        lti_ratio = requested_amount / (income * 12)
+        rule = self.decision_rule(score, credit_score, income, lti_ratio)
+        return {"approved": rule.approve, "reason": rule.format_reason(score, credit_score, income, lti_ratio)}
+
+    def evaluate(self, income: float, credit_score: float, requested_amount: float,
+                 employment_type: Optional[str]) -> Dict[str, Any]:
+        score_factors = self.score_factors(income, credit_score, requested_amount, employment_type)
+        eligibility_score = self.clamp(sum(score_factors.values()))
+        lti_ratio = requested_amount / (income * 12)
+        rule = self.decision_rule(eligibility_score, credit_score, income, lti_ratio)
+        return {
+            "status": "approved" if rule.approve else "rejected",
+            "eligibility_score": eligibility_score,
+            "reason": rule.format_reason(eligibility_score, credit_score, income, lti_ratio),
+            "score_factors": score_factors,
+            "policy_version": self.version,
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        factors = {}
+        for factor in self.factors:
+            if isinstance(factor, BandFactor):
+                factors[factor.name] = {"input": factor.input, "compare": factor.compare,
+                                        "breakpoints": list(factor.breakpoints), "points": list(factor.points)}
+            else:
+                factors[factor.name] = {"input": factor.input, "categories": factor.categories, "default": factor.default}
+        return {"version": self.version, "score_range": [self.min_score, self.max_score], "factors": factors,
+                "rules": [{"approve": rule.approve, "reason": rule.reason, **rule.conditions} for rule in self.rules]}
+
+def _number(value: Any, where: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ScoringPolicyError(f"{where} must be a number, got {value!r}")
+    return value
+
+def compile_policy(config: Dict[str, Any]) -> ScoringPolicy:
+    """Validate a parsed policy document and compile it into lookup tables."""
+    if not isinstance(config, dict):
+        raise ScoringPolicyError("policy must be a JSON object")
+    version = config.get("version")
+    if not isinstance(version, str) or not version:
+        raise ScoringPolicyError("policy needs a non-empty string 'version'")
+
+    factors = []
+    for name, spec in (config.get("factors") or {}).items():
+        where = f"factor {name!r}"
+        input_name = spec.get("input")
+        if input_name not in INPUTS:
+            raise ScoringPolicyError(f"{where}: input must be one of {', '.join(INPUTS)}")
+        default = _number(spec.get("default"), f"{where} default")
+        if "categories" in spec:
+            categories = {str(key): _number(points, f"{where} category {key!r}") for key, points in spec["categories"].items()}
+            factors.append(CategoryFactor(name, input_name, categories, default))
+            continue
+        compare = spec.get("compare")
+        if compare not in COMPARISONS:
+            raise ScoringPolicyError(f"{where}: compare must be one of {', '.join(COMPARISONS)}")
+        bands = [(_number(threshold, f"{where} threshold"), _number(points, f"{where} points"))
+                 for threshold, points in spec.get("bands") or []]
+        thresholds = [threshold for threshold, _ in bands]
+        if len(set(thresholds)) != len(thresholds):
+            raise ScoringPolicyError(f"{where}: duplicate band thresholds")
+        factors.append(BandFactor(name, input_name, compare, bands, default))
+    if not factors:
+        raise ScoringPolicyError("policy defines no factors")
+
+    decision = config.get("decision") or {}
+    rules = []
+    for position, spec in enumerate(decision.get("rules") or []):
+        unknown = set(spec) - {"approve", "reason", *RULE_CONDITIONS}
+        if unknown:
+            raise ScoringPolicyError(f"rule {position}: unknown keys {', '.join(sorted(unknown))}")
+        conditions = {key: _number(spec[key], f"rule {position} {key}") for key in RULE_CONDITIONS if key in spec}
+        if not conditions:
+            raise ScoringPolicyError(f"rule {position} has no conditions; use 'default' instead")
+        for name in DECISION_INPUTS:
+            if conditions.get(f"min_{name}", float("-inf")) > conditions.get(f"max_{name}", float("inf")):
+                raise ScoringPolicyError(f"rule {position}: min_{name} is above max_{name}")
+        rules.append(DecisionRule(bool(spec.get("approve")), _reason(spec, f"rule {position}"), **conditions))
+    if "default" not in decision:
+        raise ScoringPolicyError("decision needs a 'default' outcome")
+    rules.append(DecisionRule(bool(decision["default"].get("approve")), _reason(decision["default"], "default decision")))
+
+    score_range = config.get("score_range", [0, 100])
+    if len(score_range) != 2 or _number(score_range[0], "score_range") > _number(score_range[1], "score_range"):
+        raise ScoringPolicyError("score_range must be [min, max]")
+    return ScoringPolicy(version, factors, rules, tuple(score_range))
+
+def _reason(spec: Dict[str, Any], where: str) -> str:
+    reason = spec.get("reason")
+    if not isinstance(reason, str):
+        raise ScoringPolicyError(f"{where} needs a 'reason' template")
+    try:
+        reason.format(score=0.0, credit_score=0, income=0.0, lti_ratio=0.0)
+    except (KeyError, IndexError, ValueError) as e:
+        raise ScoringPolicyError(f"{where} reason template is invalid: {e}")
+    return reason
+
+def load_policy(path: str) -> ScoringPolicy:
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except OSError as e:
+        raise ScoringPolicyError(f"cannot read {path}: {e}")
+    except ValueError as e:
+        raise ScoringPolicyError(f"{path} is not valid JSON: {e}")
+    return compile_policy(config)
+
+class PolicyStore:
+    """Holds the current compiled policy and swaps in a new one when the file changes.
+
+    The file is stat'ed at most every `check_interval` seconds from `current()`. A file that
+    fails to load leaves the previous policy in place, so a half-written edit never takes effect;
+    replace the file atomically (write then rename) to publish a new version."""
+
+    def __init__(self, path: str = DEFAULT_POLICY_PATH, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._policy = load_policy(path)
+        self._loaded_at = time.time()
+        self._next_check = time.monotonic() + check_interval
+        self._stats = {"reloads": 0, "failed_reloads": 0}
+        self._last_error: Optional[str] = None
+
+    def current(self) -> ScoringPolicy:
+        if self.check_interval >= 0 and time.monotonic() >= self._next_check:
+            self._check()
+        return self._policy
+
+    def reload(self) -> ScoringPolicy:
+        """Load the file now; raises ScoringPolicyError and keeps the old policy if it is invalid."""
+        with self._lock:
+            self._load(self._stat())
+            return self._policy
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, version=self._policy.version, path=self.path,
+                        loaded_at=self._loaded_at, last_error=self._last_error)
+
+    def _check(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already checking
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            signature = self._stat()
+            if signature == self._signature:
+                return
+            try:
+                self._load(signature)
+            except ScoringPolicyError as e:
+                logger.error("Scoring policy reload failed, keeping version %s: %s", self._policy.version, e)
+        finally:
+            self._lock.release()
+
+    def _load(self, signature):
+        # Remember the failing signature too so a broken file is not re-parsed on every check
+        self._signature = signature
+        try:
+            policy = load_policy(self.path)
+        except ScoringPolicyError as e:
+            self._stats["failed_reloads"] += 1
+            self._last_error = str(e)
+            raise
+        self._policy = policy
+        self._loaded_at = time.time()
+        self._stats["reloads"] += 1
+        self._last_error = None
+        logger.info("Loaded scoring policy %s from %s", policy.version, self.path)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+_default_store: Optional[PolicyStore] = None
+_default_store_lock = threading.Lock()
+
+def get_default_policy_store() -> PolicyStore:
+    """The process-wide store, created from SCORING_POLICY_PATH on first use."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = PolicyStore(
+                    os.getenv("SCORING_POLICY_PATH", DEFAULT_POLICY_PATH),
+                    float(os.getenv("SCORING_POLICY_CHECK_INTERVAL", "5"))
+                )
+    return _default_store
+
+def set_default_policy_store(store: Optional[PolicyStore]):
+    global _default_store
+    _default_store = store
+
+def current_policy() -> ScoringPolicy:
+    return get_default_policy_store().current()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate a scoring policy file and show its compiled tables")
+    parser.add_argument("path", nargs="?", default=os.getenv("SCORING_POLICY_PATH", DEFAULT_POLICY_PATH))
+    args = parser.parse_args(argv)
+
+    try:
+        policy = load_policy(args.path)
+    except ScoringPolicyError as e:
+        print(f"Invalid policy: {e}")
+        return 1
+    print(json.dumps(policy.describe(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
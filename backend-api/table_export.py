@@ -0,0 +1,293 @@
+"""Chunked export of the applicants and agent_logs tables to CSV, Parquet or Arrow IPC.
+
+Rows are read from one server-side cursor (yield_per) in the order of the table's watermark
+column, applicants.created_at or agent_logs.timestamp, and each chunk is encoded and handed
+on before the next one is fetched, so memory follows chunk_size whatever the table size.
+The upper bound is fixed when the export starts: rows with since < watermark <= until, where
+until defaults to the newest row. Passing an export's watermark as the next export's since
+gives incremental exports without gaps or repeats.
+"""
+from sqlalchemy import select, func, Boolean, DateTime, Float, Integer
+from sqlalchemy.orm import Session
+from models import Applicant, AgentLog
+from agent_log_storage import with_payloads
+from datetime import datetime
+import argparse
+import csv
+import enum
+import io
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+FORMATS = (FORMAT_CSV, FORMAT_PARQUET, FORMAT_ARROW)
+
+MEDIA_TYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+    FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+}
+EXTENSIONS = {FORMAT_CSV: "csv", FORMAT_PARQUET: "parquet", FORMAT_ARROW: "arrows"}
+
+# table name -> watermark column
+EXPORT_TABLES = {
+    "applicants": Applicant.created_at,
+    "agent_logs": AgentLog.timestamp,
+}
+
+DEFAULT_CHUNK_SIZE = 10000
+PARQUET_COMPRESSION = "zstd"
+
+class ExportError(ValueError):
+    pass
+
+def _pyarrow():
+    # Only the columnar formats need pyarrow, and importing it takes a while
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ExportError("Parquet and Arrow exports need pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def arrow_schema(columns: Sequence[Any]):
+    pa = _pyarrow()
+    fields = []
+    for column in columns:
+        if isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+class _ChunkSink:
+    """Write-only file for pyarrow writers; take() returns what was written since the last call."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+class TableExport:
+    """One export of `table`: iterate it for the encoded bytes. `until` (the watermark to pass
+    as the next `since`) is resolved on construction; `rows` and `bytes` count what was yielded."""
+
+    def __init__(self, db: Session, table: str, fmt: str = FORMAT_CSV, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if table not in EXPORT_TABLES:
+            raise ExportError(f"Unknown table {table}; use one of {', '.join(EXPORT_TABLES)}")
+        if fmt not in FORMATS:
+            raise ExportError(f"Unsupported format {fmt}; use one of {', '.join(FORMATS)}")
+        if chunk_size <= 0:
+            raise ExportError("chunk_size must be positive")
+        if fmt != FORMAT_CSV:
+            _pyarrow()
+        self.db = db
+        self.table = table
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.watermark_column = EXPORT_TABLES[table]
+        self.columns = list(self.watermark_column.table.columns)
+        self.since = since
+        if until is None:
+            stmt = select(func.max(self.watermark_column))
+            if since is not None:
+                stmt = stmt.where(self.watermark_column > since)
+            until = db.execute(stmt).scalar()
+        self.until = until
+        self.rows = 0
+        self.bytes = 0
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Where the next incremental export starts: `until`, or `since` when there was nothing new."""
+        return self.until if self.until is not None else self.since
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.fmt]
+
+    @property
+    def filename(self) -> str:
+        """applicants-<until>.parquet, or applicants-<since>-<until>.parquet for an incremental export."""
+        stamps = [value.strftime("%Y%m%dT%H%M%S%f") for value in (self.since, self.until) if value is not None]
+        return "-".join([self.table, *stamps]) + f".{EXTENSIONS[self.fmt]}"
+
+    def chunks(self) -> Iterator[Sequence[Any]]:
+        if self.until is None:
+            return
+        stmt = select(*self.columns).where(self.watermark_column <= self.until).order_by(self.watermark_column)
+        if self.since is not None:
+            stmt = stmt.where(self.watermark_column > self.since)
+        result = self.db.execute(stmt.execution_options(yield_per=self.chunk_size))
+        for partition in result.partitions():
+            self.rows += len(partition)
+            if self.table == "agent_logs":
+                # Results moved to log_payloads are exported inline, as they were logged
+                partition = with_payloads(self.db, partition)
+            yield partition
+
+    def __iter__(self) -> Iterator[bytes]:
+        encode = {FORMAT_CSV: self._csv, FORMAT_PARQUET: self._parquet, FORMAT_ARROW: self._arrow}[self.fmt]
+        for data in encode():
+            if data:
+                self.bytes += len(data)
+                yield data
+
+    def _csv(self) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in self.columns])
+        for chunk in self.chunks():
+            writer.writerows([_csv_value(value) for value in row] for row in chunk)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    def _record_batch(self, schema, chunk: Sequence[Any]):
+        pa = _pyarrow()
+        arrays = []
+        for index, field in enumerate(schema):
+            values = [row[index] for row in chunk]
+            if pa.types.is_string(field.type):
+                values = [value.value if isinstance(value, enum.Enum) else value for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def _columnar(self, open_writer) -> Iterator[bytes]:
+        pa = _pyarrow()
+        schema = arrow_schema(self.columns)
+        sink = _ChunkSink()
+        writer = open_writer(pa.PythonFile(sink, mode="w"), schema)
+        try:
+            for chunk in self.chunks():
+                writer.write_batch(self._record_batch(schema, chunk))
+                yield sink.take()
+        finally:
+            writer.close()
+        yield sink.take()
+
+    def _parquet(self) -> Iterator[bytes]:
+        pa = _pyarrow()
+        # Every chunk becomes one row group
+        return self._columnar(lambda sink, schema: pa.parquet.ParquetWriter(sink, schema, compression=PARQUET_COMPRESSION))
+
+    def _arrow(self) -> Iterator[bytes]:
+        pa = _pyarrow()
+        return self._columnar(pa.ipc.new_stream)
+
+def read_state(path: Optional[str]) -> Dict[str, str]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_state(path: str, state: Dict[str, str]):
+    partial = path + ".partial"
+    with open(partial, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(partial, path)
+
+def export_to_file(db: Session, table: str, fmt: str, out_dir: str, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    start = time.perf_counter()
+    export = TableExport(db, table, fmt, since, until, chunk_size)
+    path = None
+    # No file when nothing is newer than since
+    if export.until is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, export.filename)
+        partial = path + ".partial"
+        with open(partial, "wb") as f:
+            for data in export:
+                f.write(data)
+        os.replace(partial, path)  # a file under its final name is always complete
+    return {
+        "table": table,
+        "path": path,
+        "rows": export.rows,
+        "bytes": export.bytes,
+        "since": since.isoformat() if since is not None else None,
+        "watermark": export.watermark.isoformat() if export.watermark is not None else None,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export applicants and agent logs to CSV, Parquet or Arrow IPC")
+    parser.add_argument("--table", action="append", dest="tables", choices=list(EXPORT_TABLES),
+                        help="Table to export (repeatable, default: all)")
+    parser.add_argument("--format", choices=FORMATS, default=FORMAT_PARQUET)
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only rows newer than this watermark")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Default: the newest row")
+    parser.add_argument("--state", help="JSON file of per-table watermarks: read for --since, updated after each table")
+    args = parser.parse_args(argv)
+
+    from main import SessionLocal
+
+    state = read_state(args.state)
+    db = SessionLocal()
+    try:
+        for table in args.tables or list(EXPORT_TABLES):
+            since = args.since
+            if since is None and table in state:
+                since = datetime.fromisoformat(state[table])
+            try:
+                summary = export_to_file(db, table, args.format, args.out_dir, since, args.until, args.chunk_size)
+            except ExportError as e:
+                print(f"Export failed: {e}", file=sys.stderr)
+                return 1
+            print(json.dumps(summary))
+            if args.state and summary["watermark"] is not None:
+                state[table] = summary["watermark"]
+                write_state(args.state, state)
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
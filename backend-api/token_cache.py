@@ -0,0 +1,111 @@
+from sqlalchemy import event
+from models import User
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenCache:
+    """Bounded LRU of verified JWT claims keyed by a digest of the token.
+    Entries expire at the token's `exp`; tokens and subjects can be revoked. Revocations are
+    kept in this process only: other workers accept a revoked token until it expires."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._revoked_tokens: Dict[str, float] = {}  # digest -> exp
+        self._revoked_subjects: Dict[str, float] = {}  # sub -> revoked at
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "revocations": 0}
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        digest = token_digest(token)
+        with self._lock:
+            claims = self._entries.get(digest)
+            if claims is None:
+                self._stats["misses"] += 1
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self._entries[digest]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self._stats["hits"] += 1
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> bool:
+        """Cache freshly verified claims; returns False if the token has been revoked."""
+        digest = token_digest(token)
+        with self._lock:
+            if self._is_revoked(digest, claims):
+                return False
+            self._entries[digest] = claims
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            return True
+
+    def is_revoked(self, token: str, claims: Dict[str, Any]) -> bool:
+        with self._lock:
+            return self._is_revoked(token_digest(token), claims)
+
+    def revoke_token(self, token: str, exp: Optional[float] = None):
+        digest = token_digest(token)
+        with self._lock:
+            claims = self._entries.pop(digest, None)
+            if exp is None:
+                exp = claims.get("exp", 0) if claims else time.time() + 24 * 3600
+            self._revoked_tokens[digest] = exp
+            self._stats["revocations"] += 1
+            self._prune_revoked()
+
+    def revoke_subject(self, subject: str):
+        """Invalidate every token issued to `subject` so far (logout everywhere, deactivation)."""
+        with self._lock:
+            self._revoked_subjects[subject] = time.time()
+            for digest in [d for d, claims in self._entries.items() if claims.get("sub") == subject]:
+                del self._entries[digest]
+            self._stats["revocations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["revoked_tokens"] = len(self._revoked_tokens)
+            stats["revoked_subjects"] = len(self._revoked_subjects)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _is_revoked(self, digest: str, claims: Dict[str, Any]) -> bool:
+        if digest in self._revoked_tokens:
+            return True
+        revoked_at = self._revoked_subjects.get(claims.get("sub"))
+        # Tokens now carry a fractional iat; an older whole-second iat from the second of the
+        # revocation compares as earlier and is revoked too
+        return revoked_at is not None and claims.get("iat", 0) < revoked_at
+
+    def _prune_revoked(self):
+        now = time.time()
+        for digest in [d for d, exp in self._revoked_tokens.items() if exp <= now]:
+            del self._revoked_tokens[digest]
+
+token_cache = TokenCache(int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+
+# Deactivating a user revokes every token they hold
+@event.listens_for(User.is_active, "set")
+def _revoke_on_deactivate(target, value, oldvalue, initiator):
+    if value is False and target.email:
+        token_cache.revoke_subject(target.email)